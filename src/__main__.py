@@ -2,14 +2,11 @@
 import asyncio
 import logging
 import signal
-import sys
 from .config import config
 from .core.router import MessageRouter
-from .connectors.email_connector import EmailConnector
-from .connectors.telegram_connector import TelegramConnector
-from .connectors.whatsapp_connector import WhatsAppConnector
-from .connectors.linkedin_connector import LinkedInConnector
-from .connectors.instagram_connector import InstagramConnector
+from .utils.executors import executors
+from .utils.metrics import create_metrics_server, metrics
+from .connectors.registry import connector_registry
 
 # Configure logging
 logging.basicConfig(
@@ -24,73 +21,97 @@ class AgentMicheal:
     def __init__(self):
         self.router = MessageRouter()
         self.connectors = {}
+        self.metrics_server = None
+        self.router_task = None
+        self.shutdown_requested = None
         self.running = False
     
     def setup_connectors(self):
-        """Initialize and register all connectors."""
-        # Email connector
-        if config.email_user and config.email_password:
-            email_connector = EmailConnector(self.router)
-            self.router.register_connector('email', email_connector)
-            self.connectors['email'] = email_connector
-            logger.info("Email connector registered")
-        
-        # Telegram connector
-        if config.telegram_bot_token:
-            telegram_connector = TelegramConnector(self.router)
-            self.router.register_connector('telegram', telegram_connector)
-            self.connectors['telegram'] = telegram_connector
-            logger.info("Telegram connector registered")
-        
-        # WhatsApp connector
-        if config.twilio_account_sid and config.twilio_auth_token:
-            whatsapp_connector = WhatsAppConnector(self.router)
-            self.router.register_connector('whatsapp', whatsapp_connector)
-            self.connectors['whatsapp'] = whatsapp_connector
-            logger.info("WhatsApp connector registered")
-        
-        # LinkedIn connector (stub)
-        linkedin_connector = LinkedInConnector(self.router)
-        self.router.register_connector('linkedin', linkedin_connector)
-        self.connectors['linkedin'] = linkedin_connector
-        logger.info("LinkedIn connector registered (stub)")
-        
-        # Instagram connector (stub)
-        instagram_connector = InstagramConnector(self.router)
-        self.router.register_connector('instagram', instagram_connector)
-        self.connectors['instagram'] = instagram_connector
-        logger.info("Instagram connector registered (stub)")
+        """Create and register the selected connectors, importing only their modules."""
+        for channel in connector_registry.selected():
+            try:
+                connector = connector_registry.create(channel, self.router)
+            except Exception as e:
+                logger.error(f"Error loading {channel} connector: {e}")
+                continue
+            self.router.register_connector(channel, connector)
+            self.connectors[channel] = connector
     
     def setup_signal_handlers(self):
         """Setup signal handlers for graceful shutdown."""
-        def signal_handler(signum, frame):
+        self.shutdown_requested = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        
+        def signal_handler(signum):
             logger.info(f"Received signal {signum}, shutting down...")
-            self.stop()
-            sys.exit(0)
+            self.shutdown_requested.set()
         
-        signal.signal(signal.SIGINT, signal_handler)
-        signal.signal(signal.SIGTERM, signal_handler)
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(signum, signal_handler, signum)
     
     async def start(self):
-        """Start the agent."""
+        """Start the agent and run until a shutdown signal arrives."""
         logger.info("Starting Agent Micheal...")
         self.running = True
         
         self.setup_connectors()
         self.setup_signal_handlers()
+        await self.start_metrics_server()
         
         # Start the router (which starts all connectors)
-        await self.router.start()
+        self.router_task = asyncio.create_task(self.router.start())
+        signalled = asyncio.create_task(self.shutdown_requested.wait())
+        try:
+            await asyncio.wait({self.router_task, signalled}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            signalled.cancel()
+        if self.router_task.done():
+            # Raises if the router failed; otherwise every connector has exited
+            self.router_task.result()
+            logger.warning("All connectors stopped, shutting down")
+        await self.shutdown()
+    
+    async def shutdown(self):
+        """Stop taking new messages, then let queued work and replies finish."""
+        for connector in self.connectors.values():
+            if hasattr(connector, 'stop'):
+                connector.stop()
+        if await self.router.drain(config.shutdown_timeout):
+            logger.info("Drained all queued messages and replies")
+        else:
+            logger.warning(f"Shutdown deadline of {config.shutdown_timeout}s passed; "
+                           f"unsent replies stay in the outbox for the next start")
+        await self.router.stop_handler()
+    
+    async def start_metrics_server(self):
+        """Expose /metrics and /metrics.json unless disabled."""
+        if not config.metrics_port:
+            return
+        try:
+            self.metrics_server = create_metrics_server(metrics, config.metrics_host, config.metrics_port)
+            await self.metrics_server.start()
+            logger.info(f"Metrics available on http://{config.metrics_host}:{self.metrics_server.port}/metrics")
+        except Exception as e:
+            self.metrics_server = None
+            logger.error(f"Error starting metrics server: {e}")
     
     def stop(self):
         """Stop the agent."""
+        if not self.running:
+            return
         logger.info("Stopping Agent Micheal...")
         self.running = False
+        if self.router_task:
+            self.router_task.cancel()
         self.router.stop()
+        if self.metrics_server:
+            self.metrics_server.close()
         
         for connector in self.connectors.values():
             if hasattr(connector, 'stop'):
                 connector.stop()
+        
+        executors.shutdown()
 
 async def main():
     """Main function."""
@@ -101,6 +122,7 @@ async def main():
         logger.info("Received keyboard interrupt")
     except Exception as e:
         logger.error(f"Unexpected error: {e}")
+        raise
     finally:
         agent.stop()
 
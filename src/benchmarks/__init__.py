@@ -0,0 +1 @@
+"""Benchmarks for agent_micheal. Run a module with ``python -m src.benchmarks.<name>``."""
\ No newline at end of file
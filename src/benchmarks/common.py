@@ -0,0 +1,55 @@
+"""Shared helpers for benchmark modules."""
+import json
+import math
+import os
+import platform
+import subprocess
+import time
+from typing import Any, Dict, List, Optional, Sequence
+
+def percentile(values: Sequence[float], pct: float) -> float:
+    """Return the ``pct`` percentile (0-100) using nearest-rank on sorted data."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = min(len(ordered), max(1, math.ceil(pct / 100 * len(ordered))))
+    return ordered[rank - 1]
+
+def summarize_latencies(values: Sequence[float]) -> Dict[str, float]:
+    """Summarize latencies in seconds as milliseconds."""
+    return {
+        'count': len(values),
+        'p50_ms': percentile(values, 50) * 1000,
+        'p95_ms': percentile(values, 95) * 1000,
+        'p99_ms': percentile(values, 99) * 1000,
+        'max_ms': max(values) * 1000 if values else 0.0
+    }
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def write_results(benchmark: str, results: List[Dict[str, Any]], output: Optional[str] = None) -> Dict[str, Any]:
+    """Print results and optionally write them as JSON for cross-commit comparison."""
+    report = {
+        'benchmark': benchmark,
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'commit': _git_commit(),
+        'python': platform.python_version(),
+        'results': results
+    }
+    for result in results:
+        print(json.dumps(result))
+    if output:
+        directory = os.path.dirname(output)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {output}")
+    return report
\ No newline at end of file
@@ -0,0 +1,147 @@
+"""Benchmark email fetching on an attachment-heavy inbox.
+
+Serves generated emails (text and HTML alternatives, optionally with a large
+PDF attached) from an in-memory stand-in for the IMAP client and compares the
+previous ``BODY[TEXT]`` fetch with ``BODYSTRUCTURE`` plus a capped partial
+fetch of the text part, as run by ``EmailConnector``. Reports bytes
+downloaded, peak memory and time per batch:
+    
+    python -m src.benchmarks.email_fetch --messages 20 --attachment-mb 20
+"""
+import argparse
+import os
+import time
+import tracemalloc
+from email.message import Message as EmailMessage
+from email.mime.application import MIMEApplication
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+from typing import Any, Dict, List
+from imapclient.response_types import Address, Envelope
+from ..config import config
+from ..connectors.email_connector import EmailConnector, SyncCheckpoint
+from ..utils.security import SecurityUtils
+from .common import write_results
+
+TEXT = "Hi, please find the signed contract attached. Let me know if anything is missing. " * 4
+
+def make_email(attachment_bytes: int) -> EmailMessage:
+    message = MIMEMultipart('mixed')
+    alternative = MIMEMultipart('alternative')
+    alternative.attach(MIMEText(TEXT, 'plain', 'utf-8'))
+    alternative.attach(MIMEText(f"<html><body><p>{TEXT}</p></body></html>", 'html', 'utf-8'))
+    message.attach(alternative)
+    if attachment_bytes:
+        pdf = MIMEApplication(os.urandom(attachment_bytes), 'pdf')
+        pdf.add_header('Content-Disposition', 'attachment', filename='contract.pdf')
+        message.attach(pdf)
+    return message
+
+def structure_of(part: EmailMessage) -> tuple:
+    """Build the BODYSTRUCTURE imapclient would return for ``part``."""
+    if part.is_multipart():
+        params = (b'BOUNDARY', part.get_boundary().encode())
+        return ([structure_of(child) for child in part.get_payload()], part.get_content_subtype().upper().encode(),
+                params, None, None, None)
+    payload = part.get_payload().encode()
+    params = tuple(value for key, val in part.get_params()[1:] for value in (key.upper().encode(), val.encode()))
+    disposition = None
+    if part.get_content_disposition():
+        disposition = (part.get_content_disposition().upper().encode(), (b'FILENAME', part.get_filename().encode()))
+    fields = [part.get_content_maintype().upper().encode(), part.get_content_subtype().upper().encode(),
+              params or None, None, None, (part['Content-Transfer-Encoding'] or '7bit').upper().encode(),
+              len(payload)]
+    if part.get_content_maintype() == 'text':
+        fields.append(payload.count(b'\n'))
+    return tuple(fields + [None, disposition, None, None])
+
+def leaf_payloads(part: EmailMessage, prefix: str = '') -> Dict[str, bytes]:
+    """Encoded payload of every leaf part, keyed by IMAP section number."""
+    if not part.is_multipart():
+        return {prefix[:-1] or '1': part.get_payload().encode()}
+    payloads = {}
+    for index, child in enumerate(part.get_payload(), start=1):
+        payloads.update(leaf_payloads(child, f"{prefix}{index}."))
+    return payloads
+
+class FakeIMAPClient:
+    """Answers the FETCH items the connector uses and counts bytes sent."""
+    
+    def __init__(self, emails: Dict[int, EmailMessage]):
+        # Everything the server would have on disk is prepared up front
+        self.uids = list(emails)
+        self.raw = {uid: email.as_bytes() for uid, email in emails.items()}
+        self.structures = {uid: structure_of(email) for uid, email in emails.items()}
+        self.payloads = {uid: leaf_payloads(email) for uid, email in emails.items()}
+        self.bytes_sent = 0
+        self.envelope = Envelope(None, b'Contract', (Address(b'Jane', None, b'jane', b'example.com'),),
+                                 None, None, None, None, None, None, None)
+    
+    def search(self, criteria):
+        return list(self.uids)
+    
+    def fetch(self, ids: List[int], items: List[str]) -> Dict[int, Dict[bytes, Any]]:
+        response = {}
+        for uid in ids:
+            data: Dict[bytes, Any] = {b'ENVELOPE': self.envelope}
+            for item in items:
+                if item == 'BODY[TEXT]':
+                    raw = self.raw[uid]
+                    data[b'BODY[TEXT]'] = raw[raw.index(b'\n\n') + 2:]
+                elif item == 'BODYSTRUCTURE':
+                    data[b'BODYSTRUCTURE'] = self.structures[uid]
+                    self.bytes_sent += len(repr(data[b'BODYSTRUCTURE']))
+                elif item.startswith('BODY.PEEK['):
+                    section, cap = item[10:].split(']<0.')
+                    data[f'BODY[{section}]<0>'.encode()] = self.payloads[uid][section][:int(cap[:-1])]
+            self.bytes_sent += sum(len(value) for value in data.values() if isinstance(value, bytes))
+            response[uid] = data
+        return response
+
+def previous_fetch(client: FakeIMAPClient) -> List[str]:
+    """The previous connector: whole BODY[TEXT], sanitized as is."""
+    response = client.fetch(client.search('UNSEEN'), ['ENVELOPE', 'BODY[TEXT]'])
+    return [SecurityUtils.sanitize_text(data[b'BODY[TEXT]'].decode('utf-8', errors='ignore'))
+            for data in response.values()]
+
+def structured_fetch(client: FakeIMAPClient) -> List[str]:
+    connector = EmailConnector()
+    connector.client = client
+    connector.checkpoint = SyncCheckpoint()
+    return [connector._build_message(msg_id, fetched).text for msg_id, fetched in connector._fetch_new().items()]
+
+def measure(name: str, fetch, emails: Dict[int, EmailMessage]) -> Dict[str, Any]:
+    client = FakeIMAPClient(emails)
+    tracemalloc.start()
+    started = time.perf_counter()
+    texts = fetch(client)
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        'variant': name,
+        'messages': len(emails),
+        'bytes_downloaded': client.bytes_sent,
+        'peak_memory_bytes': peak,
+        'elapsed_s': round(elapsed, 4),
+        'avg_text_chars': round(sum(len(text) for text in texts) / len(texts))
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--messages', type=int, default=20)
+    parser.add_argument('--attachment-mb', type=float, default=20)
+    parser.add_argument('--output', help='write JSON results to this path')
+    args = parser.parse_args()
+    
+    emails = {uid: make_email(int(args.attachment_mb * 1024 * 1024) if uid % 2 else 0)
+              for uid in range(1, args.messages + 1)}
+    config.email_imap_host = 'imap.example.com'
+    results = [
+        measure('body_text', previous_fetch, emails),
+        measure('bodystructure_partial', structured_fetch, emails)
+    ]
+    write_results('email_fetch', results, args.output)
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
@@ -0,0 +1,78 @@
+"""Benchmark message construction, serialization and cached footprint.
+
+Compares the validated ``Message`` model with the trusted fast path, the
+previous ``model_dump`` + ``json.dumps`` record encoding with ``to_record`` +
+compact JSON, and a cached turn as a dict against the ``Turn`` tuple:
+    
+    python -m src.benchmarks.messages --iterations 200000
+"""
+import argparse
+import json
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Any, Callable, Dict, List
+from ..core.context import Turn
+from ..core.persistence import Message
+from ..core.storage import encode_json
+from .common import write_results
+
+FIELDS = dict(
+    id='Xk3v9QpL2mN8rT5wYb1cZg',
+    channel='telegram',
+    sender_id='123456789',
+    sender_name='Jane Doe',
+    text='Hi, I was wondering when my order will be delivered?',
+    received_at=datetime(2024, 5, 17, 14, 3, 22, 512345),
+    metadata={'chat_id': 123456789, 'message_id': 4242}
+)
+
+def rate(name: str, operation: Callable[[], Any], iterations: int, **extra) -> Dict[str, Any]:
+    started = time.perf_counter()
+    for _ in range(iterations):
+        operation()
+    elapsed = time.perf_counter() - started
+    return {'operation': name, 'iterations': iterations, 'per_second': round(iterations / elapsed), **extra}
+
+def footprint(build: Callable[[int], Any], count: int = 10000) -> float:
+    """Average bytes allocated per object while holding ``count`` of them."""
+    tracemalloc.start()
+    objects: List[Any] = [build(i) for i in range(count)]
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del objects
+    return round(size / count, 1)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--iterations', type=int, default=200000)
+    parser.add_argument('--output', help='write JSON results to this path')
+    args = parser.parse_args()
+    n = args.iterations
+    
+    message = Message(**FIELDS)
+    previous_line = json.dumps(message.model_dump(mode='json'), default=str).encode('utf-8')
+    compact_line = encode_json(message.to_record()).encode('utf-8')
+    record = json.loads(compact_line)
+    
+    results = [
+        rate('construct_validated', lambda: Message(**FIELDS), n),
+        rate('construct_trusted', lambda: Message.trusted(**FIELDS), n),
+        rate('encode_previous', lambda: json.dumps(message.model_dump(mode='json'), default=str).encode('utf-8'),
+             n, bytes_per_message=len(previous_line)),
+        rate('encode_compact', lambda: encode_json(message.to_record()).encode('utf-8'),
+             n, bytes_per_message=len(compact_line)),
+        rate('decode_validated', lambda: Message.model_validate(json.loads(previous_line)), n),
+        rate('decode_trusted', lambda: Message.from_record(json.loads(compact_line)), n),
+        {'operation': 'cached_turn_dict', 'bytes_per_turn': footprint(lambda i: {
+            'id': f"m{i}", 'text': record['text'], 'received_at': record['received_at'], 'intents': ['question']
+        })},
+        {'operation': 'cached_turn_tuple', 'bytes_per_turn': footprint(
+            lambda i: Turn(f"m{i}", record['text'], record['received_at'], ['question']))},
+        {'operation': 'message_model', 'bytes_per_message': footprint(
+            lambda i: Message.trusted(**{**FIELDS, 'metadata': {'chat_id': i}}))}
+    ]
+    write_results('messages', results, args.output)
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
@@ -0,0 +1,57 @@
+"""Benchmark the cost of metrics instrumentation.
+
+Measures a histogram observation, a counter increment and the instrumentation
+one message pays on its way through the pipeline (timestamps plus the stage,
+send and receive updates), and how long a scrape takes to render:
+    
+    python -m src.benchmarks.metrics --iterations 1000000
+"""
+import argparse
+import time
+from typing import Any, Callable, Dict
+from ..utils.metrics import MetricsRegistry
+from .common import write_results
+
+STAGES = ('ingress_wait', 'persist', 'intent', 'context', 'template', 'handler', 'route')
+
+def measure(name: str, operation: Callable[[], Any], iterations: int) -> Dict[str, Any]:
+    started = time.perf_counter()
+    for _ in range(iterations):
+        operation()
+    elapsed = time.perf_counter() - started
+    return {'operation': name, 'iterations': iterations, 'ns_per_op': round(elapsed / iterations * 1e9, 1)}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--iterations', type=int, default=1000000)
+    parser.add_argument('--output', help='write JSON results to this path')
+    args = parser.parse_args()
+    
+    registry = MetricsRegistry()
+    stages = [registry.histogram('agent_stage_seconds', stage=stage) for stage in STAGES]
+    send = registry.histogram('agent_send_seconds', channel='telegram')
+    received = registry.counter('agent_messages_received_total', channel='telegram')
+    sent = registry.counter('agent_messages_sent_total', channel='telegram')
+    clock = time.perf_counter
+    
+    def per_message():
+        received.inc()
+        previous = clock()
+        for histogram in stages:
+            now = clock()
+            histogram.observe(now - previous)
+            previous = now
+        send.observe(clock() - previous)
+        sent.inc()
+    
+    results = [
+        measure('histogram_observe', lambda: stages[0].observe(0.0003), args.iterations),
+        measure('counter_inc', received.inc, args.iterations),
+        measure('perf_counter', clock, args.iterations),
+        measure('per_message', per_message, args.iterations // 10),
+        measure('render_prometheus', registry.render_prometheus, 1000)
+    ]
+    write_results('metrics', results, args.output)
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
@@ -0,0 +1,190 @@
+"""End-to-end benchmark of the message pipeline.
+
+Drives synthetic messages from several channels through ``MessageRouter`` and
+``MessageHandler`` (ingress queue, workers, persistence, intent detection,
+context cache, templates, outbound scheduler) into in-memory connectors, with
+a real message store in a temporary directory. Runs offline:
+    
+    python -m src.benchmarks.pipeline --messages 5000 --concurrency 1,4,16 \\
+        --backends log,sqlite --store-sizes 0,10000 --output results/pipeline.json
+"""
+import argparse
+import asyncio
+import random
+import tempfile
+import time
+from collections import defaultdict, deque
+from datetime import datetime, timedelta
+from typing import Any, Callable, Deque, Dict, List
+from ..config import config
+from ..core.persistence import Message
+from ..core.router import MessageRouter
+from .common import summarize_latencies, write_results
+
+CHANNELS = ('telegram', 'whatsapp', 'email')
+PHRASES = [
+    "Hello there, good morning!",
+    "How do I reset my password?",
+    "Can you please send me the invoice?",
+    "There is a problem with my order, it arrived broken",
+    "Thanks a lot for the quick help",
+    "Goodbye and see you later",
+    "I was wondering about the delivery times for next week",
+    "ok"
+]
+
+class MessageFactory:
+    """Synthetic messages spread over channels and a fixed pool of senders."""
+    
+    def __init__(self, senders: int = 500, seed: int = 42):
+        self.rng = random.Random(seed)
+        self.senders = senders
+        self.count = 0
+    
+    def make(self, received_at: datetime = None) -> Message:
+        self.count += 1
+        sender = self.rng.randrange(self.senders)
+        return Message(
+            id=f"bench-{self.count}",
+            channel=CHANNELS[sender % len(CHANNELS)],
+            sender_id=f"sender-{sender}",
+            sender_name=f"Sender {sender}",
+            text=self.rng.choice(PHRASES),
+            received_at=received_at or datetime.now()
+        )
+
+class FakeConnector:
+    """In-memory connector: records when each reply is sent, per recipient."""
+    
+    def __init__(self, channel: str, on_send: Callable[[str], None]):
+        self.channel = channel
+        self.on_send = on_send
+        self.rate_limits = None
+    
+    async def send_message(self, recipient: str, text: str):
+        self.on_send(recipient)
+
+class StageTimer:
+    """Wraps methods on live pipeline objects and records their durations."""
+    
+    def __init__(self):
+        self.samples: Dict[str, List[float]] = defaultdict(list)
+    
+    def wrap(self, obj: Any, name: str, stage: str):
+        original = getattr(obj, name)
+        samples = self.samples[stage]
+        if asyncio.iscoroutinefunction(original):
+            async def timed(*args, **kwargs):
+                started = time.perf_counter()
+                try:
+                    return await original(*args, **kwargs)
+                finally:
+                    samples.append(time.perf_counter() - started)
+        else:
+            def timed(*args, **kwargs):
+                started = time.perf_counter()
+                try:
+                    return original(*args, **kwargs)
+                finally:
+                    samples.append(time.perf_counter() - started)
+        setattr(obj, name, timed)
+
+def configure(backend: str, directory: str, concurrency: int):
+    config.message_store_backend = backend
+    config.message_store_dir = f"{directory}/messages"
+    config.message_store_sqlite_path = f"{directory}/messages.db"
+    config.message_store_legacy_path = f"{directory}/messages.json"
+    config.outbox_dir = f"{directory}/outbox"
+    config.dedup_path = f"{directory}/dedup.db"
+    config.router_workers = concurrency
+
+def prefill(router: MessageRouter, factory: MessageFactory, store_size: int):
+    """Fill the store with history so context warming and queries see realistic sizes."""
+    start = datetime.now() - timedelta(days=1)
+    batch = []
+    for i in range(store_size):
+        batch.append(factory.make(start + timedelta(milliseconds=i)))
+        if len(batch) == 1000:
+            router.handler.message_store.save_messages(batch)
+            batch = []
+    if batch:
+        router.handler.message_store.save_messages(batch)
+
+async def run(backend: str, concurrency: int, store_size: int, messages: int, senders: int) -> Dict[str, Any]:
+    with tempfile.TemporaryDirectory() as directory:
+        configure(backend, directory, concurrency)
+        router = MessageRouter()
+        factory = MessageFactory(senders)
+        prefill(router, factory, store_size)
+        
+        enqueued_at: Dict[str, Deque[float]] = defaultdict(deque)
+        end_to_end: List[float] = []
+        done = asyncio.Event()
+        
+        def on_send(recipient: str):
+            end_to_end.append(time.perf_counter() - enqueued_at[recipient].popleft())
+            if len(end_to_end) == messages:
+                done.set()
+        
+        for channel in CHANNELS:
+            router.register_connector(channel, FakeConnector(channel, on_send))
+        
+        timer = StageTimer()
+        handler = router.handler
+        timer.wrap(handler, 'process_message', 'handler')
+        timer.wrap(handler.writer, 'submit', 'persist_enqueue')
+        timer.wrap(handler.intent_detector, 'detect_intent', 'intent')
+        timer.wrap(handler.context, 'record', 'context')
+        timer.wrap(handler.templates, 'get_response', 'template')
+        
+        await router.start()
+        stream = [factory.make() for _ in range(messages)]
+        started = time.perf_counter()
+        for message in stream:
+            enqueued_at[message.sender_id].append(time.perf_counter())
+            await router.enqueue(message)
+        await asyncio.wait_for(done.wait(), timeout=max(60, messages / 100))
+        elapsed = time.perf_counter() - started
+        
+        await handler.writer.stop()
+        router.stop()
+        handler.message_store.close()
+        await asyncio.sleep(0)
+        
+        return {
+            'backend': backend,
+            'concurrency': concurrency,
+            'store_size': store_size,
+            'messages': messages,
+            'senders': senders,
+            'elapsed_s': round(elapsed, 4),
+            'messages_per_second': round(messages / elapsed, 1),
+            'end_to_end': summarize_latencies(end_to_end),
+            'stages': {stage: summarize_latencies(samples) for stage, samples in timer.samples.items()},
+            'ingress_wait_avg_ms': router.ingress.get_stats()['wait_avg'] * 1000,
+            'context_cache': handler.context.get_stats(),
+            'persistence': handler.writer.get_stats()
+        }
+
+def parse_list(value: str, cast: Callable = int) -> list:
+    return [cast(item) for item in value.split(',') if item]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--messages', type=int, default=5000)
+    parser.add_argument('--senders', type=int, default=500)
+    parser.add_argument('--concurrency', default='1,4,16', help='comma-separated router worker counts')
+    parser.add_argument('--backends', default='log,sqlite', help='comma-separated storage backends')
+    parser.add_argument('--store-sizes', default='0,10000', help='comma-separated prefilled message counts')
+    parser.add_argument('--output', help='write JSON results to this path')
+    args = parser.parse_args()
+    
+    results = []
+    for backend in parse_list(args.backends, str):
+        for store_size in parse_list(args.store_sizes):
+            for concurrency in parse_list(args.concurrency):
+                results.append(asyncio.run(run(backend, concurrency, store_size, args.messages, args.senders)))
+    write_results('pipeline', results, args.output)
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
@@ -0,0 +1,81 @@
+"""Benchmark rate limiter memory and throughput with many distinct senders.
+
+Every sender sends one message, then the hottest senders keep sending, which
+is roughly what a public bot sees. Memory is measured with tracemalloc:
+    
+    python -m src.benchmarks.rate_limiter --senders 1000000
+"""
+import argparse
+import time
+import tracemalloc
+from collections import defaultdict, deque
+from typing import Any, Dict, List
+from ..utils.rate_limiter import RateLimiter
+from .common import write_results
+
+class DequeRateLimiter:
+    """The previous sliding-log limiter: a deque of timestamps per sender, never evicted."""
+    
+    def __init__(self, max_requests: int = 10, window_seconds: int = 60):
+        self.max_requests = max_requests
+        self.window_seconds = window_seconds
+        self.requests: Dict[str, deque] = defaultdict(deque)
+    
+    def is_allowed(self, identifier: str) -> bool:
+        now = time.time()
+        user_requests = self.requests[identifier]
+        while user_requests and user_requests[0] <= now - self.window_seconds:
+            user_requests.popleft()
+        if len(user_requests) < self.max_requests:
+            user_requests.append(now)
+            return True
+        return False
+
+def make_senders(count: int) -> List[str]:
+    return [f"user{i}" for i in range(count)]
+
+def run(name: str, limiter: Any, senders: List[str], hot_requests: int) -> Dict[str, Any]:
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    
+    started = time.perf_counter()
+    for sender in senders:
+        limiter.is_allowed(sender)
+    hot = senders[:1000]
+    allowed = 0
+    for i in range(hot_requests):
+        allowed += limiter.is_allowed(hot[i % len(hot)])
+    elapsed = time.perf_counter() - started
+    
+    memory = tracemalloc.get_traced_memory()[0] - baseline
+    tracemalloc.stop()
+    operations = len(senders) + hot_requests
+    return {
+        'limiter': name,
+        'senders': len(senders),
+        'operations': operations,
+        'ops_per_second': round(operations / elapsed),
+        'memory_mb': round(memory / 1024 / 1024, 1),
+        'bytes_per_sender': round(memory / len(senders)),
+        'hot_allowed': allowed
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--senders', type=int, default=1000000)
+    parser.add_argument('--hot-requests', type=int, default=200000)
+    parser.add_argument('--max-keys', type=int, default=100000,
+                        help='key bound for the GCRA limiter with LRU eviction')
+    parser.add_argument('--output', help='write JSON results to this path')
+    args = parser.parse_args()
+    
+    senders = make_senders(args.senders)
+    results = [
+        run('deque', DequeRateLimiter(), senders, args.hot_requests),
+        run('gcra_unbounded', RateLimiter(max_keys=args.senders), senders, args.hot_requests),
+        run('gcra_lru', RateLimiter(max_keys=args.max_keys), senders, args.hot_requests)
+    ]
+    write_results('rate_limiter', results, args.output)
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
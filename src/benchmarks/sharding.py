@@ -0,0 +1,94 @@
+"""Throughput of sharded worker processes against the single-process pipeline.
+
+Runs the same synthetic traffic as ``pipeline`` through ``MessageRouter`` with
+``WORKER_PROCESSES`` set to each requested count (0 is the single-process
+mode) and reports msgs/sec and the speedup over one worker process. Scaling
+is bounded by the available cores, which are reported alongside:
+    
+    python -m src.benchmarks.sharding --messages 20000 --processes 0,1,2,4,8
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from collections import defaultdict, deque
+from typing import Any, Deque, Dict, List
+from ..config import config
+from ..core.router import MessageRouter
+from .common import summarize_latencies, write_results
+from .pipeline import CHANNELS, FakeConnector, MessageFactory, configure, parse_list
+
+async def run(processes: int, messages: int, senders: int, warmup: int) -> Dict[str, Any]:
+    with tempfile.TemporaryDirectory() as directory:
+        configure('log', directory, config.router_workers)
+        config.worker_processes = processes
+        router = MessageRouter()
+        factory = MessageFactory(senders)
+        
+        enqueued_at: Dict[str, Deque[float]] = defaultdict(deque)
+        end_to_end: List[float] = []
+        done = asyncio.Event()
+        target = warmup
+        
+        def on_send(recipient: str):
+            end_to_end.append(time.perf_counter() - enqueued_at[recipient].popleft())
+            if len(end_to_end) == target:
+                done.set()
+        
+        for channel in CHANNELS:
+            router.register_connector(channel, FakeConnector(channel, on_send))
+        await router.start()
+        
+        async def drive(count: int) -> float:
+            stream = [factory.make() for _ in range(count)]
+            started = time.perf_counter()
+            for message in stream:
+                enqueued_at[message.sender_id].append(time.perf_counter())
+                await router.enqueue(message)
+            await asyncio.wait_for(done.wait(), timeout=max(120, count / 100))
+            return time.perf_counter() - started
+        
+        # Worker processes import the package and warm their caches first
+        await drive(warmup)
+        end_to_end.clear()
+        done.clear()
+        target = messages
+        elapsed = await drive(messages)
+        
+        await router.stop_handler()
+        router.stop()
+        if not processes:
+            router.handler.message_store.close()
+        await asyncio.sleep(0)
+        
+        return {
+            'processes': processes,
+            'cpus': os.cpu_count(),
+            'messages': messages,
+            'senders': senders,
+            'elapsed_s': round(elapsed, 4),
+            'messages_per_second': round(messages / elapsed, 1),
+            'end_to_end': summarize_latencies(end_to_end)
+        }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--messages', type=int, default=20000)
+    parser.add_argument('--senders', type=int, default=2000)
+    parser.add_argument('--warmup', type=int, default=500)
+    parser.add_argument('--processes', default='0,1,2,4', help='comma-separated worker process counts')
+    parser.add_argument('--output', help='write JSON results to this path')
+    args = parser.parse_args()
+    
+    results = []
+    for processes in parse_list(args.processes):
+        results.append(asyncio.run(run(processes, args.messages, args.senders, args.warmup)))
+    baseline = next((r['messages_per_second'] for r in results if r['processes'] == 1), None)
+    for result in results:
+        if baseline and result['processes']:
+            result['speedup'] = round(result['messages_per_second'] / baseline, 2)
+    write_results('sharding', results, args.output)
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
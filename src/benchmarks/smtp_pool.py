@@ -0,0 +1,117 @@
+"""Benchmark pooled SMTP sends against one connection per message.
+
+Runs a local stand-in SMTP server (no TLS) that can add a fixed delay before
+every reply to mimic the round-trip time to a real provider:
+    
+    python -m src.benchmarks.smtp_pool --messages 200 --latency 0.002
+"""
+import argparse
+import smtplib
+import socketserver
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from email.mime.text import MIMEText
+from typing import Any, Dict, Tuple
+from ..utils.smtp_pool import SMTPConnectionPool
+from .common import write_results
+
+class StandInSMTPHandler(socketserver.StreamRequestHandler):
+    """Minimal SMTP dialogue: accepts any login and discards message data."""
+    
+    def reply(self, line: str):
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        self.wfile.write(line.encode() + b'\r\n')
+    
+    def handle(self):
+        self.reply('220 stand-in ESMTP')
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode(errors='ignore').strip().upper()
+            if command.startswith(('EHLO', 'HELO')):
+                self.wfile.write(b'250-stand-in\r\n250-AUTH PLAIN LOGIN\r\n')
+                self.reply('250 OK')
+            elif command.startswith('AUTH'):
+                self.reply('235 Authentication successful')
+            elif command == 'DATA':
+                self.reply('354 End data with <CR><LF>.<CR><LF>')
+                while self.rfile.readline() not in (b'.\r\n', b''):
+                    pass
+                self.server.messages_received += 1
+                self.reply('250 OK queued')
+            elif command == 'QUIT':
+                self.reply('221 Bye')
+                return
+            else:
+                # MAIL, RCPT, RSET, NOOP
+                self.reply('250 OK')
+
+class StandInSMTPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+    
+    def __init__(self, latency: float = 0.0):
+        super().__init__(('127.0.0.1', 0), StandInSMTPHandler)
+        self.latency = latency
+        self.messages_received = 0
+
+def start_server(latency: float) -> Tuple[StandInSMTPServer, int]:
+    server = StandInSMTPServer(latency)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, server.server_address[1]
+
+def make_message(index: int) -> MIMEText:
+    msg = MIMEText(f"Auto reply number {index}")
+    msg['From'] = 'agent@example.com'
+    msg['To'] = f'user{index}@example.com'
+    msg['Subject'] = 'Auto Reply'
+    return msg
+
+def send_unpooled(port: int, msg: MIMEText):
+    """The previous behaviour: connect, log in, send, disconnect."""
+    with smtplib.SMTP('127.0.0.1', port) as server:
+        server.login('agent', 'secret')
+        server.send_message(msg)
+
+def run(mode: str, messages: int, concurrency: int, latency: float) -> Dict[str, Any]:
+    server, port = start_server(latency)
+    pool = SMTPConnectionPool('127.0.0.1', port, username='agent', password='secret',
+                              starttls=False, max_size=concurrency)
+    send = pool.send if mode == 'pooled' else lambda msg: send_unpooled(port, msg)
+    try:
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            list(executor.map(send, (make_message(i) for i in range(messages))))
+        elapsed = time.perf_counter() - started
+    finally:
+        pool.close()
+        server.shutdown()
+        server.server_close()
+    return {
+        'mode': mode,
+        'messages': messages,
+        'concurrency': concurrency,
+        'latency_s': latency,
+        'elapsed_s': round(elapsed, 4),
+        'messages_per_second': round(messages / elapsed, 1),
+        'connections_opened': pool.connections_opened if mode == 'pooled' else messages,
+        'received': server.messages_received
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--messages', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--latency', type=float, default=0.002,
+                        help='seconds the stand-in server waits before each reply')
+    parser.add_argument('--output', help='write JSON results to this path')
+    args = parser.parse_args()
+    
+    results = [run(mode, args.messages, args.concurrency, args.latency) for mode in ('unpooled', 'pooled')]
+    write_results('smtp_pool', results, args.output)
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
@@ -0,0 +1,140 @@
+"""Agent cold start: import cost per configured channel and time to first reply.
+
+For each scenario (the channels whose credentials are set) a fresh
+interpreter imports the entry point and sets up the connectors, once under
+``-X importtime`` for a per-package breakdown and ``--runs`` times for wall
+time. Client libraries that got imported are listed, so a connector that
+starts loading eagerly again shows up as a regression. The time to first
+reply starts ``python -m src`` with Telegram pointed at the stand-in Bot API
+server, with one update already waiting, and times from spawn until the
+reply arrives:
+    
+    python -m src.benchmarks.startup --scenarios none,telegram,all --runs 5
+"""
+import argparse
+import asyncio
+import os
+import signal
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Tuple
+from ..tests.telegram_server import StandInBotAPIServer
+from .common import write_results
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+CLIENT_LIBRARIES = ('telegram', 'twilio', 'imapclient', 'requests', 'httpx')
+CREDENTIALS = {
+    'email': {'EMAIL_USER': 'agent@example.com', 'EMAIL_PASSWORD': 'benchmark'},
+    'telegram': {'TELEGRAM_BOT_TOKEN': '123456:BENCHMARK'},
+    'whatsapp': {'TWILIO_ACCOUNT_SID': 'AC' + '0' * 32, 'TWILIO_AUTH_TOKEN': 'benchmark'},
+    'linkedin': {'LINKEDIN_ACCESS_TOKEN': 'benchmark'},
+    'instagram': {'INSTAGRAM_ACCESS_TOKEN': 'benchmark'}
+}
+SETUP = (
+    "import asyncio\n"
+    "from src.__main__ import AgentMicheal\n"
+    "async def setup():\n"
+    "    AgentMicheal().setup_connectors()\n"
+    "asyncio.run(setup())\n"
+)
+
+def scenario_env(scenario: str, directory: str) -> Dict[str, str]:
+    """The current environment with only the scenario's channels configured."""
+    env = {key: value for key, value in os.environ.items()
+           if not any(key in credentials for credentials in CREDENTIALS.values())}
+    env.pop('CONNECTORS', None)
+    env.update({'MESSAGE_STORE_DIR': directory, 'METRICS_PORT': '0', 'LOG_LEVEL': 'WARNING'})
+    channels = list(CREDENTIALS) if scenario == 'all' else [c for c in scenario.split('+') if c != 'none']
+    for channel in channels:
+        env.update(CREDENTIALS[channel])
+    return env
+
+def parse_importtime(stderr: str) -> Tuple[float, List[Tuple[str, float]], List[str]]:
+    """Total import time, top-level imports by cumulative time, and names of all imported modules."""
+    top_level: List[Tuple[str, float]] = []
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        modules.append(name.strip())
+        if not name[1:].startswith(' '):
+            top_level.append((name.strip(), int(cumulative) / 1000))
+    return sum(ms for _, ms in top_level), sorted(top_level, key=lambda item: -item[1]), modules
+
+def measure_imports(scenario: str, runs: int, top: int) -> Dict[str, Any]:
+    with tempfile.TemporaryDirectory() as directory:
+        env = scenario_env(scenario, directory)
+        traced = subprocess.run([sys.executable, '-X', 'importtime', '-c', SETUP], cwd=ROOT, env=env,
+                                capture_output=True, text=True, check=True)
+        total_ms, top_level, modules = parse_importtime(traced.stderr)
+        wall = []
+        for _ in range(runs):
+            started = time.perf_counter()
+            subprocess.run([sys.executable, '-c', SETUP], cwd=ROOT, env=env, check=True,
+                           stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            wall.append(time.perf_counter() - started)
+    return {
+        'scenario': scenario,
+        'import_ms': round(total_ms, 1),
+        'setup_wall_ms': round(statistics.median(wall) * 1000, 1),
+        'client_libraries': [name for name in CLIENT_LIBRARIES if name in modules],
+        'top_imports_ms': {name: round(ms, 1) for name, ms in top_level[:top]}
+    }
+
+async def first_reply(timeout: float) -> Dict[str, Any]:
+    bot_api = StandInBotAPIServer(CREDENTIALS['telegram']['TELEGRAM_BOT_TOKEN'])
+    await bot_api.start()
+    bot_api.add_update(42, "Hello there")
+    with tempfile.TemporaryDirectory() as directory:
+        env = scenario_env('telegram', directory)
+        env['TELEGRAM_API_URL'] = bot_api.api_url
+        started = time.perf_counter()
+        process = await asyncio.create_subprocess_exec(sys.executable, '-m', 'src', cwd=ROOT, env=env,
+                                                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        deadline = started + timeout
+        while not bot_api.sent and time.perf_counter() < deadline:
+            await asyncio.sleep(0.001)
+        elapsed = time.perf_counter() - started if bot_api.sent else None
+        
+        process.send_signal(signal.SIGTERM)
+        stopping = time.perf_counter()
+        try:
+            await asyncio.wait_for(process.wait(), timeout)
+        except asyncio.TimeoutError:
+            process.kill()
+            await process.wait()
+        shutdown = time.perf_counter() - stopping
+    bot_api.close()
+    return {
+        'first_reply_ms': round(elapsed * 1000, 1) if elapsed is not None else None,
+        'shutdown_ms': round(shutdown * 1000, 1),
+        'exit_code': process.returncode
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scenarios', default='none,email,telegram,whatsapp,all',
+                        help="comma-separated channel sets, e.g. 'none,email+telegram,all'")
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--top', type=int, default=8, help='top-level imports to list per scenario')
+    parser.add_argument('--first-reply-runs', type=int, default=3)
+    parser.add_argument('--timeout', type=float, default=30.0)
+    parser.add_argument('--output', help='write JSON results to this path')
+    args = parser.parse_args()
+    
+    results = [measure_imports(scenario, args.runs, args.top) for scenario in args.scenarios.split(',')]
+    replies = [asyncio.run(first_reply(args.timeout)) for _ in range(args.first_reply_runs)]
+    times = [reply['first_reply_ms'] for reply in replies if reply['first_reply_ms'] is not None]
+    results.append({
+        'scenario': 'telegram first reply',
+        'runs': replies,
+        'first_reply_ms_median': statistics.median(times) if times else None
+    })
+    write_results('startup', results, args.output)
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
@@ -0,0 +1,136 @@
+"""Telegram update throughput in long polling and webhook mode.
+
+Runs the real ``TelegramConnector`` against the stand-in Bot API server from
+the tests. In polling mode the updates are queued on the stand-in and fetched
+with ``getUpdates``; in webhook mode a separate client process posts them to
+the connector's server over keep-alive connections. The router stand-in
+waits ``--enqueue-delay-ms`` per message, as a busy ingress queue would, so
+the concurrency limit shows up in the numbers:
+    
+    python -m src.benchmarks.telegram_updates --updates 5000 --concurrency 1,16,64
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import time
+from typing import Any, Dict, List
+from ..config import config
+from ..connectors.telegram_connector import TelegramConnector
+from ..tests.telegram_server import StandInBotAPIServer
+from .common import write_results
+from .pipeline import parse_list
+from .webhook_server import drive
+
+SECRET = "benchmark-secret"
+PATH = "/telegram/webhook"
+
+class CountingRouter:
+    """Stands in for the router: counts messages and times the first and last."""
+    
+    def __init__(self, delay: float):
+        self.delay = delay
+        self.count = 0
+        self.first = 0.0
+        self.last = 0.0
+        self.done = asyncio.Event()
+        self.target = 0
+    
+    async def enqueue(self, message) -> bool:
+        if not self.count:
+            self.first = time.perf_counter()
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        self.count += 1
+        self.last = time.perf_counter()
+        if self.count == self.target:
+            self.done.set()
+        return True
+
+def build_requests(server: StandInBotAPIServer, port: int, count: int, chats: int) -> List[bytes]:
+    requests = []
+    for i in range(count):
+        body = json.dumps(server.make_update(i % chats + 1, f"Hello, this is message {i}")).encode()
+        requests.append(
+            f"POST {PATH} HTTP/1.1\r\nHost: 127.0.0.1:{port}\r\nContent-Type: application/json\r\n"
+            f"X-Telegram-Bot-Api-Secret-Token: {SECRET}\r\nContent-Length: {len(body)}\r\n\r\n".encode() + body
+        )
+    return requests
+
+def client_process(port: int, count: int, chats: int, connections: int, results: multiprocessing.Queue):
+    """Runs in its own process so the server keeps its core to itself."""
+    requests = build_requests(StandInBotAPIServer(), port, count, chats)
+    results.put(asyncio.run(drive(port, requests, connections)))
+
+async def run(mode: str, concurrency: int, count: int, chats: int, connections: int, delay: float) -> Dict[str, Any]:
+    bot_api = StandInBotAPIServer()
+    await bot_api.start()
+    config.telegram_bot_token = bot_api.token
+    config.telegram_api_url = bot_api.api_url
+    config.telegram_max_concurrent_updates = concurrency
+    config.telegram_webhook_url = f"https://agent.example.com{PATH}" if mode == 'webhook' else ''
+    config.telegram_webhook_host = '127.0.0.1'
+    config.telegram_webhook_port = 0
+    config.telegram_webhook_path = PATH
+    config.telegram_webhook_secret = SECRET
+    config.rate_limit_per_minute = count
+    router = CountingRouter(delay)
+    router.target = count
+    connector = TelegramConnector(router=router)
+    task = asyncio.create_task(connector.start())
+    await connector.ready.wait()
+    
+    statuses: Dict[int, int] = {}
+    if mode == 'webhook':
+        results = multiprocessing.Queue()
+        client = multiprocessing.Process(target=client_process,
+                                         args=(connector.server.port, count, chats, connections, results))
+        client.start()
+        loop = asyncio.get_running_loop()
+        statuses = (await loop.run_in_executor(None, results.get))['statuses']
+        await loop.run_in_executor(None, client.join)
+    else:
+        for i in range(count):
+            bot_api.add_update(i % chats + 1, f"Hello, this is message {i}")
+    await asyncio.wait_for(router.done.wait(), timeout=max(120, count / 10))
+    
+    connector.stop()
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+    bot_api.close()
+    
+    elapsed = router.last - router.first
+    result = {
+        'mode': mode,
+        'max_concurrent_updates': concurrency,
+        'updates': count,
+        'chats': chats,
+        'enqueue_delay_ms': delay * 1000,
+        'elapsed_s': round(elapsed, 4),
+        'updates_per_second': round(count / elapsed, 1) if elapsed else None,
+        'get_updates_calls': bot_api.calls['getUpdates']
+    }
+    if mode == 'webhook':
+        result['statuses'] = statuses
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--updates', type=int, default=5000)
+    parser.add_argument('--chats', type=int, default=500)
+    parser.add_argument('--connections', type=int, default=20, help='webhook client connections')
+    parser.add_argument('--enqueue-delay-ms', type=float, default=1.0)
+    parser.add_argument('--modes', default='polling,webhook')
+    parser.add_argument('--concurrency', default='1,16,64', help='comma-separated update concurrency limits')
+    parser.add_argument('--output', help='write JSON results to this path')
+    args = parser.parse_args()
+    
+    results = []
+    for mode in args.modes.split(','):
+        for concurrency in parse_list(args.concurrency):
+            results.append(asyncio.run(run(mode, concurrency, args.updates, args.chats, args.connections,
+                                           args.enqueue_delay_ms / 1000)))
+    write_results('telegram_updates', results, args.output)
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
@@ -0,0 +1,64 @@
+"""Benchmark reply rendering with compiled templates.
+
+Compares the previous per-call f-string wrapping with the compiled templates,
+with and without a personalized placeholder:
+    
+    python -m src.benchmarks.templates --renders 500000
+"""
+import argparse
+import random
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict
+from ..core.persistence import Message
+from ..core.templates import ResponseTemplates
+from .common import write_results
+
+CHANNELS = ('email', 'telegram', 'whatsapp')
+
+def previous_get_response(templates: Dict[str, list], intent: str, channel: str = None) -> str:
+    """The previous implementation: pick a string, then wrap it with f-strings."""
+    response = random.choice(templates.get(intent, templates['unknown']))
+    if channel == 'email':
+        response = f"Dear valued customer,\n\n{response}\n\nBest regards,\nAgent Michael"
+    elif channel == 'telegram':
+        response = f"🤖 {response}"
+    return response
+
+def measure(name: str, render: Callable[[str, str], str], renders: int) -> Dict[str, Any]:
+    intents = ['greeting', 'question', 'thanks', 'unknown']
+    calls = [(intents[i % len(intents)], CHANNELS[i % len(CHANNELS)]) for i in range(renders)]
+    started = time.perf_counter()
+    for intent, channel in calls:
+        render(intent, channel)
+    elapsed = time.perf_counter() - started
+    return {'variant': name, 'renders': renders, 'renders_per_second': round(renders / elapsed)}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--renders', type=int, default=500000)
+    parser.add_argument('--output', help='write JSON results to this path')
+    args = parser.parse_args()
+    
+    message = Message(id='bench', channel='email', sender_id='jane@example.com', sender_name='Jane Doe',
+                      text='Hello', received_at=datetime.now())
+    static = ResponseTemplates(path="")
+    static.templates['greeting'] = ["Hello! How can I help you today?"]
+    static.compile()
+    personal = ResponseTemplates(path="")
+    personal.templates = {intent: [f"Hi {{first_name}}, {text}" for text in texts]
+                          for intent, texts in personal.templates.items()}
+    personal.compile()
+    raw = {intent: [text.replace('{first_name}', 'there') for text in texts]
+           for intent, texts in static.templates.items()}
+    
+    results = [
+        measure('previous', lambda intent, channel: previous_get_response(raw, intent, channel), args.renders),
+        measure('compiled', lambda intent, channel: static.get_response(intent, channel, message), args.renders),
+        measure('compiled_personalized',
+                lambda intent, channel: personal.get_response(intent, channel, message), args.renders)
+    ]
+    write_results('templates', results, args.output)
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
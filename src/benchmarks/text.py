@@ -0,0 +1,91 @@
+"""Benchmark inbound text normalization on realistic email bodies.
+
+Builds multipart/alternative emails (quoted-printable text part, HTML part,
+quoted reply history and a signature) of a few sizes, and compares the
+previous handling (raw body, six ``str.replace`` passes) with what the email
+connector does now: decode the fetched text part and run the normalization
+pipeline. Also times sanitizing short chat messages:
+    
+    python -m src.benchmarks.text --sizes 2048,8192,32768 --iterations 2000
+"""
+import argparse
+import quopri
+import time
+from typing import Any, Callable, Dict, Tuple
+from ..utils.text import decode_payload, normalize_text, sanitize
+from .common import write_results
+
+NEW_TEXT = "Hi team, my order #4521 still hasn't arrived. Could you check where it is? Thanks, Jane"
+QUOTED_LINE = "> Thank you for contacting ACME support. Your order is being prepared and will ship soon.\n"
+
+def previous_sanitize(text: str) -> str:
+    """The previous implementation: one replace pass per character."""
+    for char in ['<', '>', '"', "'", '&', '\x00']:
+        text = text.replace(char, '')
+    return text.strip()
+
+def make_email(size: int) -> Tuple[bytes, bytes]:
+    """Return ``(body, text_part)`` for an email whose body is about ``size`` bytes.
+    
+    ``text_part`` is the encoded text/plain part, as the connector fetches it.
+    """
+    plain = f"{NEW_TEXT}\n\nOn Mon, Jan 1, 2024 at 10:00 AM ACME Support <support@acme.example> wrote:\n"
+    html = f"<html><head><style>p {{margin: 0}}</style></head><body><p>{NEW_TEXT}</p><blockquote>"
+    while len(plain) + len(html) < size:
+        plain += QUOTED_LINE
+        html += f"<p>{QUOTED_LINE[2:]}</p>"
+    plain += "-- \nJane Doe\nHead of Procurement\n"
+    html += "</blockquote><div>-- <br>Jane Doe</div></body></html>"
+    text_part = quopri.encodestring(plain.encode())
+    body = (
+        b'--=_boundary_42\r\nContent-Type: text/plain; charset="utf-8"\r\n'
+        b'Content-Transfer-Encoding: quoted-printable\r\n\r\n'
+        + text_part +
+        b'\r\n--=_boundary_42\r\nContent-Type: text/html; charset="utf-8"\r\n\r\n'
+        + html.encode() + b'\r\n--=_boundary_42--\r\n'
+    )
+    return body, text_part
+
+def measure(name: str, operation: Callable[[], str], iterations: int, size: int) -> Dict[str, Any]:
+    output = operation()
+    started = time.perf_counter()
+    for _ in range(iterations):
+        operation()
+    elapsed = time.perf_counter() - started
+    return {
+        'variant': name,
+        'body_bytes': size,
+        'per_second': round(iterations / elapsed),
+        'mb_per_second': round(size * iterations / elapsed / 1e6, 1),
+        'output_chars': len(output)
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', default='2048,8192,32768', help='comma-separated body sizes in bytes')
+    parser.add_argument('--iterations', type=int, default=2000)
+    parser.add_argument('--max-length', type=int, default=4000)
+    parser.add_argument('--output', help='write JSON results to this path')
+    args = parser.parse_args()
+    
+    results = []
+    for size in [int(value) for value in args.sizes.split(',') if value]:
+        body, text_part = make_email(size)
+        
+        def previous():
+            return previous_sanitize(body.decode('utf-8', errors='ignore'))
+        
+        def pipeline():
+            text = decode_payload(text_part, 'quoted-printable', 'utf-8')
+            return normalize_text(text, args.max_length, strip_replies=True)
+        
+        results.append(measure('previous', previous, args.iterations, len(body)))
+        results.append(measure('pipeline', pipeline, args.iterations, len(body)))
+    
+    chat = "Hey! <3 Can you tell me \"when\" the store opens & closes?"
+    results.append(measure('chat_previous', lambda: previous_sanitize(chat), args.iterations * 100, len(chat)))
+    results.append(measure('chat_sanitize', lambda: sanitize(chat), args.iterations * 100, len(chat)))
+    write_results('text', results, args.output)
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
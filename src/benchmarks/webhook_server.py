@@ -0,0 +1,127 @@
+"""Load test the WhatsApp webhook endpoint.
+
+Runs the real ``WhatsAppConnector`` HTTP server (signature validation, fast
+ack, background routing into a counting router) on one event loop, and drives
+it from a separate client process over keep-alive connections:
+    
+    python -m src.benchmarks.webhook_server --requests 20000 --connections 50
+"""
+import argparse
+import asyncio
+import multiprocessing
+import time
+from typing import Any, Dict, List
+from urllib.parse import urlencode
+from ..config import config
+from ..connectors.whatsapp_connector import WhatsAppConnector
+from ..utils.security import SecurityUtils
+from .common import summarize_latencies, write_results
+
+AUTH_TOKEN = "benchmark-auth-token"
+PATH = "/whatsapp/webhook"
+
+class CountingRouter:
+    """Stands in for the router: counts messages handed off by the connector."""
+    
+    def __init__(self):
+        self.count = 0
+    
+    async def enqueue(self, message) -> bool:
+        self.count += 1
+        return True
+
+def build_requests(port: int, count: int) -> List[bytes]:
+    """Signed Twilio-style webhook requests, one distinct sender each."""
+    url = f"http://127.0.0.1:{port}{PATH}"
+    requests = []
+    for i in range(count):
+        params = {
+            'From': f'whatsapp:+1555{i:07d}',
+            'Body': f'Hello, this is message {i}',
+            'ProfileName': 'Load Test',
+            'MessageSid': f'SM{i:032d}',
+            'AccountSid': 'AC' + '0' * 32
+        }
+        body = urlencode(params).encode()
+        signature = SecurityUtils.compute_twilio_signature(url, params, AUTH_TOKEN)
+        requests.append(
+            f"POST {PATH} HTTP/1.1\r\nHost: 127.0.0.1:{port}\r\n"
+            f"Content-Type: application/x-www-form-urlencoded\r\n"
+            f"X-Twilio-Signature: {signature}\r\nContent-Length: {len(body)}\r\n\r\n".encode() + body
+        )
+    return requests
+
+async def client_connection(port: int, requests: List[bytes], latencies: List[float], statuses: Dict[int, int]):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    for request in requests:
+        started = time.perf_counter()
+        writer.write(request)
+        head = await reader.readuntil(b'\r\n\r\n')
+        length = int(head.split(b'Content-Length: ')[1].split(b'\r\n')[0])
+        await reader.readexactly(length)
+        latencies.append(time.perf_counter() - started)
+        status = int(head.split(b' ', 2)[1])
+        statuses[status] = statuses.get(status, 0) + 1
+    writer.close()
+
+async def drive(port: int, requests: List[bytes], connections: int) -> Dict[str, Any]:
+    latencies: List[float] = []
+    statuses: Dict[int, int] = {}
+    started = time.perf_counter()
+    await asyncio.gather(*(
+        client_connection(port, requests[i::connections], latencies, statuses)
+        for i in range(connections)
+    ))
+    elapsed = time.perf_counter() - started
+    return {'elapsed': elapsed, 'latencies': latencies, 'statuses': statuses}
+
+def client_process(port: int, count: int, connections: int, results: multiprocessing.Queue):
+    """Runs in its own process so the server keeps its core to itself."""
+    requests = build_requests(port, count)
+    results.put(asyncio.run(drive(port, requests, connections)))
+
+async def run(count: int, connections: int) -> Dict[str, Any]:
+    config.twilio_auth_token = AUTH_TOKEN
+    config.whatsapp_webhook_url = ""
+    config.whatsapp_validate_signature = True
+    config.whatsapp_webhook_host = '127.0.0.1'
+    config.whatsapp_webhook_port = 0
+    router = CountingRouter()
+    connector = WhatsAppConnector(router=router)
+    await connector.server.start()
+    
+    results = multiprocessing.Queue()
+    client = multiprocessing.Process(target=client_process,
+                                     args=(connector.server.port, count, connections, results))
+    client.start()
+    loop = asyncio.get_running_loop()
+    outcome = await loop.run_in_executor(None, results.get)
+    await loop.run_in_executor(None, client.join)
+    while connector.pending:
+        await asyncio.gather(*connector.pending)
+    connector.stop()
+    
+    stats = connector.get_stats()
+    return {
+        'requests': count,
+        'connections': connections,
+        'elapsed_s': round(outcome['elapsed'], 4),
+        'webhooks_per_second': round(count / outcome['elapsed']),
+        'statuses': outcome['statuses'],
+        'routed': router.count,
+        'client_latency': summarize_latencies(outcome['latencies']),
+        'server_latency_avg_ms': round(stats['http']['latency_avg'] * 1000, 3),
+        'server_latency_max_ms': round(stats['http']['latency_max'] * 1000, 3)
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=20000)
+    parser.add_argument('--connections', type=int, default=50)
+    parser.add_argument('--output', help='write JSON results to this path')
+    args = parser.parse_args()
+    
+    write_results('webhook_server', [asyncio.run(run(args.requests, args.connections))], args.output)
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
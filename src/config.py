@@ -1,13 +1,31 @@
 """Configuration management for agent_micheal."""
 import os
 from dotenv import load_dotenv
+from typing import Dict
 from pydantic import BaseModel
 
 load_dotenv()
 
+def _parse_mapping(value: str) -> Dict[str, str]:
+    """Parse ``key=value,key=value`` environment settings."""
+    mapping = {}
+    for item in value.split(','):
+        if '=' in item:
+            key, _, setting = item.partition('=')
+            mapping[key.strip()] = setting.strip()
+    return mapping
+
 class Config(BaseModel):
     # Telegram
     telegram_bot_token: str = os.getenv("TELEGRAM_BOT_TOKEN", "")
+    telegram_api_url: str = os.getenv("TELEGRAM_API_URL", "https://api.telegram.org/bot")
+    # Webhook ingestion (an empty URL means long polling)
+    telegram_webhook_url: str = os.getenv("TELEGRAM_WEBHOOK_URL", "")
+    telegram_webhook_host: str = os.getenv("TELEGRAM_WEBHOOK_HOST", "0.0.0.0")
+    telegram_webhook_port: int = int(os.getenv("TELEGRAM_WEBHOOK_PORT", "8443"))
+    telegram_webhook_path: str = os.getenv("TELEGRAM_WEBHOOK_PATH", "/telegram/webhook")
+    telegram_webhook_secret: str = os.getenv("TELEGRAM_WEBHOOK_SECRET", "")
+    telegram_max_concurrent_updates: int = int(os.getenv("TELEGRAM_MAX_CONCURRENT_UPDATES", "16"))
     
     # Email
     email_imap_host: str = os.getenv("EMAIL_IMAP_HOST", "imap.gmail.com")
@@ -16,11 +34,27 @@ class Config(BaseModel):
     email_smtp_port: int = int(os.getenv("EMAIL_SMTP_PORT", "587"))
     email_user: str = os.getenv("EMAIL_USER", "")
     email_password: str = os.getenv("EMAIL_PASSWORD", "")
+    email_smtp_starttls: bool = os.getenv("EMAIL_SMTP_STARTTLS", "true").lower() == "true"
+    smtp_pool_size: int = int(os.getenv("SMTP_POOL_SIZE", "4"))
+    smtp_max_idle_age: float = float(os.getenv("SMTP_MAX_IDLE_AGE", "60"))
+    smtp_max_messages_per_connection: int = int(os.getenv("SMTP_MAX_MESSAGES_PER_CONNECTION", "100"))
+    email_imap_ssl: bool = os.getenv("EMAIL_IMAP_SSL", "true").lower() == "true"
+    email_idle_timeout: float = float(os.getenv("EMAIL_IDLE_TIMEOUT", "60"))
+    email_poll_interval: float = float(os.getenv("EMAIL_POLL_INTERVAL", "30"))
+    email_reconnect_delay: float = float(os.getenv("EMAIL_RECONNECT_DELAY", "1"))
+    email_reconnect_max_delay: float = float(os.getenv("EMAIL_RECONNECT_MAX_DELAY", "300"))
+    # Incremental sync state; empty means email_checkpoint.json in the message store directory
+    email_checkpoint_path: str = os.getenv("EMAIL_CHECKPOINT_PATH", "")
     
     # Twilio
     twilio_account_sid: str = os.getenv("TWILIO_ACCOUNT_SID", "")
     twilio_auth_token: str = os.getenv("TWILIO_AUTH_TOKEN", "")
     twilio_whatsapp_number: str = os.getenv("TWILIO_WHATSAPP_NUMBER", "")
+    whatsapp_webhook_host: str = os.getenv("WHATSAPP_WEBHOOK_HOST", "0.0.0.0")
+    whatsapp_webhook_port: int = int(os.getenv("WHATSAPP_WEBHOOK_PORT", "8080"))
+    whatsapp_webhook_path: str = os.getenv("WHATSAPP_WEBHOOK_PATH", "/whatsapp/webhook")
+    whatsapp_webhook_url: str = os.getenv("WHATSAPP_WEBHOOK_URL", "")
+    whatsapp_validate_signature: bool = os.getenv("WHATSAPP_VALIDATE_SIGNATURE", "true").lower() == "true"
     
     # LinkedIn
     linkedin_client_id: str = os.getenv("LINKEDIN_CLIENT_ID", "")
@@ -31,8 +65,83 @@ class Config(BaseModel):
     instagram_access_token: str = os.getenv("INSTAGRAM_ACCESS_TOKEN", "")
     instagram_app_id: str = os.getenv("INSTAGRAM_APP_ID", "")
     
+    # Connectors to run (empty: every channel whose credentials are set)
+    connectors: str = os.getenv("CONNECTORS", "")
+    # Extra connectors as channel=module:Class
+    connector_plugins: Dict[str, str] = _parse_mapping(os.getenv("CONNECTOR_PLUGINS", ""))
+    
     # General
     log_level: str = os.getenv("LOG_LEVEL", "INFO")
     rate_limit_per_minute: int = int(os.getenv("RATE_LIMIT_MESSAGES_PER_MINUTE", "10"))
+    rate_limit_max_keys: int = int(os.getenv("RATE_LIMIT_MAX_KEYS", "100000"))
+    response_templates_path: str = os.getenv("RESPONSE_TEMPLATES_PATH", "")
+    response_templates_reload_interval: float = float(os.getenv("RESPONSE_TEMPLATES_RELOAD_INTERVAL", "2"))
+    
+    # Blocking I/O executors
+    executor_default_workers: int = int(os.getenv("EXECUTOR_DEFAULT_WORKERS", "4"))
+    executor_pool_sizes: Dict[str, str] = _parse_mapping(os.getenv("EXECUTOR_POOL_SIZES", "email_imap=2,email_smtp=4"))
+    executor_timeout: float = float(os.getenv("EXECUTOR_TIMEOUT", "30"))
+    loop_lag_threshold_ms: float = float(os.getenv("LOOP_LAG_THRESHOLD_MS", "100"))
+    
+    # Message storage
+    message_store_backend: str = os.getenv("MESSAGE_STORE_BACKEND", "log")
+    message_store_sqlite_path: str = os.getenv("MESSAGE_STORE_SQLITE_PATH", "messages.db")
+    message_store_dir: str = os.getenv("MESSAGE_STORE_DIR", "messages")
+    message_store_legacy_path: str = os.getenv("MESSAGE_STORE_LEGACY_PATH", "messages.json")
+    message_segment_max_bytes: int = int(os.getenv("MESSAGE_SEGMENT_MAX_BYTES", str(64 * 1024 * 1024)))
+    message_fsync_policy: str = os.getenv("MESSAGE_FSYNC_POLICY", "interval")
+    message_fsync_interval: float = float(os.getenv("MESSAGE_FSYNC_INTERVAL", "1.0"))
+    persistence_batch_size: int = int(os.getenv("PERSISTENCE_BATCH_SIZE", "256"))
+    persistence_flush_interval: float = float(os.getenv("PERSISTENCE_FLUSH_INTERVAL", "0.05"))
+    persistence_queue_size: int = int(os.getenv("PERSISTENCE_QUEUE_SIZE", "10000"))
+    
+    # Conversation context cache
+    context_max_turns: int = int(os.getenv("CONTEXT_MAX_TURNS", "10"))
+    context_cache_size: int = int(os.getenv("CONTEXT_CACHE_SIZE", "10000"))
+    context_ttl: float = float(os.getenv("CONTEXT_TTL", "1800"))
+    # A cache miss warms from the store: sqlite queries its index, while the log backend (the default)
+    # reads at most this many bytes back from the end of the log; 0 starts log-backed contexts empty
+    context_warm_scan_bytes: int = int(os.getenv("CONTEXT_WARM_SCAN_BYTES", str(4 * 1024 * 1024)))
+    
+    # Duplicate delivery detection (empty path: dedup.db in the message store directory)
+    dedup_path: str = os.getenv("DEDUP_PATH", "")
+    dedup_cache_size: int = int(os.getenv("DEDUP_CACHE_SIZE", "100000"))
+    dedup_retention: float = float(os.getenv("DEDUP_RETENTION", str(7 * 86400)))
+    
+    # Routing
+    router_workers: int = int(os.getenv("ROUTER_WORKERS", "4"))
+    ingress_queue_size: int = int(os.getenv("INGRESS_QUEUE_SIZE", "1000"))
+    ingress_backpressure: str = os.getenv("INGRESS_BACKPRESSURE", "block")
+    ingress_channel_backpressure: Dict[str, str] = _parse_mapping(os.getenv("INGRESS_CHANNEL_BACKPRESSURE", ""))
+    # Handler processes, sharded by sender (0 handles messages in the main process)
+    worker_processes: int = int(os.getenv("WORKER_PROCESSES", "0"))
+    worker_heartbeat_interval: float = float(os.getenv("WORKER_HEARTBEAT_INTERVAL", "1"))
+    worker_heartbeat_timeout: float = float(os.getenv("WORKER_HEARTBEAT_TIMEOUT", "10"))
+    
+    # Outbound pacing (messages per second)
+    outbound_max_in_flight: int = int(os.getenv("OUTBOUND_MAX_IN_FLIGHT", "8"))
+    # Durable reply queue (empty: outbox/ in the message store directory)
+    outbox_dir: str = os.getenv("OUTBOX_DIR", "")
+    shutdown_timeout: float = float(os.getenv("SHUTDOWN_TIMEOUT", "10"))
+    # Failed sends are retried from timers; the breaker stops sends to a failing provider
+    send_retry_max_attempts: int = int(os.getenv("SEND_RETRY_MAX_ATTEMPTS", "5"))
+    send_retry_base_delay: float = float(os.getenv("SEND_RETRY_BASE_DELAY", "1"))
+    send_retry_max_delay: float = float(os.getenv("SEND_RETRY_MAX_DELAY", "60"))
+    send_retry_budget_ratio: float = float(os.getenv("SEND_RETRY_BUDGET_RATIO", "0.1"))
+    circuit_failure_threshold: int = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "5"))
+    circuit_reset_timeout: float = float(os.getenv("CIRCUIT_RESET_TIMEOUT", "30"))
+    telegram_send_rate: float = float(os.getenv("TELEGRAM_SEND_RATE", "30"))
+    telegram_chat_send_rate: float = float(os.getenv("TELEGRAM_CHAT_SEND_RATE", "1"))
+    whatsapp_send_rate: float = float(os.getenv("WHATSAPP_SEND_RATE", "80"))
+    email_send_rate: float = float(os.getenv("EMAIL_SEND_RATE", "10"))
+    
+    # Inbound text normalization
+    message_max_length: int = int(os.getenv("MESSAGE_MAX_LENGTH", "4000"))
+    email_max_text_bytes: int = int(os.getenv("EMAIL_MAX_TEXT_BYTES", "65536"))
+    email_strip_quoted: bool = os.getenv("EMAIL_STRIP_QUOTED", "true").lower() == "true"
+    
+    # Metrics endpoint (port 0 disables it)
+    metrics_host: str = os.getenv("METRICS_HOST", "127.0.0.1")
+    metrics_port: int = int(os.getenv("METRICS_PORT", "0"))
 
 config = Config()
\ No newline at end of file
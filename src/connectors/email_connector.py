@@ -1,63 +1,317 @@
 """Email connector using IMAP and SMTP."""
 import asyncio
+import json
 import logging
-import smtplib
+import os
+import time
 from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
-from imapclient import IMAPClient
+from imapclient import IMAPClient, SEEN
 from ..config import config
 from ..core.persistence import Message
 from ..utils.security import SecurityUtils
-from ..utils.retry import retry_async
+from ..utils.mime import BodyPart, select_text_part, walk_bodystructure
+from ..utils.text import decode_payload, normalize_text
+from ..utils.executors import executors
+from ..utils.metrics import metrics
+from ..utils.rate_limiter import RateLimiter
+from ..utils.smtp_pool import SMTPConnectionPool
 
 logger = logging.getLogger(__name__)
 
+# IDLE waits in slices this long so a stop request ends it promptly
+IDLE_CHECK_SLICE = 1.0
+# Pause before resyncing mail the router refused while its queue was full
+BACKLOG_RETRY_DELAY = 1.0
+
+class SyncCheckpoint:
+    """Where incremental IMAP sync resumes: UIDVALIDITY, last UID and HIGHESTMODSEQ."""
+    
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self.uidvalidity: Optional[int] = None
+        self.last_uid: Optional[int] = None
+        self.highestmodseq: Optional[int] = None
+        self.load()
+    
+    def load(self) -> None:
+        """Read the checkpoint file, if there is one."""
+        if not self.path:
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable IMAP checkpoint {self.path}: {e}")
+            return
+        self.uidvalidity = data.get('uidvalidity')
+        self.last_uid = data.get('last_uid')
+        self.highestmodseq = data.get('highestmodseq')
+    
+    def save(self) -> None:
+        """Write the checkpoint atomically."""
+        if not self.path:
+            return
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'uidvalidity': self.uidvalidity,
+                'last_uid': self.last_uid,
+                'highestmodseq': self.highestmodseq
+            }, f)
+        os.replace(temp_path, self.path)
+    
+    def reset(self, uidvalidity: Optional[int], last_uid: int) -> None:
+        """Start tracking a mailbox (or a recreated one) from ``last_uid``."""
+        self.uidvalidity = uidvalidity
+        self.last_uid = last_uid
+        self.highestmodseq = None
+
 class EmailConnector:
     """Email connector for receiving and sending emails."""
     
     def __init__(self, router=None):
         self.router = router
         self.running = False
+        # Set once replies can be sent; the router replays the outbox after that
+        self.ready = asyncio.Event()
+        self.client: Optional[IMAPClient] = None
+        self.supports_idle = False
+        self.uidvalidity = None
+        self.uidnext = None
+        self.highestmodseq = None
+        # Set when the mailbox is unchanged since the checkpoint; consumed by the next sync
+        self.mailbox_unchanged = False
+        # Set when the router refused mail, which the next sync fetches again
+        self.backlog = False
+        self.checkpoint = SyncCheckpoint(
+            config.email_checkpoint_path or os.path.join(config.message_store_dir, 'email_checkpoint.json')
+        )
+        self.rate_limiter = RateLimiter(max_requests=config.rate_limit_per_minute, max_keys=config.rate_limit_max_keys)
+        self.received = metrics.counter('agent_messages_received_total', 'Messages accepted from each channel', channel='email')
+        self.rejected = metrics.counter('agent_messages_rejected_total', 'Messages the router refused from each channel', channel='email')
+        self.rate_limits = {'global': (config.email_send_rate, config.email_send_rate)}
+        self.fetched_bytes = metrics.counter('agent_email_fetched_bytes_total', 'Email body bytes downloaded')
+        self.smtp_pool = SMTPConnectionPool(
+            config.email_smtp_host,
+            config.email_smtp_port,
+            username=config.email_user,
+            password=config.email_password,
+            starttls=config.email_smtp_starttls,
+            max_size=config.smtp_pool_size,
+            max_idle_age=config.smtp_max_idle_age,
+            max_messages=config.smtp_max_messages_per_connection
+        )
+    
+    async def _run_blocking(self, func: Callable, *args) -> Any:
+        """Run a blocking IMAP call in the IMAP executor pool."""
+        return await executors.run('email_imap', func, *args)
+    
+    def _open_session(self) -> IMAPClient:
+        client = IMAPClient(config.email_imap_host, port=config.email_imap_port, ssl=config.email_imap_ssl)
+        client.login(config.email_user, config.email_password)
+        if client.has_capability('CONDSTORE'):
+            # Makes SELECT report HIGHESTMODSEQ, which changes with any mailbox change
+            client.enable('CONDSTORE')
+        folder = client.select_folder('INBOX')
+        # UIDs are only stable while UIDVALIDITY stays the same
+        self.uidvalidity = folder.get(b'UIDVALIDITY')
+        self.uidnext = folder.get(b'UIDNEXT')
+        self.highestmodseq = folder.get(b'HIGHESTMODSEQ')
+        # No search is needed on this session's first sync when no UID was
+        # assigned past the checkpoint or, with CONDSTORE, nothing changed at all
+        checkpoint = self.checkpoint
+        self.mailbox_unchanged = (
+            checkpoint.last_uid is not None
+            and checkpoint.uidvalidity == self.uidvalidity
+            and ((isinstance(self.uidnext, int) and self.uidnext <= checkpoint.last_uid + 1)
+                 or (self.highestmodseq is not None and checkpoint.highestmodseq == self.highestmodseq))
+        )
+        return client
+    
+    async def connect(self):
+        """Open the long-lived IMAP session."""
+        self.client = await self._run_blocking(self._open_session)
+        self.supports_idle = bool(self.client.has_capability('IDLE'))
+        logger.info(f"IMAP session opened ({'IDLE' if self.supports_idle else 'NOOP polling'})")
+    
+    async def disconnect(self):
+        """Close the IMAP session, ignoring errors from a dead connection."""
+        client, self.client = self.client, None
+        if client is None:
+            return
+        try:
+            await self._run_blocking(client.logout)
+        except Exception as e:
+            logger.debug(f"Error closing IMAP session: {e}")
+    
+    def _search_new(self) -> List[int]:
+        """UIDs that arrived since the checkpoint."""
+        checkpoint = self.checkpoint
+        if checkpoint.last_uid is None or checkpoint.uidvalidity != self.uidvalidity:
+            # No usable checkpoint: take the unread mail once, then track UIDs
+            logger.info("No IMAP checkpoint for this mailbox; syncing unread mail")
+            messages = self.client.search('UNSEEN')
+            baseline = self.uidnext - 1 if isinstance(self.uidnext, int) else 0
+            checkpoint.reset(self.uidvalidity, max([baseline] + list(messages)))
+            return messages
+        if self.mailbox_unchanged:
+            self.mailbox_unchanged = False
+            return []
+        # "n:*" always matches the highest UID, even when it is below n
+        return [uid for uid in self.client.search(['UID', f'{checkpoint.last_uid + 1}:*'])
+                if uid > checkpoint.last_uid]
+    
+    def _fetch_new(self) -> Dict[int, Dict[str, Any]]:
+        messages = self._search_new()
+        if not messages:
+            return {}
+        # First round trip: envelopes and MIME structure, no content
+        response = self.client.fetch(messages, ['ENVELOPE', 'BODYSTRUCTURE'])
+        fetched: Dict[int, Dict[str, Any]] = {}
+        by_section: Dict[str, List[int]] = {}
+        for msg_id, data in response.items():
+            parts = list(walk_bodystructure(data[b'BODYSTRUCTURE']))
+            text_part = select_text_part(parts)
+            fetched[msg_id] = {'envelope': data[b'ENVELOPE'], 'parts': parts, 'text_part': text_part,
+                               'payload': b''}
+            if text_part is not None:
+                by_section.setdefault(text_part.section, []).append(msg_id)
+        
+        # Then only the text part, capped, one round trip per distinct section
+        cap = config.email_max_text_bytes
+        for section, ids in by_section.items():
+            bodies = self.client.fetch(ids, [f'BODY.PEEK[{section}]<0.{cap}>'])
+            key, full_key = f'BODY[{section}]<0>'.encode(), f'BODY[{section}]'.encode()
+            for msg_id, data in bodies.items():
+                if msg_id in fetched:
+                    payload = data.get(key, data.get(full_key)) or b''
+                    fetched[msg_id]['payload'] = payload
+                    self.fetched_bytes.inc(len(payload))
+        return fetched
+    
+    def _attachment_ref(self, msg_id: int, part: BodyPart) -> str:
+        # RFC 5092 IMAP URL; the part can be fetched later if it is needed
+        return f"imap://{config.email_imap_host}/INBOX/;UID={msg_id}/;SECTION={part.section}"
+    
+    def _build_message(self, msg_id: int, fetched: Dict[str, Any]) -> Message:
+        envelope = fetched['envelope']
+        text_part = fetched['text_part']
+        body = ''
+        if text_part is not None:
+            body = decode_payload(fetched['payload'], text_part.encoding, text_part.charset)
+        attachments = [part for part in fetched['parts'] if part.is_attachment]
+        
+        return Message.trusted(
+            id=SecurityUtils.generate_message_id(),
+            channel='email',
+            sender_id=envelope.from_[0].mailbox.decode() + '@' + envelope.from_[0].host.decode(),
+            sender_name=envelope.from_[0].name.decode() if envelope.from_[0].name else 'Unknown',
+            text=normalize_text(body, config.message_max_length,
+                                is_html=text_part is not None and text_part.content_type == 'text/html',
+                                strip_replies=config.email_strip_quoted),
+            received_at=datetime.now(),
+            attachments=[self._attachment_ref(msg_id, part) for part in attachments],
+            metadata={
+                'subject': envelope.subject.decode() if envelope.subject else '',
+                'provider_id': f"{self.uidvalidity}:{msg_id}",
+                'attachments': [
+                    {'filename': part.filename, 'content_type': part.content_type, 'size': part.size}
+                    for part in attachments
+                ]
+            }
+        )
     
-    @retry_async(max_attempts=3)
     async def check_emails(self):
-        """Check for new emails via IMAP."""
+        """Fetch emails that arrived since the checkpoint and route them.
+        
+        Connection errors propagate so the session loop can reconnect.
+        """
+        if self.client is None:
+            await self.connect()
+        
+        checkpoint = self.checkpoint
+        position = (checkpoint.uidvalidity, checkpoint.last_uid, checkpoint.highestmodseq)
+        response = await self._run_blocking(self._fetch_new)
+        handled = []
+        rejected = None
+        for msg_id in sorted(response):
+            try:
+                message = self._build_message(msg_id, response[msg_id])
+            except Exception as e:
+                logger.error(f"Error parsing email {msg_id}: {e}")
+                continue
+            
+            # Rate limited mail is still marked seen so it is not fetched again
+            if not self.rate_limiter.is_allowed(message.sender_id):
+                logger.warning(f"Rate limited email from {message.sender_id}")
+                handled.append(msg_id)
+                continue
+            
+            # Hand off to the router queue
+            self.received.inc()
+            if self.router and not await self.router.enqueue(message):
+                # Leave it and everything after it unseen for the next sync
+                self.rejected.inc()
+                logger.warning(f"Router rejected email {msg_id}; retrying on the next sync")
+                rejected = msg_id
+                break
+            handled.append(msg_id)
+        self.backlog = rejected is not None
+        
+        # Mark as seen
+        if handled:
+            await self._run_blocking(self.client.add_flags, handled, [SEEN])
+        
+        if rejected is None:
+            # Unparseable mail is skipped too, so one bad message cannot stall the sync
+            checkpoint.last_uid = max([checkpoint.last_uid or 0] + list(response))
+            checkpoint.highestmodseq = self.highestmodseq
+        elif position[1] is None or position[0] != self.uidvalidity:
+            # A first sync that was cut short runs again from the unread mail
+            checkpoint.uidvalidity, checkpoint.last_uid, checkpoint.highestmodseq = position
+        else:
+            checkpoint.last_uid = rejected - 1
+        if (checkpoint.uidvalidity, checkpoint.last_uid, checkpoint.highestmodseq) != position:
+            await self._run_blocking(checkpoint.save)
+    
+    def _idle(self) -> List[tuple]:
+        deadline = time.monotonic() + config.email_idle_timeout
+        self.client.idle()
         try:
-            with IMAPClient(config.email_imap_host, port=config.email_imap_port, ssl=True) as client:
-                client.login(config.email_user, config.email_password)
-                client.select_folder('INBOX')
-                
-                # Search for unseen messages
-                messages = client.search('UNSEEN')
-                
-                for msg_id in messages:
-                    response = client.fetch([msg_id], ['ENVELOPE', 'BODY[TEXT]'])
-                    envelope = response[msg_id][b'ENVELOPE']
-                    body = response[msg_id][b'BODY[TEXT]'].decode('utf-8', errors='ignore')
-                    
-                    # Create normalized message
-                    message = Message(
-                        id=SecurityUtils.generate_message_id(),
-                        channel='email',
-                        sender_id=envelope.from_[0].mailbox.decode() + '@' + envelope.from_[0].host.decode(),
-                        sender_name=envelope.from_[0].name.decode() if envelope.from_[0].name else 'Unknown',
-                        text=SecurityUtils.sanitize_text(body),
-                        received_at=datetime.now(),
-                        metadata={'subject': envelope.subject.decode() if envelope.subject else ''}
-                    )
-                    
-                    # Route message
-                    if self.router:
-                        await self.router.route_message(message)
-                    
-                    # Mark as seen
-                    client.add_flags([msg_id], ['\\Seen'])
+            while True:
+                remaining = max(0.0, deadline - time.monotonic())
+                responses = self.client.idle_check(timeout=min(IDLE_CHECK_SLICE, remaining))
+                if responses or not self.running or time.monotonic() >= deadline:
+                    return responses
+        finally:
+            self.client.idle_done()
+    
+    async def wait_for_mail(self) -> bool:
+        """Wait for mailbox changes; returns True if new mail may have arrived.
         
-        except Exception as e:
-            logger.error(f"Error checking emails: {e}")
+        Uses IDLE push notifications when the server supports them and falls
+        back to NOOP polling otherwise. An IDLE that times out also returns
+        True, so mail that arrived between the last search and the IDLE
+        command is picked up by the UID-range sync within ``email_idle_timeout``.
+        """
+        if self.supports_idle:
+            # IDLE blocks for up to email_idle_timeout, longer than the pool timeout
+            responses = await executors.get('email_imap').run_unbounded(self._idle)
+            if not responses:
+                return self.running
+        else:
+            await asyncio.sleep(config.email_poll_interval)
+            _, responses = await self._run_blocking(self.client.noop)
+        return any(len(item) > 1 and item[1] in (b'EXISTS', b'RECENT') for item in responses)
     
-    @retry_async(max_attempts=3)
     async def send_message(self, recipient: str, text: str, subject: str = "Auto Reply"):
         """Send email response."""
         try:
@@ -68,25 +322,47 @@ class EmailConnector:
             
             msg.attach(MIMEText(text, 'plain'))
             
-            with smtplib.SMTP(config.email_smtp_host, config.email_smtp_port) as server:
-                server.starttls()
-                server.login(config.email_user, config.email_password)
-                server.send_message(msg)
+            # Send over a warm pooled session, off the event loop
+            await executors.run('email_smtp', self.smtp_pool.send, msg)
             
             logger.info(f"Email sent to {recipient}")
         
         except Exception as e:
             logger.error(f"Error sending email: {e}")
+            raise
     
     async def start(self):
         """Start the email connector."""
         self.running = True
+        # Replies go over SMTP, which does not wait for the IMAP session
+        self.ready.set()
         logger.info("Email connector started")
         
+        delay = config.email_reconnect_delay
         while self.running:
-            await self.check_emails()
-            await asyncio.sleep(30)  # Check every 30 seconds
+            try:
+                if self.client is None:
+                    await self.connect()
+                    # Catch up on anything that arrived while disconnected
+                    await self.check_emails()
+                    delay = config.email_reconnect_delay
+                
+                if self.backlog:
+                    # The router was full; resync shortly rather than wait for new mail
+                    await asyncio.sleep(BACKLOG_RETRY_DELAY)
+                    await self.check_emails()
+                elif await self.wait_for_mail() and self.running:
+                    await self.check_emails()
+            
+            except Exception as e:
+                logger.error(f"IMAP session error: {e}. Reconnecting in {delay}s...")
+                await self.disconnect()
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, config.email_reconnect_max_delay)
+        
+        await self.disconnect()
     
     def stop(self):
         """Stop the email connector."""
-        self.running = False
\ No newline at end of file
+        self.running = False
+        self.smtp_pool.close()
\ No newline at end of file
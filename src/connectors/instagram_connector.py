@@ -28,14 +28,14 @@ class InstagramConnector:
             # proper Instagram Graph API integration with webhook subscriptions
             logger.info("Checking Instagram messages (stub implementation)")
             
-            # Placeholder for actual API call
+            # Placeholder for actual API call (blocking, so run it in the channel's pool)
             # params = {'access_token': config.instagram_access_token}
-            # response = requests.get(f"{self.base_url}/me/conversations", params=params)
+            # response = await executors.run('instagram', requests.get,
+            #                                f"{self.base_url}/me/conversations", params=params)
             
         except Exception as e:
             logger.error(f"Error checking Instagram messages: {e}")
     
-    @retry_async(max_attempts=3)
     async def send_message(self, recipient_id: str, text: str):
         """Send Instagram DM (stub)."""
         if not config.instagram_access_token:
@@ -46,13 +46,13 @@ class InstagramConnector:
             # Note: This is a stub. Real implementation would use Instagram Graph API
             logger.info(f"Would send Instagram DM to {recipient_id}: {text}")
             
-            # Placeholder for actual API call
+            # Placeholder for actual API call (blocking, so run it in the channel's pool)
             # payload = {
             #     'recipient': {'id': recipient_id},
             #     'message': {'text': text},
             #     'access_token': config.instagram_access_token
             # }
-            # response = requests.post(f"{self.base_url}/me/messages", json=payload)
+            # response = await executors.run('instagram', requests.post, f"{self.base_url}/me/messages", json=payload)
             
         except Exception as e:
             logger.error(f"Error sending Instagram message: {e}")
@@ -32,13 +32,13 @@ class LinkedInConnector:
             # proper LinkedIn messaging API integration with conversation threads
             logger.info("Checking LinkedIn messages (stub implementation)")
             
-            # Placeholder for actual API call
-            # response = requests.get(f"{self.base_url}/messaging/conversations", headers=self.headers)
+            # Placeholder for actual API call (blocking, so run it in the channel's pool)
+            # response = await executors.run('linkedin', requests.get,
+            #                                f"{self.base_url}/messaging/conversations", headers=self.headers)
             
         except Exception as e:
             logger.error(f"Error checking LinkedIn messages: {e}")
     
-    @retry_async(max_attempts=3)
     async def send_message(self, recipient_id: str, text: str):
         """Send LinkedIn message (stub)."""
         if not config.linkedin_access_token:
@@ -49,13 +49,13 @@ class LinkedInConnector:
             # Note: This is a stub. Real implementation would use LinkedIn messaging API
             logger.info(f"Would send LinkedIn message to {recipient_id}: {text}")
             
-            # Placeholder for actual API call
+            # Placeholder for actual API call (blocking, so run it in the channel's pool)
             # payload = {
             #     "recipients": [recipient_id],
             #     "message": {"body": text}
             # }
-            # response = requests.post(f"{self.base_url}/messaging/conversations", 
-            #                         json=payload, headers=self.headers)
+            # response = await executors.run('linkedin', requests.post, f"{self.base_url}/messaging/conversations",
+            #                                json=payload, headers=self.headers)
             
         except Exception as e:
             logger.error(f"Error sending LinkedIn message: {e}")
@@ -0,0 +1,85 @@
+"""Connector registry: channels by name, imported only when they are used."""
+import importlib
+import logging
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+from ..config import config
+
+logger = logging.getLogger(__name__)
+
+ENTRY_POINT_GROUP = 'agent_micheal.connectors'
+
+class ConnectorSpec(NamedTuple):
+    """Where a channel's connector class lives and whether the channel is configured."""
+    target: str
+    configured: Callable[[], bool]
+
+def _always() -> bool:
+    return True
+
+def _entry_points() -> List[Any]:
+    # Scanning installed distributions takes tens of milliseconds, so it is only done for unknown channels
+    from importlib.metadata import entry_points
+    found = entry_points()
+    if hasattr(found, 'select'):
+        return list(found.select(group=ENTRY_POINT_GROUP))
+    return list(found.get(ENTRY_POINT_GROUP, []))
+
+class ConnectorRegistry:
+    """Maps channel names to connector classes without importing them.
+    
+    Channels are registered as ``module:Class`` paths, and a connector's
+    module (with the client library it wraps) is imported by ``load`` only
+    when that channel is used. Channels not registered here are looked up in
+    ``CONNECTOR_PLUGINS`` and then in the ``agent_micheal.connectors`` entry
+    point group of installed packages.
+    """
+    
+    def __init__(self):
+        self.specs: Dict[str, ConnectorSpec] = {}
+    
+    def register(self, channel: str, target: str, configured: Callable[[], bool] = _always) -> None:
+        """Register ``channel``; ``configured`` says whether it runs by default."""
+        self.specs[channel] = ConnectorSpec(target, configured)
+    
+    def spec(self, channel: str) -> Optional[ConnectorSpec]:
+        """Find a channel's spec, consulting plugins and entry points after built-ins."""
+        if channel in self.specs:
+            return self.specs[channel]
+        if channel in config.connector_plugins:
+            return ConnectorSpec(config.connector_plugins[channel], _always)
+        for entry_point in _entry_points():
+            if entry_point.name == channel:
+                return ConnectorSpec(entry_point.value, _always)
+        return None
+    
+    def selected(self) -> List[str]:
+        """Channels to run: ``CONNECTORS`` if set, otherwise every configured channel and plugin."""
+        if config.connectors:
+            return [channel.strip() for channel in config.connectors.split(',') if channel.strip()]
+        channels = [channel for channel, spec in self.specs.items() if spec.configured()]
+        return channels + [channel for channel in config.connector_plugins if channel not in channels]
+    
+    def load(self, channel: str) -> type:
+        """Import and return the connector class for ``channel``."""
+        spec = self.spec(channel)
+        if spec is None:
+            raise ValueError(f"No connector registered for channel '{channel}'")
+        module_name, _, class_name = spec.target.partition(':')
+        module = importlib.import_module(module_name, __package__)
+        return getattr(module, class_name)
+    
+    def create(self, channel: str, router=None) -> Any:
+        """Import the channel's connector and instantiate it for ``router``."""
+        return self.load(channel)(router)
+
+connector_registry = ConnectorRegistry()
+connector_registry.register('email', '.email_connector:EmailConnector',
+                            lambda: bool(config.email_user and config.email_password))
+connector_registry.register('telegram', '.telegram_connector:TelegramConnector',
+                            lambda: bool(config.telegram_bot_token))
+connector_registry.register('whatsapp', '.whatsapp_connector:WhatsAppConnector',
+                            lambda: bool(config.twilio_account_sid and config.twilio_auth_token))
+connector_registry.register('linkedin', '.linkedin_connector:LinkedInConnector',
+                            lambda: bool(config.linkedin_access_token))
+connector_registry.register('instagram', '.instagram_connector:InstagramConnector',
+                            lambda: bool(config.instagram_access_token))
\ No newline at end of file
@@ -1,22 +1,104 @@
 """Telegram connector using python-telegram-bot."""
+import asyncio
+import hmac
+import json
 import logging
+import secrets
+from collections import deque
 from datetime import datetime
+from typing import Any, Awaitable, Deque, Dict
 from telegram import Update
-from telegram.ext import Application, MessageHandler, filters, ContextTypes
+from telegram.error import RetryAfter
+from telegram.ext import Application, BaseUpdateProcessor, MessageHandler, filters, ContextTypes
 from ..config import config
 from ..core.persistence import Message
 from ..utils.security import SecurityUtils
+from ..utils.text import normalize_text
+from ..utils.http_server import HTTPRequest, HTTPResponse, HTTPServer
+from ..utils.metrics import metrics
 from ..utils.rate_limiter import RateLimiter
+from ..utils.retry import RetryAfterError
 
 logger = logging.getLogger(__name__)
 
+class ChatOrderedUpdateProcessor(BaseUpdateProcessor):
+    """Processes updates concurrently while keeping each chat's updates in order.
+    
+    Up to ``max_concurrent_updates`` updates are handled at once. An update
+    for a chat that already has one in progress is handed to that chat's
+    queue and its slot is freed at once; the update in progress runs the
+    queue after itself. So different chats run in parallel, a busy chat
+    holds one slot, and no chat sees its messages reordered. Updates without
+    a chat are not ordered.
+    """
+    
+    def __init__(self, max_concurrent_updates: int):
+        super().__init__(max_concurrent_updates)
+        self._queues: Dict[int, Deque[Awaitable[Any]]] = {}
+    
+    async def do_process_update(self, update: object, coroutine: Awaitable[Any]) -> None:
+        chat = update.effective_chat if isinstance(update, Update) else None
+        if chat is None:
+            await coroutine
+            return
+        
+        waiting = self._queues.get(chat.id)
+        if waiting is not None:
+            waiting.append(coroutine)
+            return
+        waiting = self._queues[chat.id] = deque()
+        try:
+            while True:
+                try:
+                    await coroutine
+                except Exception as e:
+                    # One failed update must not strand the chat's queue
+                    logger.error(f"Error processing update for chat {chat.id}: {e}")
+                if not waiting:
+                    break
+                coroutine = waiting.popleft()
+        finally:
+            del self._queues[chat.id]
+    
+    async def initialize(self) -> None:
+        pass
+    
+    async def shutdown(self) -> None:
+        pass
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Return the concurrency limit, chats with updates in flight and updates queued behind them."""
+        return {
+            'max_concurrent_updates': self.max_concurrent_updates,
+            'active_chats': len(self._queues),
+            'queued_updates': sum(len(waiting) for waiting in self._queues.values())
+        }
+
 class TelegramConnector:
     """Telegram bot connector."""
     
     def __init__(self, router=None):
         self.router = router
         self.app = None
-        self.rate_limiter = RateLimiter(max_requests=config.rate_limit_per_minute)
+        self.rate_limiter = RateLimiter(max_requests=config.rate_limit_per_minute, max_keys=config.rate_limit_max_keys)
+        self.received = metrics.counter('agent_messages_received_total', 'Messages accepted from each channel', channel='telegram')
+        self.rejected = metrics.counter('agent_messages_rejected_total', 'Messages the router refused from each channel', channel='telegram')
+        # Bot API limits: ~30 msg/s overall and about one per second per chat
+        self.rate_limits = {
+            'global': (config.telegram_send_rate, config.telegram_send_rate),
+            'per_recipient': (config.telegram_chat_send_rate, 1)
+        }
+        self.processor = ChatOrderedUpdateProcessor(config.telegram_max_concurrent_updates)
+        self.webhook = bool(config.telegram_webhook_url)
+        # Telegram echoes this in every webhook call; generated when not configured
+        self.webhook_secret = config.telegram_webhook_secret or secrets.token_urlsafe(32)
+        self.server = HTTPServer(config.telegram_webhook_host, config.telegram_webhook_port)
+        self.server.route('POST', config.telegram_webhook_path, self.handle_http_request)
+        self.stopping = asyncio.Event()
+        # Set once the bot can send; the router replays the outbox after that
+        self.ready = asyncio.Event()
+        self.webhooks_accepted = 0
+        self.webhooks_rejected = 0
     
     async def handle_message(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Handle incoming Telegram messages."""
@@ -29,51 +111,129 @@ class TelegramConnector:
                 return
             
             # Create normalized message
-            message = Message(
+            message = Message.trusted(
                 id=SecurityUtils.generate_message_id(),
                 channel='telegram',
                 sender_id=user_id,
                 sender_name=update.effective_user.full_name or 'Unknown',
-                text=SecurityUtils.sanitize_text(update.message.text or ''),
+                text=normalize_text(update.message.text or '', config.message_max_length),
                 received_at=datetime.now(),
                 metadata={
                     'chat_id': update.effective_chat.id,
-                    'message_id': update.message.message_id
+                    'message_id': update.message.message_id,
+                    # message_id is only unique within a chat
+                    'provider_id': f"{update.effective_chat.id}:{update.message.message_id}"
                 }
             )
             
-            # Route message
-            if self.router:
-                await self.router.route_message(message)
+            # Hand off to the router queue
+            self.received.inc()
+            if self.router and not await self.router.enqueue(message):
+                self.rejected.inc()
+                logger.warning(f"Router rejected Telegram message from {message.sender_id}")
         
         except Exception as e:
             logger.error(f"Error handling Telegram message: {e}")
             await update.message.reply_text("Sorry, I encountered an error processing your message.")
     
+    async def handle_http_request(self, request: HTTPRequest) -> HTTPResponse:
+        """Check a Bot API webhook call and queue its update for the application."""
+        token = request.headers.get('x-telegram-bot-api-secret-token', '')
+        if not hmac.compare_digest(token.encode(), self.webhook_secret.encode()):
+            self.webhooks_rejected += 1
+            logger.warning("Rejected Telegram webhook with invalid secret token")
+            return HTTPResponse(403)
+        try:
+            update = Update.de_json(json.loads(request.body), self.app.bot)
+        except (ValueError, TypeError, KeyError) as e:
+            self.webhooks_rejected += 1
+            logger.warning(f"Rejected malformed Telegram update: {e}")
+            return HTTPResponse(400)
+        
+        # Ack now; the application's update processor takes it from the queue
+        await self.app.update_queue.put(update)
+        self.webhooks_accepted += 1
+        return HTTPResponse(200)
+    
     async def send_message(self, chat_id: str, text: str):
         """Send message via Telegram."""
         try:
             await self.app.bot.send_message(chat_id=int(chat_id), text=text)
             logger.info(f"Telegram message sent to {chat_id}")
+        except RetryAfter as e:
+            raise RetryAfterError(float(e.retry_after), str(e))
         except Exception as e:
             logger.error(f"Error sending Telegram message: {e}")
+            raise
+    
+    def _build_application(self) -> Application:
+        builder = (Application.builder()
+                   .token(config.telegram_bot_token)
+                   .base_url(config.telegram_api_url)
+                   .concurrent_updates(self.processor))
+        if self.webhook:
+            # Updates arrive on our own server, so there is nothing to poll
+            builder = builder.updater(None)
+        app = builder.build()
+        app.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, self.handle_message))
+        return app
     
     async def start(self):
-        """Start the Telegram bot."""
+        """Start the Telegram bot on the running event loop.
+        
+        Receives updates on our webhook server when ``TELEGRAM_WEBHOOK_URL`` is
+        set and by long polling otherwise. After ``stop`` no new updates are
+        taken, but the bot keeps sending replies until this task is cancelled.
+        """
         if not config.telegram_bot_token:
             logger.warning("Telegram bot token not configured")
             return
         
-        self.app = Application.builder().token(config.telegram_bot_token).build()
-        
-        # Add message handler
-        message_handler = MessageHandler(filters.TEXT & ~filters.COMMAND, self.handle_message)
-        self.app.add_handler(message_handler)
-        
-        logger.info("Telegram connector started")
-        await self.app.run_polling()
+        self.app = self._build_application()
+        try:
+            await self.app.initialize()
+            if self.webhook:
+                await self.server.start()
+                await self.app.bot.set_webhook(url=config.telegram_webhook_url, secret_token=self.webhook_secret,
+                                               allowed_updates=[Update.MESSAGE])
+                mode = f"webhooks on port {self.server.port}{config.telegram_webhook_path}"
+            else:
+                await self.app.updater.start_polling(allowed_updates=[Update.MESSAGE])
+                mode = "long polling"
+            await self.app.start()
+            self.ready.set()
+            logger.info(f"Telegram connector started ({mode}, up to "
+                        f"{self.processor.max_concurrent_updates} concurrent updates)")
+            
+            await self.stopping.wait()
+            await self._stop_receiving()
+            logger.info("Telegram connector stopped receiving updates")
+            # Replies are still sent while the router drains
+            await asyncio.Future()
+        finally:
+            await self._stop_receiving()
+            await self.app.shutdown()
+    
+    async def _stop_receiving(self):
+        """Stop taking updates and finish the ones already received."""
+        self.server.close()
+        if self.app.updater and self.app.updater.running:
+            await self.app.updater.stop()
+        if self.app.running:
+            await self.app.stop()
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Return ingestion mode, webhook counters and update concurrency."""
+        stats = {
+            'mode': 'webhook' if self.webhook else 'polling',
+            'accepted': self.webhooks_accepted,
+            'rejected': self.webhooks_rejected,
+            'updates': self.processor.get_stats()
+        }
+        if self.webhook:
+            stats['http'] = self.server.get_stats()
+        return stats
     
     def stop(self):
-        """Stop the Telegram bot."""
-        if self.app:
-            self.app.stop_running()
\ No newline at end of file
+        """Stop receiving Telegram updates."""
+        self.stopping.set()
\ No newline at end of file
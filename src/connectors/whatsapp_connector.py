@@ -1,11 +1,19 @@
 """WhatsApp connector using Twilio API."""
+import asyncio
 import logging
 from datetime import datetime
+from typing import Any, Dict, Set
+from twilio.base.exceptions import TwilioRestException
 from twilio.rest import Client
 from ..config import config
 from ..core.persistence import Message
 from ..utils.security import SecurityUtils
-from ..utils.retry import retry_async
+from ..utils.text import normalize_text
+from ..utils.executors import executors
+from ..utils.http_server import HTTPRequest, HTTPResponse, HTTPServer
+from ..utils.metrics import metrics
+from ..utils.rate_limiter import RateLimiter
+from ..utils.retry import RetryAfterError
 
 logger = logging.getLogger(__name__)
 
@@ -15,6 +23,17 @@ class WhatsAppConnector:
     def __init__(self, router=None):
         self.router = router
         self.client = None
+        self.rate_limiter = RateLimiter(max_requests=config.rate_limit_per_minute, max_keys=config.rate_limit_max_keys)
+        self.received = metrics.counter('agent_messages_received_total', 'Messages accepted from each channel', channel='whatsapp')
+        self.rejected = metrics.counter('agent_messages_rejected_total', 'Messages the router refused from each channel', channel='whatsapp')
+        self.rate_limits = {'global': (config.whatsapp_send_rate, config.whatsapp_send_rate)}
+        self.server = HTTPServer(config.whatsapp_webhook_host, config.whatsapp_webhook_port)
+        self.server.route('POST', config.whatsapp_webhook_path, self.handle_http_request)
+        self.pending: Set[asyncio.Task] = set()
+        # Set once replies can be sent; the router replays the outbox after that
+        self.ready = asyncio.Event()
+        self.webhooks_accepted = 0
+        self.webhooks_rejected = 0
         self._initialize_client()
     
     def _initialize_client(self):
@@ -24,6 +43,31 @@ class WhatsAppConnector:
         else:
             logger.warning("Twilio credentials not configured")
     
+    def _signed_url(self, request: HTTPRequest) -> str:
+        """The URL Twilio signed: the configured public URL, or the one the request reached."""
+        if config.whatsapp_webhook_url:
+            return config.whatsapp_webhook_url + (f"?{request.query}" if request.query else '')
+        scheme = request.headers.get('x-forwarded-proto', 'http')
+        return f"{scheme}://{request.headers.get('host', '')}{request.target}"
+    
+    async def handle_http_request(self, request: HTTPRequest) -> HTTPResponse:
+        """Validate a Twilio webhook and acknowledge it before processing."""
+        params = request.form()
+        if config.whatsapp_validate_signature:
+            signature = request.headers.get('x-twilio-signature', '')
+            if not signature or not SecurityUtils.verify_twilio_signature(
+                    self._signed_url(request), params, signature, config.twilio_auth_token):
+                self.webhooks_rejected += 1
+                logger.warning("Rejected WhatsApp webhook with invalid signature")
+                return HTTPResponse(403)
+        
+        # Ack now so Twilio's timeout never depends on routing or backpressure
+        task = asyncio.create_task(self.handle_webhook(params))
+        self.pending.add(task)
+        task.add_done_callback(self.pending.discard)
+        self.webhooks_accepted += 1
+        return HTTPResponse(200, b'<Response></Response>', 'text/xml')
+    
     async def handle_webhook(self, request_data: dict):
         """Handle incoming WhatsApp webhook from Twilio."""
         try:
@@ -34,50 +78,79 @@ class WhatsAppConnector:
             if not from_number or not body:
                 return
             
+            # Rate limiting
+            if not self.rate_limiter.is_allowed(from_number):
+                logger.warning(f"Rate limited WhatsApp sender {from_number}")
+                return
+            
             # Create normalized message
-            message = Message(
+            message = Message.trusted(
                 id=SecurityUtils.generate_message_id(),
                 channel='whatsapp',
                 sender_id=from_number,
                 sender_name=request_data.get('ProfileName', 'WhatsApp User'),
-                text=SecurityUtils.sanitize_text(body),
+                text=normalize_text(body, config.message_max_length),
                 received_at=datetime.now(),
                 metadata={
                     'message_sid': request_data.get('MessageSid'),
-                    'account_sid': request_data.get('AccountSid')
+                    'account_sid': request_data.get('AccountSid'),
+                    'provider_id': request_data.get('MessageSid')
                 }
             )
             
-            # Route message
-            if self.router:
-                await self.router.route_message(message)
+            # Hand off to the router queue
+            self.received.inc()
+            if self.router and not await self.router.enqueue(message):
+                self.rejected.inc()
+                logger.warning(f"Router rejected WhatsApp message from {message.sender_id}")
         
         except Exception as e:
             logger.error(f"Error handling WhatsApp webhook: {e}")
     
-    @retry_async(max_attempts=3)
     async def send_message(self, to_number: str, text: str):
         """Send WhatsApp message via Twilio."""
         if not self.client:
-            logger.error("Twilio client not initialized")
-            return
+            raise RuntimeError("Twilio client not initialized")
         
         try:
-            message = self.client.messages.create(
+            message = await executors.run(
+                'whatsapp',
+                self.client.messages.create,
                 body=text,
                 from_=config.twilio_whatsapp_number,
                 to=to_number
             )
             logger.info(f"WhatsApp message sent to {to_number}: {message.sid}")
         
+        except TwilioRestException as e:
+            if e.status != 429:
+                logger.error(f"Error sending WhatsApp message: {e}")
+                raise
+            # Twilio sends no Retry-After header, so back off for a second
+            raise RetryAfterError(1.0, str(e))
+        
         except Exception as e:
             logger.error(f"Error sending WhatsApp message: {e}")
+            raise
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Return webhook counters and HTTP server metrics."""
+        return {
+            'accepted': self.webhooks_accepted,
+            'rejected': self.webhooks_rejected,
+            'processing': len(self.pending),
+            'http': self.server.get_stats()
+        }
     
     async def start(self):
         """Start WhatsApp connector (webhook-based)."""
-        logger.info("WhatsApp connector ready (webhook-based)")
-        # Note: This connector relies on webhooks, so no polling loop needed
+        await self.server.start()
+        if self.client:
+            self.ready.set()
+        logger.info(f"WhatsApp connector receiving webhooks on port {self.server.port}{config.whatsapp_webhook_path}")
+        await self.server.serve_forever()
     
     def stop(self):
         """Stop WhatsApp connector."""
+        self.server.close()
         logger.info("WhatsApp connector stopped")
\ No newline at end of file
@@ -0,0 +1,148 @@
+"""In-memory conversation context per sender."""
+import asyncio
+import logging
+import time
+from collections import OrderedDict, deque
+from typing import Any, Deque, Dict, List, NamedTuple, Optional, Tuple
+from .nlp import IntentDetector
+from .persistence import Message, MessageStore
+
+logger = logging.getLogger(__name__)
+
+ConversationKey = Tuple[str, str]
+
+class Turn(NamedTuple):
+    """One cached message; a tuple keeps the per-turn footprint small."""
+    id: str
+    text: str
+    received_at: str
+    intents: List[str]
+
+class ConversationContext:
+    """The last few turns of one conversation, oldest first."""
+    
+    def __init__(self, channel: str, sender_id: str, max_turns: int):
+        self.channel = channel
+        self.sender_id = sender_id
+        self.turns: Deque[Turn] = deque(maxlen=max_turns)
+        self.touched_at = time.monotonic()
+    
+    def add_turn(self, message_id: str, text: str, received_at: Any, intents: List[str]) -> None:
+        """Append a turn unless it is already the most recent one."""
+        if self.turns and self.turns[-1].id == message_id:
+            return
+        self.turns.append(Turn(message_id, text, received_at, intents))
+    
+    @property
+    def last_intent(self) -> Optional[str]:
+        """Primary intent of the most recent turn, if any."""
+        if not self.turns or not self.turns[-1].intents:
+            return None
+        return self.turns[-1].intents[0]
+
+class ConversationContextCache:
+    """Bounded LRU of ``ConversationContext`` keyed by ``(channel, sender_id)``.
+    
+    Entries untouched for ``ttl`` seconds are treated as misses. A miss warms
+    the entry from the stored conversation (read in the default executor) and
+    re-detects the intents of its turns in one batch. An indexed store is
+    queried; on one that would have to scan its whole history only the last
+    ``scan_bytes`` are read, and with ``scan_bytes`` 0 the entry starts empty.
+    """
+    
+    def __init__(self, store: MessageStore, intent_detector: IntentDetector, max_turns: int = 10,
+                 max_entries: int = 10000, ttl: float = 1800.0, scan_bytes: int = 4 * 1024 * 1024):
+        self.store = store
+        self.intent_detector = intent_detector
+        self.max_turns = max_turns
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.scan_bytes = scan_bytes
+        self.entries: 'OrderedDict[ConversationKey, ConversationContext]' = OrderedDict()
+        
+        # Metrics
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.warm_errors = 0
+    
+    def _lookup(self, key: ConversationKey, now: float) -> Optional[ConversationContext]:
+        context = self.entries.get(key)
+        if context is None:
+            return None
+        if now - context.touched_at > self.ttl:
+            del self.entries[key]
+            self.expirations += 1
+            return None
+        context.touched_at = now
+        self.entries.move_to_end(key)
+        return context
+    
+    def _warm(self, channel: str, sender_id: str) -> ConversationContext:
+        context = ConversationContext(channel, sender_id, self.max_turns)
+        try:
+            if self.store.indexed:
+                records = self.store.get_conversation(channel, sender_id, limit=self.max_turns)
+            else:
+                records = self.store.get_recent_conversation(channel, sender_id, self.max_turns, self.scan_bytes)
+        except Exception as e:
+            self.warm_errors += 1
+            logger.error(f"Error loading conversation {channel}/{sender_id}: {e}")
+            return context
+        
+        records.reverse()
+        results = self.intent_detector.detect_intents([record.get('text', '') for record in records])
+        for record, result in zip(records, results):
+            context.add_turn(record.get('id'), record.get('text', ''), record.get('received_at'),
+                             result['all_intents'])
+        return context
+    
+    async def get(self, channel: str, sender_id: str) -> ConversationContext:
+        """Return the conversation's context, loading it from the store on a miss."""
+        key = (channel, sender_id)
+        context = self._lookup(key, time.monotonic())
+        if context is not None:
+            self.hits += 1
+            return context
+        
+        self.misses += 1
+        if self.store.indexed or self.scan_bytes > 0:
+            loop = asyncio.get_running_loop()
+            warmed = await loop.run_in_executor(None, self._warm, channel, sender_id)
+        else:
+            warmed = ConversationContext(channel, sender_id, self.max_turns)
+        
+        # Another worker may have filled the entry while the store was read
+        context = self._lookup(key, time.monotonic())
+        if context is not None:
+            return context
+        self.entries[key] = warmed
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+        return warmed
+    
+    async def record(self, message: Message, intents: List[str]) -> ConversationContext:
+        """Add a message and its detected intents to its conversation."""
+        context = await self.get(message.channel, message.sender_id)
+        context.add_turn(message.id, message.text, message.received_at.isoformat(), intents)
+        return context
+    
+    def invalidate(self, channel: str, sender_id: str) -> None:
+        """Drop a conversation from the cache."""
+        self.entries.pop((channel, sender_id), None)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Return size and hit/miss/eviction counters."""
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self.entries),
+            'max_entries': self.max_entries,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'evictions': self.evictions,
+            'expirations': self.expirations,
+            'warm_errors': self.warm_errors
+        }
\ No newline at end of file
@@ -0,0 +1,252 @@
+"""Provider message ID index for idempotent ingestion."""
+import asyncio
+import hashlib
+import logging
+import math
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+from ..utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS seen (
+    key TEXT PRIMARY KEY,
+    seen_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_seen_at ON seen (seen_at);
+"""
+
+class BloomFilter:
+    """Set membership without false negatives, at ``error_rate`` false positives up to ``capacity`` keys."""
+    
+    def __init__(self, capacity: int, error_rate: float = 0.01):
+        self.capacity = capacity
+        self.size = max(64, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+    
+    def _positions(self, key: str) -> Iterator[int]:
+        # Double hashing: k positions from the two halves of one digest
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        second = int.from_bytes(digest[8:], 'little') | 1
+        return ((first + i * second) % self.size for i in range(self.hashes))
+    
+    def add(self, key: str) -> None:
+        for position in self._positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+    
+    def __contains__(self, key: str) -> bool:
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+class DedupIndex:
+    """Remembers provider message IDs so redeliveries are processed once.
+    
+    Keys are ``channel:provider_id``. ``seen`` claims a new key in memory;
+    it is only ``record``-ed once the message has been handled, and a message
+    that was never accepted is ``release``-d, so a redelivery after a
+    rejection, a drop or a crash is processed again. The newest
+    ``max_entries`` recorded keys are kept in an LRU set, so a recent
+    redelivery is caught without I/O. Recorded keys are also written to
+    SQLite, which catches older redeliveries and ones seen before a restart.
+    A Bloom filter of the stored keys answers most lookups of new IDs, so
+    SQLite is only queried for a key that may be stored. Once ``start`` has
+    been called, keys are written in batches every ``flush_interval`` seconds
+    in a worker thread, on their own connection. Rows older than
+    ``retention`` seconds are pruned. Without a ``path`` the index is
+    memory-only.
+    """
+    
+    def __init__(self, path: Optional[str] = None, max_entries: int = 100000,
+                 retention: float = 7 * 86400, prune_every: int = 1000,
+                 flush_interval: float = 0.05, filter_capacity: int = 1000000):
+        self.path = path
+        self.max_entries = max_entries
+        self.retention = retention
+        self.prune_every = prune_every
+        self.flush_interval = flush_interval
+        self.filter_capacity = filter_capacity
+        self.recent: 'OrderedDict[str, None]' = OrderedDict()
+        self.claimed: Set[str] = set()
+        self.filter: Optional[BloomFilter] = None
+        self._conn: Optional[sqlite3.Connection] = None
+        self._writer: Optional[sqlite3.Connection] = None
+        self._writer_lock = threading.Lock()
+        self._unwritten: List[Tuple[str, float]] = []
+        self._writing: List[Tuple[str, float]] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._inserts = 0
+        
+        # Metrics
+        self.checked = 0
+        self.lookups_skipped = 0
+        self.duplicates: Dict[str, int] = defaultdict(int)
+        self.duplicates_persistent = 0
+        
+        if path:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._writer = self._connect(path)
+            self._writer.executescript(SCHEMA)
+            self._writer.commit()
+            self._conn = self._connect(path)
+            self._load_recent()
+            self.filter = self._build_filter()
+    
+    @staticmethod
+    def _connect(path: str) -> sqlite3.Connection:
+        conn = sqlite3.connect(path, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+    
+    def _load_recent(self):
+        rows = self._conn.execute(
+            "SELECT key FROM (SELECT key, seen_at FROM seen ORDER BY seen_at DESC LIMIT ?) ORDER BY seen_at",
+            (self.max_entries,)
+        ).fetchall()
+        self.recent.update((key, None) for key, in rows)
+    
+    def _remember(self, key: str):
+        self.recent[key] = None
+        if len(self.recent) > self.max_entries:
+            self.recent.popitem(last=False)
+    
+    def _build_filter(self) -> BloomFilter:
+        with self._writer_lock:
+            stored, = self._writer.execute("SELECT COUNT(*) FROM seen").fetchone()
+            bloom = BloomFilter(max(self.filter_capacity, 2 * stored))
+            for key, in self._writer.execute("SELECT key FROM seen"):
+                bloom.add(key)
+        return bloom
+    
+    def _write(self, batch: List[Tuple[str, float]]) -> None:
+        with self._writer_lock:
+            self._writer.executemany("INSERT OR IGNORE INTO seen (key, seen_at) VALUES (?, ?)", batch)
+            before, self._inserts = self._inserts, self._inserts + len(batch)
+            if before // self.prune_every != self._inserts // self.prune_every:
+                self._writer.execute("DELETE FROM seen WHERE seen_at < ?", (batch[-1][1] - self.retention,))
+            self._writer.commit()
+    
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            await self._wakeup.wait()
+            # Keys recorded over one interval go out in a single transaction
+            await asyncio.sleep(self.flush_interval)
+            self._wakeup.clear()
+            self._writing, self._unwritten = self._unwritten, []
+            try:
+                await loop.run_in_executor(None, self._write, self._writing)
+            except sqlite3.Error as e:
+                logger.error(f"Error recording {len(self._writing)} keys in dedup index: {e}")
+            finally:
+                self._writing = []
+            if self.filter.count > self.filter.capacity:
+                # Pruned keys stay in the filter until it is rebuilt from the table
+                rebuilt = await loop.run_in_executor(None, self._build_filter)
+                for key, _ in self._unwritten:
+                    rebuilt.add(key)
+                self.filter = rebuilt
+    
+    def start(self) -> None:
+        """Write recorded keys in batches off the event loop from now on."""
+        if self._conn is not None and self._task is None:
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+    
+    def _stored(self, key: str) -> bool:
+        try:
+            return self._conn.execute("SELECT 1 FROM seen WHERE key = ?", (key,)).fetchone() is not None
+        except sqlite3.Error as e:
+            logger.error(f"Error looking up {key} in dedup index: {e}")
+            return False
+    
+    def seen(self, channel: str, provider_id: str) -> bool:
+        """Return True if the message was handled before or is being handled; otherwise claim it."""
+        self.checked += 1
+        key = f"{channel}:{provider_id}"
+        if key in self.recent:
+            self.recent.move_to_end(key)
+            self._count_duplicate(channel)
+            return True
+        if key in self.claimed:
+            self._count_duplicate(channel)
+            return True
+        if self._conn is not None and key not in self.filter:
+            self.lookups_skipped += 1
+        elif self._conn is not None and self._stored(key):
+            self._remember(key)
+            self.duplicates_persistent += 1
+            self._count_duplicate(channel)
+            return True
+        self.claimed.add(key)
+        return False
+    
+    def record(self, channel: str, provider_id: str) -> None:
+        """Mark a claimed message as handled; its redeliveries are dropped from now on."""
+        key = f"{channel}:{provider_id}"
+        self.claimed.discard(key)
+        self._remember(key)
+        if self._conn is None:
+            return
+        self.filter.add(key)
+        self._unwritten.append((key, time.time()))
+        if self._task is not None:
+            self._wakeup.set()
+            return
+        batch, self._unwritten = self._unwritten, []
+        try:
+            self._write(batch)
+        except sqlite3.Error as e:
+            logger.error(f"Error recording {key} in dedup index: {e}")
+    
+    def release(self, channel: str, provider_id: str) -> None:
+        """Forget a claimed message that was not accepted, so a redelivery is processed."""
+        self.claimed.discard(f"{channel}:{provider_id}")
+    
+    def _count_duplicate(self, channel: str):
+        self.duplicates[channel] += 1
+        metrics.counter('agent_duplicates_dropped_total', 'Redelivered messages dropped before routing',
+                        channel=channel).inc()
+    
+    def close(self) -> None:
+        """Write the keys still buffered and close the backing database."""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        if self._conn is None:
+            return
+        batch, self._unwritten = self._unwritten, []
+        try:
+            if batch:
+                self._write(batch)
+        except sqlite3.Error as e:
+            logger.error(f"Error recording {len(batch)} keys in dedup index: {e}")
+        # Waits for a batch still being written in a worker thread
+        with self._writer_lock:
+            self._writer.close()
+            self._writer = None
+        self._conn.close()
+        self._conn = None
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Return lookups, skipped SQLite queries, unwritten keys and duplicate drops per channel."""
+        return {
+            'checked': self.checked,
+            'lookups_skipped': self.lookups_skipped,
+            'unwritten': len(self._unwritten) + len(self._writing),
+            'recent_keys': len(self.recent),
+            'claimed': len(self.claimed),
+            'duplicates': dict(self.duplicates),
+            'duplicates_persistent': self.duplicates_persistent
+        }
\ No newline at end of file
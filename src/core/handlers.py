@@ -1,9 +1,14 @@
 """Message handlers for processing and generating replies."""
 import logging
+from time import perf_counter
 from typing import Optional
+from .context import ConversationContext, ConversationContextCache
 from .persistence import Message, MessageStore
 from .nlp import IntentDetector
 from .templates import ResponseTemplates
+from .write_behind import WriteBehindQueue
+from ..config import config
+from ..utils.metrics import metrics
 
 logger = logging.getLogger(__name__)
 
@@ -14,20 +19,64 @@ class MessageHandler:
         self.message_store = MessageStore()
         self.intent_detector = IntentDetector()
         self.templates = ResponseTemplates()
+        self.writer = WriteBehindQueue(
+            self.message_store,
+            max_batch_size=config.persistence_batch_size,
+            flush_interval=config.persistence_flush_interval,
+            max_queue_size=config.persistence_queue_size
+        )
+        self.context = ConversationContextCache(
+            self.message_store,
+            self.intent_detector,
+            max_turns=config.context_max_turns,
+            max_entries=config.context_cache_size,
+            ttl=config.context_ttl,
+            scan_bytes=config.context_warm_scan_bytes
+        )
+        self.persist_seconds = metrics.histogram('agent_stage_seconds', 'Time spent in each pipeline stage', stage='persist')
+        self.intent_seconds = metrics.histogram('agent_stage_seconds', 'Time spent in each pipeline stage', stage='intent')
+        self.context_seconds = metrics.histogram('agent_stage_seconds', 'Time spent in each pipeline stage', stage='context')
+        self.template_seconds = metrics.histogram('agent_stage_seconds', 'Time spent in each pipeline stage', stage='template')
+        self.handler_seconds = metrics.histogram('agent_stage_seconds', 'Time spent in each pipeline stage', stage='handler')
+    
+    async def start(self):
+        """Start background persistence."""
+        await self.writer.start()
+    
+    async def stop(self):
+        """Stop background persistence, waiting for queued messages to be written."""
+        await self.writer.stop()
+    
+    def stop_nowait(self):
+        """Stop background persistence from synchronous code, writing any queued messages."""
+        self.writer.stop_nowait()
     
     async def process_message(self, message: Message) -> Optional[str]:
         """Process incoming message and generate response."""
+        started = perf_counter()
         try:
-            # Save incoming message
-            self.message_store.save_message(message)
+            # Queue incoming message for persistence
+            await self.writer.submit(message)
             logger.info(f"Processed message from {message.sender_name} on {message.channel}")
+            persisted = perf_counter()
+            self.persist_seconds.observe(persisted - started)
             
             # Detect intent
             intent_result = self.intent_detector.detect_intent(message.text)
             primary_intent = intent_result['primary_intent']
+            detected = perf_counter()
+            self.intent_seconds.observe(detected - persisted)
+            
+            # Remember this turn alongside the conversation's earlier ones
+            await self.context.record(message, intent_result['all_intents'])
+            recorded = perf_counter()
+            self.context_seconds.observe(recorded - detected)
             
             # Generate response based on intent
-            response = self.templates.get_response(primary_intent, message.channel)
+            response = self.templates.get_response(primary_intent, message.channel, message)
+            finished = perf_counter()
+            self.template_seconds.observe(finished - recorded)
+            self.handler_seconds.observe(finished - started)
             
             logger.info(f"Generated response for intent: {primary_intent}")
             return response
@@ -36,6 +85,10 @@ class MessageHandler:
             logger.error(f"Error processing message: {e}")
             return "I'm sorry, I encountered an error processing your message. Please try again."
     
+    async def get_context(self, channel: str, sender_id: str) -> ConversationContext:
+        """Get the recent turns of a conversation."""
+        return await self.context.get(channel, sender_id)
+    
     def get_auto_reply(self, channel: str) -> str:
         """Get automatic reply for a channel."""
         return self.templates.get_auto_reply(channel)
\ No newline at end of file
@@ -0,0 +1,123 @@
+"""Bounded ingress queue with per-channel backpressure."""
+import asyncio
+import logging
+from collections import defaultdict, deque
+from typing import Any, Callable, Deque, Dict, Optional, Tuple
+from .persistence import Message
+from ..utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+BACKPRESSURE_POLICIES = ('block', 'drop_oldest', 'reject')
+
+class IngressQueue:
+    """FIFO of incoming messages shared by all connectors.
+    
+    When the queue is full each channel's policy decides what happens:
+    ``block`` waits for space, ``drop_oldest`` discards the oldest queued
+    message of the same channel, and ``reject`` refuses the new message.
+    ``on_drop`` is called with every message discarded by ``drop_oldest``.
+    """
+    
+    def __init__(self, maxsize: int = 1000, default_policy: str = 'block',
+                 channel_policies: Optional[Dict[str, str]] = None,
+                 on_drop: Optional[Callable[[Message], None]] = None):
+        channel_policies = channel_policies or {}
+        for policy in [default_policy, *channel_policies.values()]:
+            if policy not in BACKPRESSURE_POLICIES:
+                raise ValueError(f"Unknown backpressure policy: {policy}")
+        self.maxsize = maxsize
+        self.default_policy = default_policy
+        self.channel_policies = channel_policies
+        self.on_drop = on_drop
+        self._items: Deque[Tuple[Message, float]] = deque()
+        self._not_empty: Optional[asyncio.Condition] = None
+        self._not_full: Optional[asyncio.Condition] = None
+        
+        # Metrics
+        self.enqueued: Dict[str, int] = defaultdict(int)
+        self.dropped: Dict[str, int] = defaultdict(int)
+        self.rejected: Dict[str, int] = defaultdict(int)
+        self.blocked: Dict[str, int] = defaultdict(int)
+        self.max_depth = 0
+        self.wait_count = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.wait_seconds = metrics.histogram('agent_stage_seconds', 'Time spent in each pipeline stage', stage='ingress_wait')
+    
+    def _conditions(self) -> Tuple[asyncio.Condition, asyncio.Condition]:
+        # Created lazily so the queue can be built outside a running loop
+        if self._not_empty is None:
+            lock = asyncio.Lock()
+            self._not_empty = asyncio.Condition(lock)
+            self._not_full = asyncio.Condition(lock)
+        return self._not_empty, self._not_full
+    
+    def policy_for(self, channel: str) -> str:
+        """Return the backpressure policy for a channel."""
+        return self.channel_policies.get(channel, self.default_policy)
+    
+    def qsize(self) -> int:
+        """Return the number of queued messages."""
+        return len(self._items)
+    
+    def _drop_oldest(self, channel: str) -> bool:
+        for index, (queued, _) in enumerate(self._items):
+            if queued.channel == channel:
+                del self._items[index]
+                self.dropped[channel] += 1
+                logger.warning(f"Ingress queue full, dropped oldest {channel} message {queued.id}")
+                if self.on_drop:
+                    self.on_drop(queued)
+                return True
+        return False
+    
+    async def put(self, message: Message) -> bool:
+        """Queue a message; returns False if it was rejected."""
+        not_empty, not_full = self._conditions()
+        channel = message.channel
+        async with not_full:
+            if len(self._items) >= self.maxsize:
+                policy = self.policy_for(channel)
+                if policy == 'block':
+                    self.blocked[channel] += 1
+                    await not_full.wait_for(lambda: len(self._items) < self.maxsize)
+                elif policy != 'drop_oldest' or not self._drop_oldest(channel):
+                    self.rejected[channel] += 1
+                    logger.warning(f"Ingress queue full, rejected {channel} message {message.id}")
+                    return False
+            
+            self._items.append((message, asyncio.get_running_loop().time()))
+            self.enqueued[channel] += 1
+            self.max_depth = max(self.max_depth, len(self._items))
+            not_empty.notify()
+        return True
+    
+    async def get(self) -> Message:
+        """Wait for and return the oldest queued message."""
+        not_empty, not_full = self._conditions()
+        async with not_empty:
+            await not_empty.wait_for(lambda: self._items)
+            message, enqueued_at = self._items.popleft()
+            not_full.notify()
+        
+        wait = asyncio.get_running_loop().time() - enqueued_at
+        self.wait_count += 1
+        self.wait_total += wait
+        self.wait_max = max(self.wait_max, wait)
+        self.wait_seconds.observe(wait)
+        return message
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Return queue depth, per-channel counters and wait times."""
+        return {
+            'depth': len(self._items),
+            'max_depth': self.max_depth,
+            'capacity': self.maxsize,
+            'enqueued': dict(self.enqueued),
+            'dropped': dict(self.dropped),
+            'rejected': dict(self.rejected),
+            'blocked': dict(self.blocked),
+            'wait_avg': self.wait_total / self.wait_count if self.wait_count else 0.0,
+            'wait_max': self.wait_max
+        }
\ No newline at end of file
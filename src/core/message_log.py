@@ -0,0 +1,221 @@
+"""Append-only segmented log for message records."""
+import json
+import logging
+import os
+import re
+import threading
+import time
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+from .storage import StorageBackend, encode_json
+
+logger = logging.getLogger(__name__)
+
+SEGMENT_PATTERN = re.compile(r'^segment-(\d{8})\.jsonl$')
+FSYNC_POLICIES = ('always', 'interval', 'never')
+
+class SegmentedLog(StorageBackend):
+    """Stores one JSON record per line across size-bounded segment files.
+    
+    Appends only ever touch the active (highest numbered) segment, so writing a
+    record costs the same no matter how much history is on disk. Once the active
+    segment grows past ``segment_max_bytes`` a new one is started. Under the
+    ``interval`` fsync policy a write that is not synced right away is synced
+    by a timer, so no write stays unsynced for much longer than
+    ``fsync_interval``.
+    """
+    
+    def __init__(self, directory: str, segment_max_bytes: int = 64 * 1024 * 1024,
+                 fsync_policy: str = 'interval', fsync_interval: float = 1.0):
+        if fsync_policy not in FSYNC_POLICIES:
+            raise ValueError(f"Unknown fsync policy: {fsync_policy}")
+        self.directory = directory
+        self.segment_max_bytes = segment_max_bytes
+        self.fsync_policy = fsync_policy
+        self.fsync_interval = fsync_interval
+        self._lock = threading.Lock()
+        self._file = None
+        self._segment_number = 0
+        self._segment_size = 0
+        self._last_fsync = time.monotonic()
+        self._unsynced = False
+        self._timer: Optional[threading.Timer] = None
+        os.makedirs(self.directory, exist_ok=True)
+        self._open_active_segment()
+    
+    def _segment_path(self, number: int) -> str:
+        return os.path.join(self.directory, f"segment-{number:08d}.jsonl")
+    
+    def segment_numbers(self) -> List[int]:
+        """Return the numbers of all segments on disk, oldest first."""
+        numbers = []
+        for name in os.listdir(self.directory):
+            match = SEGMENT_PATTERN.match(name)
+            if match:
+                numbers.append(int(match.group(1)))
+        return sorted(numbers)
+    
+    def _open_active_segment(self):
+        numbers = self.segment_numbers()
+        self._segment_number = numbers[-1] if numbers else 1
+        path = self._segment_path(self._segment_number)
+        self._file = open(path, 'ab')
+        self._segment_size = self._file.tell()
+        
+        # A crash can leave a partially written last line; terminate it so the
+        # next record starts on a fresh line (readers skip the broken one).
+        if self._segment_size:
+            with open(path, 'rb') as f:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b'\n':
+                    self._file.write(b'\n')
+                    self._file.flush()
+                    self._segment_size += 1
+    
+    def _roll_segment(self):
+        self._sync(force=True)
+        self._file.close()
+        self._segment_number += 1
+        self._file = open(self._segment_path(self._segment_number), 'ab')
+        self._segment_size = 0
+        logger.debug(f"Rolled message log to segment {self._segment_number}")
+    
+    def _sync(self, force: bool = False):
+        if self.fsync_policy == 'never' and not force:
+            return
+        now = time.monotonic()
+        if force or self.fsync_policy == 'always' or now - self._last_fsync >= self.fsync_interval:
+            os.fsync(self._file.fileno())
+            self._last_fsync = now
+            self._unsynced = False
+            return
+        self._unsynced = True
+        if self._timer is None:
+            self._timer = threading.Timer(self._last_fsync + self.fsync_interval - now, self._timed_sync)
+            self._timer.daemon = True
+            self._timer.start()
+    
+    def _timed_sync(self):
+        with self._lock:
+            self._timer = None
+            if self._unsynced and self._file and not self._file.closed:
+                self._sync(force=True)
+    
+    def append(self, record: Dict[str, Any]) -> None:
+        """Append a single record to the active segment."""
+        self.append_many([record])
+    
+    def append_many(self, records: Iterable[Dict[str, Any]]) -> None:
+        """Append several records with a single write and fsync."""
+        lines = [encode_json(record).encode('utf-8') + b'\n' for record in records]
+        if not lines:
+            return
+        with self._lock:
+            if self._segment_size and self._segment_size >= self.segment_max_bytes:
+                self._roll_segment()
+            data = b''.join(lines)
+            self._file.write(data)
+            self._file.flush()
+            self._segment_size += len(data)
+            self._sync()
+    
+    def iter_records(self) -> Iterator[Dict[str, Any]]:
+        """Stream every record in write order, one segment at a time."""
+        for number in self.segment_numbers():
+            try:
+                with open(self._segment_path(number), 'rb') as f:
+                    for line in f:
+                        if not line.strip():
+                            continue
+                        try:
+                            yield json.loads(line)
+                        except json.JSONDecodeError:
+                            logger.warning(f"Skipping corrupt record in segment {number}")
+            except FileNotFoundError:
+                continue
+    
+    def recent_conversation(self, channel: str, sender_id: str, limit: int, max_bytes: int) -> List[Dict[str, Any]]:
+        """Read back from the end of the log, at most ``max_bytes``, for a conversation's newest records.
+        
+        Lines are matched on the encoded sender ID before they are parsed, so
+        the scan costs little more than reading the bytes.
+        """
+        needle = encode_json({'sender_id': sender_id})[1:-1].encode('utf-8')
+        found: List[Dict[str, Any]] = []
+        budget = max_bytes
+        for number in reversed(self.segment_numbers()):
+            if budget <= 0 or len(found) >= limit:
+                break
+            try:
+                with open(self._segment_path(number), 'rb') as f:
+                    size = f.seek(0, os.SEEK_END)
+                    start = max(0, size - budget)
+                    f.seek(start)
+                    data = f.read(size - start)
+            except FileNotFoundError:
+                continue
+            budget -= len(data)
+            lines = data.split(b'\n')
+            if start:
+                # The first line was cut by the byte budget
+                lines = lines[1:]
+            for line in reversed(lines):
+                if needle not in line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if record.get('channel') == channel and record.get('sender_id') == sender_id:
+                    found.append(record)
+                    if len(found) >= limit:
+                        break
+        return found
+    
+    def flush(self) -> None:
+        """Force buffered records to stable storage."""
+        with self._lock:
+            if self._file and not self._file.closed:
+                self._file.flush()
+                self._sync(force=True)
+    
+    def rewrite(self, records: Iterable[Dict[str, Any]]) -> None:
+        """Replace every record with ``records``.
+        
+        The records go to a fresh segment, which is synced before the old
+        segments are removed oldest first, so a crash part way through leaves
+        a log that still replays to the same state.
+        """
+        data = b''.join(encode_json(record).encode('utf-8') + b'\n' for record in records)
+        with self._lock:
+            old = self.segment_numbers()
+            if self._file and not self._file.closed:
+                self._file.close()
+            self._segment_number = max(old + [self._segment_number]) + 1
+            self._file = open(self._segment_path(self._segment_number), 'ab')
+            self._file.write(data)
+            self._file.flush()
+            self._segment_size = len(data)
+            self._sync(force=True)
+            for number in old:
+                os.remove(self._segment_path(number))
+    
+    def clear(self) -> None:
+        """Delete every record; the log starts over with an empty first segment."""
+        with self._lock:
+            if self._file and not self._file.closed:
+                self._file.close()
+            for number in self.segment_numbers():
+                os.remove(self._segment_path(number))
+            self._unsynced = False
+            self._open_active_segment()
+    
+    def close(self) -> None:
+        """Flush and close the active segment."""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if self._file and not self._file.closed:
+                self._file.flush()
+                self._sync(force=True)
+                self._file.close()
\ No newline at end of file
@@ -1,6 +1,93 @@
 """Natural Language Processing for intent detection."""
 import re
-from typing import Dict, Any
+from typing import Dict, Any, FrozenSet, Iterable, List, Optional, Pattern, Set, Tuple
+
+EMAIL_PATTERN = re.compile(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b')
+PHONE_PATTERN = re.compile(r'\b\d{3}[-.]?\d{3}[-.]?\d{4}\b')
+# Word alternations that can be merged into the keyword matcher: \b(a|b c)\b
+KEYWORD = r"[a-z0-9]+(?: [a-z0-9]+)*"
+KEYWORD_ALTERNATION = re.compile(rf"^\\b(?:\(((?:{KEYWORD}\|)*{KEYWORD})\)|({KEYWORD}))\\b$")
+REGEX_METACHARACTERS = set('.^$*+?{}[]|()')
+
+def _as_literal(pattern: str) -> Optional[str]:
+    """Return the plain string a pattern matches, or None if it is not a literal."""
+    literal = []
+    escaped = False
+    for char in pattern:
+        if escaped:
+            if char.isalnum():
+                return None
+            literal.append(char)
+            escaped = False
+        elif char == '\\':
+            escaped = True
+        elif char in REGEX_METACHARACTERS:
+            return None
+        else:
+            literal.append(char)
+    return None if escaped else ''.join(literal)
+
+class IntentMatcher:
+    """Intent table compiled once for single-pass matching.
+    
+    Word alternations such as ``\\b(hello|hi)\\b`` are merged into one keyword
+    regex over all intents, so a message is scanned once for every keyword;
+    plain literals such as ``\\?`` become substring checks. Any other pattern
+    is precompiled and searched on its own. Results are the same as calling
+    ``re.search`` for every pattern.
+    """
+    
+    def __init__(self, intent_patterns: Dict[str, List[str]]):
+        self.intents = list(intent_patterns)
+        keywords: Dict[str, Set[int]] = {}
+        self.literals: List[Tuple[str, int]] = []
+        self.regexes: List[Tuple[Pattern, int]] = []
+        
+        for index, patterns in enumerate(intent_patterns.values()):
+            for pattern in patterns:
+                words = KEYWORD_ALTERNATION.match(pattern)
+                literal = _as_literal(pattern)
+                if words:
+                    for keyword in (words.group(1) or words.group(2)).split('|'):
+                        keywords.setdefault(keyword, set()).add(index)
+                elif literal is not None:
+                    self.literals.append((literal, index))
+                else:
+                    self.regexes.append((re.compile(pattern), index))
+        
+        # At each position the regex reports only the longest keyword, so a hit
+        # also credits every keyword it contains as a whole word.
+        self.keyword_intents: Dict[str, FrozenSet[int]] = {}
+        for keyword in keywords:
+            contained = set()
+            for other, indexes in keywords.items():
+                if re.search(rf"\b{re.escape(other)}\b", keyword):
+                    contained |= indexes
+            self.keyword_intents[keyword] = frozenset(contained)
+        
+        ordered = sorted(keywords, key=len, reverse=True)
+        self.keyword_pattern = (
+            re.compile(r"\b(?:" + '|'.join(map(re.escape, ordered)) + r")\b") if ordered else None
+        )
+    
+    def match(self, text: str) -> List[str]:
+        """Return matching intents in intent table order."""
+        found = set()
+        if self.keyword_pattern is not None:
+            search = self.keyword_pattern.search
+            keyword_intents = self.keyword_intents
+            match = search(text)
+            while match:
+                found |= keyword_intents[match.group()]
+                # Restart just after the match start so overlapping keywords are seen
+                match = search(text, match.start() + 1)
+        for literal, index in self.literals:
+            if index not in found and literal in text:
+                found.add(index)
+        for regex, index in self.regexes:
+            if index not in found and regex.search(text):
+                found.add(index)
+        return [self.intents[index] for index in sorted(found)]
 
 class IntentDetector:
     """Rule-based intent detection."""
@@ -14,37 +101,60 @@ class IntentDetector:
             'thanks': [r'\b(thank|thanks|appreciate)\b'],
             'goodbye': [r'\b(bye|goodbye|see you|farewell)\b']
         }
+        self._matcher: Optional[IntentMatcher] = None
+        self._matcher_key: Optional[Tuple] = None
     
-    def detect_intent(self, text: str) -> Dict[str, Any]:
-        """Detect intent from message text."""
-        text_lower = text.lower()
+    def _get_matcher(self) -> Optional[IntentMatcher]:
+        """Compile the intent table, recompiling only if it was changed."""
+        key = tuple((intent, tuple(patterns)) for intent, patterns in self.intent_patterns.items())
+        if key != self._matcher_key:
+            try:
+                self._matcher = IntentMatcher(self.intent_patterns)
+            except re.error:
+                # Patterns that cannot be combined (e.g. numbered backreferences)
+                # fall back to checking each pattern separately.
+                self._matcher = None
+            self._matcher_key = key
+        return self._matcher
+    
+    def _match_each_pattern(self, text_lower: str) -> List[str]:
         detected_intents = []
-        
         for intent, patterns in self.intent_patterns.items():
             for pattern in patterns:
                 if re.search(pattern, text_lower):
                     detected_intents.append(intent)
                     break
-        
+        return detected_intents
+    
+    @staticmethod
+    def _build_result(detected_intents: List[str]) -> Dict[str, Any]:
         return {
             'primary_intent': detected_intents[0] if detected_intents else 'unknown',
             'all_intents': detected_intents,
             'confidence': 0.8 if detected_intents else 0.1
         }
     
+    def detect_intent(self, text: str) -> Dict[str, Any]:
+        """Detect intent from message text."""
+        return self.detect_intents([text])[0]
+    
+    def detect_intents(self, texts: Iterable[str]) -> List[Dict[str, Any]]:
+        """Detect intents for a batch of texts, compiling the table at most once."""
+        matcher = self._get_matcher()
+        match = matcher.match if matcher is not None else self._match_each_pattern
+        return [self._build_result(match(text.lower())) for text in texts]
+    
     def extract_entities(self, text: str) -> Dict[str, Any]:
         """Extract basic entities from text."""
         entities = {}
         
         # Extract emails
-        email_pattern = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
-        emails = re.findall(email_pattern, text)
+        emails = EMAIL_PATTERN.findall(text)
         if emails:
             entities['emails'] = emails
         
         # Extract phone numbers (basic pattern)
-        phone_pattern = r'\b\d{3}[-.]?\d{3}[-.]?\d{4}\b'
-        phones = re.findall(phone_pattern, text)
+        phones = PHONE_PATTERN.findall(text)
         if phones:
             entities['phones'] = phones
         
@@ -0,0 +1,342 @@
+"""Outbound send scheduling that respects provider rate limits."""
+import asyncio
+import logging
+import time
+from collections import OrderedDict, deque
+from typing import Any, Dict, Optional, Set, Tuple
+from .outbox import Outbox
+from ..utils.metrics import metrics
+from ..utils.retry import CircuitBreaker, RetryAfterError, RetryBudget, RetryPolicy, RetryScheduler
+
+logger = logging.getLogger(__name__)
+
+class TokenBucket:
+    """Token bucket refilled at ``rate`` tokens per second up to ``capacity``."""
+    
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+    
+    def _refill(self, now: float):
+        if now > self.updated:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+    
+    def delay(self, now: float) -> float:
+        """Seconds until a token is available (0 if one is available now)."""
+        self._refill(now)
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+    
+    def take(self, now: float) -> None:
+        """Consume one token; call only after ``delay`` returned 0."""
+        self._refill(now)
+        self.tokens -= 1
+    
+    def is_full(self, now: float) -> bool:
+        """True if the bucket is back at capacity (its state can be dropped)."""
+        self._refill(now)
+        return self.tokens >= self.capacity
+
+class ChannelSendQueue:
+    """Paces one channel's sends with a channel-wide and a per-recipient bucket.
+    
+    Recipients are served round-robin, a recipient never has two sends in
+    flight (so replies keep their order), and a ``RetryAfterError`` pauses the
+    whole channel for the time the provider asked for. Replies that came from
+    the outbox are acknowledged there once the connector returns.
+    
+    A failed send is retried from a timer with jittered backoff while its
+    recipient's later replies wait, so order holds and nothing sleeps. A
+    circuit breaker stops sending while the provider keeps failing and lets a
+    single probe through after ``reset_timeout``. Only a reply that failed
+    the policy's ``max_attempts`` times is dead-lettered: logged, counted and
+    acknowledged in the outbox. An exhausted budget defers retries and an
+    open breaker holds them, so an outage delays replies but keeps them.
+    """
+    
+    def __init__(self, channel: str, connector: Any, limits: Dict[str, Tuple[float, float]],
+                 max_in_flight: int = 8, outbox: Optional[Outbox] = None,
+                 retry_policy: Optional[RetryPolicy] = None, retry_budget_ratio: float = 0.1,
+                 failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.channel = channel
+        self.connector = connector
+        self.outbox = outbox
+        self.retries = RetryScheduler(retry_policy, RetryBudget(retry_budget_ratio), name=channel)
+        self.breaker = CircuitBreaker(channel, failure_threshold, reset_timeout)
+        self.global_bucket = TokenBucket(*limits['global']) if 'global' in limits else None
+        self.recipient_limit = limits.get('per_recipient')
+        self.recipient_buckets: Dict[str, TokenBucket] = {}
+        self.max_in_flight = max_in_flight
+        # Per recipient, a deque of (text, outbox entry ID, failed attempts so far)
+        self.pending: 'OrderedDict[str, deque]' = OrderedDict()
+        self.in_flight: Set[str] = set()
+        self.sends: Set[asyncio.Task] = set()
+        self.retrying: Set[str] = set()
+        self.paused_until = 0.0
+        self.wakeup = asyncio.Event()
+        self.task: Optional[asyncio.Task] = None
+        self.queued = 0
+        self.sent = 0
+        self.failed = 0
+        self.retry_after_hints = 0
+        self.send_seconds = metrics.histogram('agent_send_seconds', 'Provider send latency', channel=channel)
+        self.sent_total = metrics.counter('agent_messages_sent_total', 'Replies delivered to each channel',
+                                          channel=channel)
+        self.errors_total = metrics.counter('agent_send_errors_total', 'Replies that failed to send',
+                                            channel=channel)
+        self.dead_letters_total = metrics.counter('agent_replies_dead_lettered_total',
+                                                  'Replies dropped after their retries ran out', channel=channel)
+    
+    def submit(self, recipient: str, text: str, entry_id: Optional[str] = None) -> None:
+        """Queue a reply and wake the dispatcher; ``entry_id`` is its outbox entry."""
+        self.pending.setdefault(recipient, deque()).append((text, entry_id, 0))
+        self.queued += 1
+        self.wakeup.set()
+    
+    def _recipient_bucket(self, recipient: str) -> Optional[TokenBucket]:
+        if self.recipient_limit is None:
+            return None
+        bucket = self.recipient_buckets.get(recipient)
+        if bucket is None:
+            bucket = self.recipient_buckets[recipient] = TokenBucket(*self.recipient_limit)
+        return bucket
+    
+    def _prune_buckets(self, now: float):
+        # A full bucket behaves exactly like a new one, so dropping it is lossless
+        for recipient in [r for r, bucket in self.recipient_buckets.items()
+                          if r not in self.pending and r not in self.in_flight and r not in self.retrying
+                          and bucket.is_full(now)]:
+            del self.recipient_buckets[recipient]
+    
+    def _dispatch_ready(self) -> Optional[float]:
+        """Start every send allowed right now; return seconds until the next one."""
+        now = time.monotonic()
+        if now < self.paused_until:
+            return self.paused_until - now
+        
+        next_delay = None
+        for recipient in list(self.pending):
+            if len(self.in_flight) >= self.max_in_flight:
+                return None
+            if recipient in self.in_flight or recipient in self.retrying:
+                continue
+            
+            bucket = self._recipient_bucket(recipient)
+            wait = bucket.delay(now) if bucket else 0.0
+            if wait > 0:
+                next_delay = wait if next_delay is None else min(next_delay, wait)
+                continue
+            
+            if self.global_bucket:
+                global_wait = self.global_bucket.delay(now)
+                if global_wait > 0:
+                    return global_wait if next_delay is None else min(next_delay, global_wait)
+            if not self.breaker.allow():
+                # Open: wait for the probe window; half-open: wait for the probe's result
+                return self.breaker.retry_in() or None
+            if self.global_bucket:
+                self.global_bucket.take(now)
+            if bucket:
+                bucket.take(now)
+            
+            texts = self.pending[recipient]
+            text, entry_id, attempts = texts.popleft()
+            if texts:
+                self.pending.move_to_end(recipient)
+            else:
+                del self.pending[recipient]
+            self.queued -= 1
+            self.in_flight.add(recipient)
+            task = asyncio.create_task(self._send(recipient, text, entry_id, attempts))
+            self.sends.add(task)
+            task.add_done_callback(self.sends.discard)
+        
+        if len(self.recipient_buckets) > 1000 + len(self.pending):
+            self._prune_buckets(now)
+        return next_delay
+    
+    def _requeue(self, recipient: str, text: str, entry_id: Optional[str], attempts: int):
+        """Put a reply back at the head of its recipient's queue."""
+        self.retrying.discard(recipient)
+        self.pending.setdefault(recipient, deque()).appendleft((text, entry_id, attempts))
+        self.pending.move_to_end(recipient, last=False)
+        self.queued += 1
+        self.wakeup.set()
+    
+    async def _send(self, recipient: str, text: str, entry_id: Optional[str], attempts: int = 0):
+        started = time.perf_counter()
+        try:
+            await self.connector.send_message(recipient, text)
+            self.send_seconds.observe(time.perf_counter() - started)
+            self.sent += 1
+            self.sent_total.inc()
+            self.breaker.record_success()
+            self.retries.record_success()
+            if entry_id is not None:
+                self.outbox.ack(entry_id)
+        except RetryAfterError as e:
+            # The provider answered, it is only throttling us
+            self.retry_after_hints += 1
+            self.paused_until = max(self.paused_until, time.monotonic() + e.retry_after)
+            self.breaker.record_success()
+            self._requeue(recipient, text, entry_id, attempts)
+            logger.warning(f"{self.channel} asked us to retry after {e.retry_after}s; pausing sends")
+        except Exception as e:
+            self.breaker.record_failure()
+            if self.retries.schedule(attempts + 1, self._requeue, recipient, text, entry_id, attempts + 1):
+                self.retrying.add(recipient)
+                logger.warning(f"Error sending {self.channel} message to {recipient}: {e}; will retry")
+            else:
+                # Dead-lettered: acknowledged so the outbox does not keep or replay it
+                self.failed += 1
+                self.errors_total.inc()
+                self.dead_letters_total.inc()
+                if entry_id is not None:
+                    self.outbox.ack(entry_id)
+                logger.error(f"Error sending {self.channel} message to {recipient}, giving up: {e}")
+        finally:
+            self.in_flight.discard(recipient)
+            self.wakeup.set()
+    
+    async def run(self):
+        """Dispatch queued sends as their rate limits allow, until cancelled."""
+        while True:
+            self.wakeup.clear()
+            delay = self._dispatch_ready()
+            if self.outbox:
+                # Acks of every send finished since the last pass go out in one write
+                try:
+                    await self.outbox.flush_async()
+                except Exception as e:
+                    # Unwritten acks only mean those replies are sent again after a crash
+                    logger.error(f"Error writing {self.channel} outbox acks: {e}")
+            if delay is None:
+                await self.wakeup.wait()
+            else:
+                try:
+                    await asyncio.wait_for(self.wakeup.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+    
+    def is_idle(self) -> bool:
+        """True when nothing is queued or being sent."""
+        return not self.pending and not self.in_flight and not self.retrying and not self.sends
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Return queue and send counters for the channel."""
+        return {
+            'queued': self.queued,
+            'in_flight': len(self.in_flight),
+            'sent': self.sent,
+            'failed': self.failed,
+            'retry_after_hints': self.retry_after_hints,
+            'retrying': len(self.retrying),
+            'retries': self.retries.get_stats(),
+            'circuit': self.breaker.state,
+            'paused_for': max(0.0, self.paused_until - time.monotonic())
+        }
+
+class OutboundScheduler:
+    """Queues replies per channel and sends them at the provider's pace.
+    
+    Limits come from each connector's ``rate_limits`` attribute, a dict with
+    optional ``'global'`` and ``'per_recipient'`` entries of
+    ``(messages_per_second, burst)``. Until ``start`` is called replies are
+    sent inline, which keeps direct ``route_message`` calls synchronous.
+    
+    With an ``outbox`` every queued reply is recorded durably before it is
+    sent, and ``replay`` queues the replies a previous run left unacknowledged.
+    """
+    
+    def __init__(self, connectors: Dict[str, Any], max_in_flight: int = 8, outbox: Optional[Outbox] = None,
+                 retry_policy: Optional[RetryPolicy] = None, retry_budget_ratio: float = 0.1,
+                 failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.connectors = connectors
+        self.max_in_flight = max_in_flight
+        self.outbox = outbox
+        self.retry_policy = retry_policy
+        self.retry_budget_ratio = retry_budget_ratio
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.channels: Dict[str, ChannelSendQueue] = {}
+        self.running = False
+    
+    def _channel(self, channel: str) -> ChannelSendQueue:
+        queue = self.channels.get(channel)
+        if queue is None:
+            connector = self.connectors[channel]
+            limits = getattr(connector, 'rate_limits', None) or {}
+            queue = self.channels[channel] = ChannelSendQueue(
+                channel, connector, limits, self.max_in_flight, self.outbox,
+                retry_policy=self.retry_policy,
+                retry_budget_ratio=self.retry_budget_ratio,
+                failure_threshold=self.failure_threshold,
+                reset_timeout=self.reset_timeout
+            )
+            queue.task = asyncio.create_task(queue.run())
+        return queue
+    
+    def start(self):
+        """Start queueing and pacing sends."""
+        self.running = True
+    
+    def replay(self, channel: Optional[str] = None) -> int:
+        """Queue replies a previous run left unacknowledged; returns how many were queued.
+        
+        With ``channel`` only that channel's replies are queued. Replies added
+        since the outbox was opened are already queued and are not replayed
+        again.
+        """
+        if not self.outbox or not self.running:
+            return 0
+        replayed = 0
+        for entry in self.outbox.take_recovered(channel):
+            if entry['channel'] not in self.connectors:
+                continue
+            self._channel(entry['channel']).submit(entry['recipient'], entry['text'], entry['id'])
+            replayed += 1
+        if replayed:
+            logger.info(f"Replaying {replayed} unacknowledged replies from the outbox")
+        return replayed
+    
+    async def submit(self, channel: str, recipient: str, text: str) -> None:
+        """Schedule a reply to ``recipient`` on ``channel``."""
+        if not self.running:
+            await self.connectors[channel].send_message(recipient, text)
+            return
+        entry_id = await self.outbox.add_async(channel, recipient, text) if self.outbox else None
+        self._channel(channel).submit(recipient, text, entry_id)
+    
+    async def drain(self, timeout: float) -> bool:
+        """Wait up to ``timeout`` seconds for queued replies to be sent; True if all were."""
+        deadline = time.monotonic() + timeout
+        while not all(queue.is_idle() for queue in self.channels.values()):
+            if time.monotonic() >= deadline:
+                return False
+            await asyncio.sleep(0.01)
+        return True
+    
+    def stop(self):
+        """Stop all dispatchers; unsent replies stay in the outbox, otherwise they are discarded."""
+        self.running = False
+        for queue in self.channels.values():
+            if queue.task:
+                queue.task.cancel()
+            # Their outbox entries stay unacknowledged and are replayed
+            for task in queue.sends:
+                task.cancel()
+            queue.retries.cancel_all()
+        self.channels = {}
+        if self.outbox:
+            self.outbox.close()
+    
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Return per-channel send stats, plus the outbox's under ``outbox``."""
+        stats = {channel: queue.get_stats() for channel, queue in self.channels.items()}
+        if self.outbox:
+            stats['outbox'] = self.outbox.get_stats()
+        return stats
\ No newline at end of file
@@ -0,0 +1,156 @@
+"""Durable outbox of replies awaiting provider confirmation."""
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+from .message_log import SegmentedLog
+from ..utils.security import SecurityUtils
+
+logger = logging.getLogger(__name__)
+
+class Outbox:
+    """Append-only record of replies, replayed until each one is acknowledged.
+    
+    A reply is appended as an ``add`` record before it is sent and an ``ack``
+    record is written once the provider accepted it; acks are buffered and
+    written in one batch per ``flush``. On open the log is replayed and every
+    reply without an ack is pending again. Every ``compact_every`` acks the log
+    is rewritten to hold only the pending replies, so it never grows past the
+    replies of the recent past. The async methods write through one worker
+    thread, so writes reach the log in the order they were made.
+    """
+    
+    def __init__(self, directory: str, segment_max_bytes: int = 16 * 1024 * 1024,
+                 fsync_policy: str = 'interval', fsync_interval: float = 1.0, compact_every: int = 10000):
+        self.directory = directory
+        self.compact_every = compact_every
+        self.pending: 'OrderedDict[str, Dict[str, Any]]' = OrderedDict()
+        self._acks: List[str] = []
+        self._acked_since_compaction = 0
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='outbox')
+        self.log = SegmentedLog(directory, segment_max_bytes=segment_max_bytes,
+                                fsync_policy=fsync_policy, fsync_interval=fsync_interval)
+        
+        # Metrics
+        self.added = 0
+        self.acked = 0
+        self.recovered = 0
+        
+        self._load()
+        self.compact()
+    
+    def _load(self):
+        for record in self.log.iter_records():
+            if record.get('op') == 'add':
+                self.pending[record['id']] = record
+            elif record.get('op') == 'ack':
+                self.pending.pop(record['id'], None)
+        self.recovered = len(self.pending)
+        self._recovered_ids = list(self.pending)
+        if self.pending:
+            logger.info(f"Outbox has {len(self.pending)} unacknowledged replies from a previous run")
+    
+    def _entry(self, channel: str, recipient: str, text: str) -> Dict[str, Any]:
+        entry = {
+            'op': 'add',
+            'id': SecurityUtils.generate_message_id(),
+            'channel': channel,
+            'recipient': recipient,
+            'text': text,
+            'created_at': time.time()
+        }
+        # Pending before it is written, so a compaction in between keeps it
+        self.pending[entry['id']] = entry
+        self.added += 1
+        return entry
+    
+    def add(self, channel: str, recipient: str, text: str) -> str:
+        """Durably record a reply; returns its entry ID."""
+        entry = self._entry(channel, recipient, text)
+        self.log.append(entry)
+        return entry['id']
+    
+    async def add_async(self, channel: str, recipient: str, text: str) -> str:
+        """Like ``add``, with the write and fsync done in a worker thread."""
+        entry = self._entry(channel, recipient, text)
+        try:
+            await asyncio.get_running_loop().run_in_executor(self._executor, self.log.append, entry)
+        except Exception:
+            self.pending.pop(entry['id'], None)
+            raise
+        return entry['id']
+    
+    def ack(self, entry_id: str) -> None:
+        """Mark a reply as delivered; written on the next ``flush``."""
+        if self.pending.pop(entry_id, None) is not None:
+            self._acks.append(entry_id)
+            self.acked += 1
+    
+    def _take_acks(self) -> Tuple[List[Dict[str, Any]], Optional[List[Dict[str, Any]]]]:
+        # Taken on the loop, so the pending snapshot is consistent with the acks
+        acks = [{'op': 'ack', 'id': entry_id} for entry_id in self._acks]
+        self._acked_since_compaction += len(self._acks)
+        self._acks = []
+        if self._acked_since_compaction < self.compact_every:
+            return acks, None
+        self._acked_since_compaction = 0
+        return acks, list(self.pending.values())
+    
+    def _write_acks(self, acks: List[Dict[str, Any]], pending: Optional[List[Dict[str, Any]]]) -> None:
+        self.log.append_many(acks)
+        if pending is not None:
+            self.log.rewrite(pending)
+    
+    def flush(self) -> None:
+        """Write buffered acks in one append, compacting every ``compact_every`` acks."""
+        if self._acks:
+            self._write_acks(*self._take_acks())
+    
+    async def flush_async(self) -> None:
+        """Like ``flush``, with the writes done in the outbox's worker thread."""
+        if self._acks:
+            await asyncio.get_running_loop().run_in_executor(self._executor, self._write_acks, *self._take_acks())
+    
+    def compact(self) -> None:
+        """Rewrite the log with only the pending replies, dropping acknowledged history."""
+        self.log.rewrite(list(self.pending.values()))
+        self._acked_since_compaction = 0
+    
+    def unacknowledged(self) -> List[Dict[str, Any]]:
+        """Pending replies, oldest first."""
+        return list(self.pending.values())
+    
+    def take_recovered(self, channel: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Replies left pending by a previous run and still unacknowledged, for one channel or all.
+        
+        Each reply is returned once.
+        """
+        entries, remaining = [], []
+        for entry_id in self._recovered_ids:
+            entry = self.pending.get(entry_id)
+            if entry is None:
+                continue
+            if channel is None or entry['channel'] == channel:
+                entries.append(entry)
+            else:
+                remaining.append(entry_id)
+        self._recovered_ids = remaining
+        return entries
+    
+    def close(self) -> None:
+        """Wait for queued writes, write buffered acks and close the log."""
+        self._executor.shutdown(wait=True)
+        self.flush()
+        self.compact()
+        self.log.close()
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Return pending, added, acknowledged and recovered counts."""
+        return {
+            'pending': len(self.pending),
+            'added': self.added,
+            'acked': self.acked,
+            'recovered': self.recovered
+        }
\ No newline at end of file
@@ -1,9 +1,11 @@
 """Message persistence and data models."""
 from datetime import datetime
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Iterator, Optional
 from pydantic import BaseModel
-import json
-import os
+from ..config import config
+from .storage import StorageBackend, migrate_json_file, parse_timestamp, to_timestamp
+from .message_log import SegmentedLog
+from .sqlite_store import SQLiteStorageBackend
 
 class Message(BaseModel):
     id: str
@@ -14,35 +16,123 @@ class Message(BaseModel):
     attachments: List[str] = []
     received_at: datetime
     metadata: Dict[str, Any] = {}
+    
+    @classmethod
+    def trusted(cls, id: str, channel: str, sender_id: str, sender_name: str, text: str,
+                received_at: datetime, attachments: Optional[List[str]] = None,
+                metadata: Optional[Dict[str, Any]] = None) -> 'Message':
+        """Build a message from values that already have the right types, skipping validation.
+        
+        For connectors and stored records only.
+        """
+        return cls.model_construct(
+            _fields_set=set(MESSAGE_FIELDS),
+            id=id,
+            channel=channel,
+            sender_id=sender_id,
+            sender_name=sender_name,
+            text=text,
+            attachments=attachments if attachments is not None else [],
+            received_at=received_at,
+            metadata=metadata if metadata is not None else {}
+        )
+    
+    @classmethod
+    def from_record(cls, record: Dict[str, Any]) -> 'Message':
+        """Rebuild a message from a stored record without re-validating it; the record's containers are reused."""
+        return cls.trusted(
+            record['id'], record['channel'], record['sender_id'], record['sender_name'], record['text'],
+            parse_timestamp(record['received_at']), record.get('attachments'), record.get('metadata')
+        )
+    
+    def to_record(self) -> Dict[str, Any]:
+        """Return the storage record; equal to ``model_dump(mode='json')`` for JSON-typed metadata."""
+        return {
+            'id': self.id,
+            'channel': self.channel,
+            'sender_id': self.sender_id,
+            'sender_name': self.sender_name,
+            'text': self.text,
+            'attachments': list(self.attachments),
+            'received_at': to_timestamp(self.received_at),
+            'metadata': dict(self.metadata)
+        }
+
+MESSAGE_FIELDS = frozenset(Message.model_fields)
+
+def create_backend(kind: Optional[str] = None) -> StorageBackend:
+    """Create the storage backend selected by configuration."""
+    kind = kind or config.message_store_backend
+    if kind == 'log':
+        return SegmentedLog(
+            config.message_store_dir,
+            segment_max_bytes=config.message_segment_max_bytes,
+            fsync_policy=config.message_fsync_policy,
+            fsync_interval=config.message_fsync_interval
+        )
+    if kind == 'sqlite':
+        return SQLiteStorageBackend(config.message_store_sqlite_path, fsync_policy=config.message_fsync_policy)
+    raise ValueError(f"Unknown message store backend: {kind}")
 
 class MessageStore:
-    """Simple file-based message storage."""
+    """Message storage on top of a pluggable backend."""
     
-    def __init__(self, storage_path: str = "messages.json"):
-        self.storage_path = storage_path
-        self._ensure_storage_exists()
+    def __init__(self, backend: Optional[StorageBackend] = None, legacy_path: Optional[str] = None):
+        self.backend = backend or create_backend()
+        migrate_json_file(legacy_path or config.message_store_legacy_path, self.backend)
     
-    def _ensure_storage_exists(self):
-        if not os.path.exists(self.storage_path):
-            with open(self.storage_path, 'w') as f:
-                json.dump([], f)
+    @property
+    def indexed(self) -> bool:
+        """Whether per-conversation lookups avoid scanning the whole history."""
+        return self.backend.indexed
     
     def save_message(self, message: Message) -> None:
         """Save a message to storage."""
-        messages = self.load_messages()
-        messages.append(message.model_dump(mode='json'))
-        with open(self.storage_path, 'w') as f:
-            json.dump(messages, f, indent=2, default=str)
+        self.backend.append(message.to_record())
+    
+    def save_messages(self, messages: List[Message]) -> None:
+        """Save several messages with a single backend write."""
+        self.backend.append_many([message.to_record() for message in messages])
+    
+    def iter_messages(self) -> Iterator[Dict]:
+        """Stream all stored messages in the order they were saved."""
+        return self.backend.iter_records()
     
     def load_messages(self) -> List[Dict]:
         """Load all messages from storage."""
-        try:
-            with open(self.storage_path, 'r') as f:
-                return json.load(f)
-        except (FileNotFoundError, json.JSONDecodeError):
-            return []
+        return list(self.iter_messages())
     
-    def get_messages_by_channel(self, channel: str) -> List[Dict]:
+    def get_messages_by_channel(self, channel: str, limit: Optional[int] = None, offset: int = 0) -> List[Dict]:
         """Get messages filtered by channel."""
-        messages = self.load_messages()
-        return [msg for msg in messages if msg.get('channel') == channel]
\ No newline at end of file
+        return self.backend.query(channel=channel, limit=limit, offset=offset)
+    
+    def get_messages_by_sender(self, sender_id: str, channel: Optional[str] = None,
+                               limit: Optional[int] = None, offset: int = 0) -> List[Dict]:
+        """Get messages sent by a sender, optionally restricted to one channel."""
+        return self.backend.query(channel=channel, sender_id=sender_id, limit=limit, offset=offset)
+    
+    def get_messages_in_range(self, since: Optional[datetime] = None, until: Optional[datetime] = None,
+                              channel: Optional[str] = None, limit: Optional[int] = None,
+                              offset: int = 0) -> List[Dict]:
+        """Get messages received in ``[since, until)``."""
+        return self.backend.query(channel=channel, since=since, until=until, limit=limit, offset=offset)
+    
+    def get_conversation(self, channel: str, sender_id: str, limit: int = 20) -> List[Dict]:
+        """Get the newest messages of one conversation, newest first."""
+        return self.backend.query(channel=channel, sender_id=sender_id, limit=limit, newest_first=True)
+    
+    def get_recent_conversation(self, channel: str, sender_id: str, limit: int, max_bytes: int) -> List[Dict]:
+        """Get a conversation's newest messages among about the last ``max_bytes`` stored, newest first."""
+        return self.backend.recent_conversation(channel, sender_id, limit, max_bytes)
+    
+    def get_latest_per_conversation(self, n: int, channel: Optional[str] = None) -> List[Dict]:
+        """Get the newest ``n`` messages of every conversation."""
+        return self.backend.latest_per_conversation(n, channel=channel)
+    
+    def find_messages_by_metadata(self, key: str, value: Any, limit: Optional[int] = None) -> List[Dict]:
+        """Get messages whose metadata field ``key`` equals ``value``."""
+        return self.backend.find_by_metadata(key, value, limit=limit)
+    
+    def close(self) -> None:
+        """Flush pending writes and release the backend."""
+        self.backend.close()
\ No newline at end of file
@@ -1,9 +1,21 @@
 """Message routing and coordination."""
 import asyncio
 import logging
-from typing import Dict, Any, Callable
+import os
+from collections import deque
+from time import monotonic, perf_counter
+from typing import Deque, Dict, Any, Callable, List, Optional, Tuple
+from .dedup import DedupIndex
 from .persistence import Message
 from .handlers import MessageHandler
+from .ingress import IngressQueue
+from .outbound import OutboundScheduler
+from .outbox import Outbox
+from .sharding import ShardPool, WorkerLostError
+from ..config import config
+from ..utils.executors import LoopLagMonitor, executors
+from ..utils.metrics import metrics
+from ..utils.retry import RetryPolicy
 
 logger = logging.getLogger(__name__)
 
@@ -11,49 +23,231 @@ class MessageRouter:
     """Routes messages between connectors and handlers."""
     
     def __init__(self):
-        self.handler = MessageHandler()
+        if config.worker_processes > 0:
+            self.handler = ShardPool(
+                config.worker_processes,
+                heartbeat_interval=config.worker_heartbeat_interval,
+                heartbeat_timeout=config.worker_heartbeat_timeout
+            )
+        else:
+            self.handler = MessageHandler()
         self.connectors: Dict[str, Any] = {}
         self.running = False
+        self.ingress = IngressQueue(
+            maxsize=config.ingress_queue_size,
+            default_policy=config.ingress_backpressure,
+            channel_policies=config.ingress_channel_backpressure,
+            on_drop=self._release_delivery
+        )
+        # With worker processes each router worker just awaits a reply, so give every shard its own share
+        self.worker_count = config.router_workers * max(1, config.worker_processes)
+        self.workers: List[asyncio.Task] = []
+        self.replays: List[asyncio.Task] = []
+        # Messages waiting for the worker that is handling an earlier one from the same sender
+        self.conversations: Dict[Tuple[str, str], Deque[Message]] = {}
+        self.busy_workers = 0
+        self.lag_monitor = LoopLagMonitor(threshold=config.loop_lag_threshold_ms / 1000)
+        self.route_seconds = metrics.histogram('agent_stage_seconds', 'Time spent in each pipeline stage', stage='route')
+        self.outbox = Outbox(
+            config.outbox_dir or os.path.join(config.message_store_dir, 'outbox'),
+            fsync_policy=config.message_fsync_policy,
+            fsync_interval=config.message_fsync_interval
+        )
+        self.outbound = OutboundScheduler(
+            self.connectors,
+            max_in_flight=config.outbound_max_in_flight,
+            outbox=self.outbox,
+            retry_policy=RetryPolicy(config.send_retry_max_attempts, config.send_retry_base_delay,
+                                     config.send_retry_max_delay),
+            retry_budget_ratio=config.send_retry_budget_ratio,
+            failure_threshold=config.circuit_failure_threshold,
+            reset_timeout=config.circuit_reset_timeout
+        )
+        self.dedup = DedupIndex(
+            config.dedup_path or os.path.join(config.message_store_dir, 'dedup.db'),
+            max_entries=config.dedup_cache_size,
+            retention=config.dedup_retention
+        )
     
     def register_connector(self, channel: str, connector: Any):
         """Register a connector for a specific channel."""
         self.connectors[channel] = connector
         logger.info(f"Registered connector for {channel}")
     
-    async def route_message(self, message: Message) -> None:
-        """Route incoming message to appropriate handler."""
+    async def enqueue(self, message: Message) -> bool:
+        """Queue an incoming message for the worker pool.
+        
+        Connectors call this instead of awaiting the whole pipeline. Returns
+        False if the channel's backpressure policy rejected the message.
+        Redeliveries of a message with a known ``provider_id`` are dropped
+        here and count as accepted. The ID is recorded only once the message
+        has been handled, so a message that was rejected, dropped or lost in
+        a crash is processed again when the provider redelivers it.
+        """
+        provider_id = message.metadata.get('provider_id')
+        if provider_id is not None and self.dedup.seen(message.channel, str(provider_id)):
+            logger.info(f"Dropping duplicate {message.channel} message {provider_id}")
+            return True
+        accepted = await self.ingress.put(message)
+        if not accepted:
+            self._release_delivery(message)
+        return accepted
+    
+    def _release_delivery(self, message: Message) -> None:
+        provider_id = message.metadata.get('provider_id')
+        if provider_id is not None:
+            self.dedup.release(message.channel, str(provider_id))
+    
+    def _record_delivery(self, message: Message) -> None:
+        provider_id = message.metadata.get('provider_id')
+        if provider_id is not None:
+            self.dedup.record(message.channel, str(provider_id))
+    
+    async def _worker(self, index: int):
+        """Process queued messages until cancelled.
+        
+        A message from a sender whose earlier message is still being handled
+        is passed to that worker, which takes it next, so each sender's
+        messages are handled one at a time and in arrival order.
+        """
+        while True:
+            message = await self.ingress.get()
+            key = (message.channel, message.sender_id)
+            waiting = self.conversations.get(key)
+            if waiting is not None:
+                waiting.append(message)
+                continue
+            waiting = self.conversations[key] = deque()
+            self.busy_workers += 1
+            try:
+                while True:
+                    if await self.route_message(message):
+                        self._record_delivery(message)
+                    else:
+                        self._release_delivery(message)
+                    if not waiting:
+                        break
+                    message = waiting.popleft()
+            finally:
+                del self.conversations[key]
+                # Only left over when cancelled; redelivery must not be taken for a duplicate
+                for message in waiting:
+                    self._release_delivery(message)
+                self.busy_workers -= 1
+    
+    async def route_message(self, message: Message) -> bool:
+        """Route incoming message to appropriate handler.
+        
+        Returns False if the message was lost with its worker process before
+        it was handled, so its redelivery is not dropped as a duplicate.
+        """
+        started = perf_counter()
+        handled = True
         try:
             # Process message and get response
             response = await self.handler.process_message(message)
             
             if response and message.channel in self.connectors:
-                # Send response back through the same channel
+                # Send response back through the same channel, paced to its limits
                 connector = self.connectors[message.channel]
                 if hasattr(connector, 'send_message'):
-                    await connector.send_message(message.sender_id, response)
-                    logger.info(f"Sent response via {message.channel}")
+                    await self.outbound.submit(message.channel, message.sender_id, response)
+                    logger.info(f"Scheduled response via {message.channel}")
         
+        except WorkerLostError as e:
+            handled = False
+            logger.error(f"Message {message.id} lost before it was handled: {e}")
         except Exception as e:
             logger.error(f"Error routing message: {e}")
+        
+        self.route_seconds.observe(perf_counter() - started)
+        return handled
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Return ingress, dedup, worker pool, outbound, context cache (or shard), executor and loop lag metrics."""
+        stats = {
+            'ingress': self.ingress.get_stats(),
+            'dedup': self.dedup.get_stats(),
+            'workers': len(self.workers),
+            'busy_workers': self.busy_workers,
+            'outbound': self.outbound.get_stats(),
+            'executors': executors.get_stats(),
+            'loop_lag': self.lag_monitor.get_stats()
+        }
+        if isinstance(self.handler, ShardPool):
+            stats['shards'] = self.handler.get_stats()
+        else:
+            stats['context'] = self.handler.context.get_stats()
+        return stats
     
     async def start(self):
         """Start the message router."""
         self.running = True
-        logger.info("Message router started")
+        await self.handler.start()
+        self.lag_monitor.start()
+        self.dedup.start()
+        self.outbound.start()
+        self.workers = [asyncio.create_task(self._worker(i)) for i in range(self.worker_count)]
+        logger.info(f"Message router started with {self.worker_count} workers")
         
         # Start all registered connectors
-        tasks = []
+        tasks = {}
         for channel, connector in self.connectors.items():
             if hasattr(connector, 'start'):
-                task = asyncio.create_task(connector.start())
-                tasks.append(task)
+                tasks[channel] = asyncio.create_task(connector.start())
                 logger.info(f"Started {channel} connector")
+            self.replays.append(asyncio.create_task(self._replay_when_ready(channel, connector, tasks.get(channel))))
+        
+        # Wait for all connectors; one failing leaves the others running
+        results = await asyncio.gather(*tasks.values(), return_exceptions=True)
+        for channel, result in zip(tasks, results):
+            if isinstance(result, Exception):
+                logger.error(f"{channel} connector failed: {result}")
+    
+    async def _replay_when_ready(self, channel: str, connector: Any, task: Optional[asyncio.Task]):
+        """Resend a previous run's replies on ``channel`` once its connector can send.
         
-        # Wait for all connectors
-        if tasks:
-            await asyncio.gather(*tasks, return_exceptions=True)
+        Connectors signal this by setting their ``ready`` event; those without
+        one are taken to be ready as soon as they are started.
+        """
+        ready = getattr(connector, 'ready', None)
+        if ready is not None and task is not None:
+            waiter = asyncio.create_task(ready.wait())
+            try:
+                await asyncio.wait({waiter, task}, return_when=asyncio.FIRST_COMPLETED)
+            finally:
+                waiter.cancel()
+            if not ready.is_set():
+                logger.warning(f"{channel} connector exited before it was ready; its replies stay in the outbox")
+                return
+        self.outbound.replay(channel)
+    
+    async def drain(self, timeout: float) -> bool:
+        """Finish queued messages and send their replies within ``timeout`` seconds.
+        
+        Returns False if the deadline passed first; replies not yet sent stay
+        in the outbox for the next start.
+        """
+        deadline = monotonic() + timeout
+        while self.ingress.qsize() or self.busy_workers:
+            if monotonic() >= deadline:
+                return False
+            await asyncio.sleep(0.01)
+        return await self.outbound.drain(max(0.0, deadline - monotonic()))
+    
+    async def stop_handler(self):
+        """Stop the handler once drained, waiting for the messages it still has to write."""
+        await self.handler.stop()
     
     def stop(self):
         """Stop the message router."""
         self.running = False
+        for task in self.workers + self.replays:
+            task.cancel()
+        self.workers = []
+        self.replays = []
+        self.outbound.stop()
+        self.lag_monitor.stop()
+        self.handler.stop_nowait()
+        self.dedup.close()
         logger.info("Message router stopped")
\ No newline at end of file
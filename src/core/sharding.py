@@ -0,0 +1,287 @@
+"""Multi-process message handling, partitioned by sender."""
+import asyncio
+import itertools
+import logging
+import multiprocessing
+import os
+import queue
+import signal
+import threading
+import time
+from typing import Any, Dict, Optional
+from .handlers import MessageHandler
+from .persistence import Message
+from ..config import config
+from ..utils.metrics import metrics
+from ..utils.security import SecurityUtils
+
+logger = logging.getLogger(__name__)
+
+# Forking a process that already runs threads (executors, queue feeders) is unsafe
+_context = multiprocessing.get_context('spawn')
+
+class WorkerLostError(Exception):
+    """Raised for a message whose worker process died before it replied."""
+
+def shard_index(channel: str, sender_id: str, shards: int) -> int:
+    """Map a conversation to a shard; stable across processes and restarts."""
+    return int(SecurityUtils.hash_sender_id(f"{channel}:{sender_id}"), 16) % shards
+
+def _shard_path(path: str, index: int) -> str:
+    base, ext = os.path.splitext(path)
+    return f"{base}.shard-{index}{ext}"
+
+def _configure_shard(index: int, settings: Dict[str, Any]) -> None:
+    # Spawned children rebuild config from the environment; apply the parent's values
+    for key, value in settings.items():
+        setattr(config, key, value)
+    # Each shard owns the full history of its senders, so stores are never shared between processes
+    config.message_store_dir = os.path.join(config.message_store_dir, f"shard-{index}")
+    config.message_store_sqlite_path = _shard_path(config.message_store_sqlite_path, index)
+    # The legacy JSON import is a one-off done by a single-process run
+    config.message_store_legacy_path = ''
+
+def _receive(inbox, timeout: float):
+    try:
+        return inbox.get(timeout=timeout)
+    except queue.Empty:
+        return ()
+
+async def _serve(index: int, inbox, conn, heartbeat_interval: float) -> None:
+    handler = MessageHandler()
+    await handler.start()
+    loop = asyncio.get_running_loop()
+    # Metrics are recorded in this process; the parent merges these reports into its registry
+    reported = time.monotonic()
+    try:
+        while True:
+            try:
+                item = inbox.get_nowait()
+            except queue.Empty:
+                # Wait off the loop so the write-behind flush keeps running
+                item = await loop.run_in_executor(None, _receive, inbox, heartbeat_interval)
+            if item is None:
+                break
+            if item == ():
+                conn.send(('heartbeat', None))
+            else:
+                seq, record = item
+                response = await handler.process_message(Message.from_record(record))
+                conn.send(('result', (seq, response)))
+            if time.monotonic() - reported >= heartbeat_interval:
+                conn.send(('metrics', metrics.export()))
+                reported = time.monotonic()
+    finally:
+        await handler.writer.stop()
+        handler.message_store.close()
+        try:
+            conn.send(('metrics', metrics.export()))
+        except OSError:
+            pass
+
+def _run_shard(index: int, settings: Dict[str, Any], inbox, conn, heartbeat_interval: float) -> None:
+    """Worker process entry point."""
+    _configure_shard(index, settings)
+    logging.basicConfig(
+        level=getattr(logging, config.log_level.upper()),
+        format=f'%(asctime)s - shard-{index} - %(name)s - %(levelname)s - %(message)s'
+    )
+    # Ctrl-C reaches the whole process group; the parent stops workers so they can flush
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    asyncio.run(_serve(index, inbox, conn, heartbeat_interval))
+
+class _Shard:
+    """Parent-side state of one worker process."""
+    
+    def __init__(self, index: int):
+        self.index = index
+        self.process = None
+        self.inbox = None
+        self.conn = None
+        self.reader: Optional[threading.Thread] = None
+        self.pending: Dict[int, asyncio.Future] = {}
+        self.last_seen = 0.0
+        self.processed = 0
+        self.restarts = 0
+        self.lost = 0
+        # Last metrics report merged from the current process
+        self.metrics: Dict[Any, Any] = {}
+
+class ShardPool:
+    """Runs ``MessageHandler`` in worker processes, one shard per process.
+    
+    Messages are partitioned by ``(channel, sender_id)`` through
+    ``SecurityUtils.hash_sender_id``, and each worker handles its queue in
+    order, so a sender's messages are processed in arrival order and its
+    history lives in a single shard's store. A supervisor restarts workers
+    that exit or stop sending heartbeats; messages they held fail with
+    ``WorkerLostError`` so they can be delivered again. Workers report their metrics over the same pipe as
+    heartbeats, and the reports are merged into this process's registry.
+    """
+    
+    def __init__(self, processes: int, heartbeat_interval: float = 1.0, heartbeat_timeout: float = 10.0):
+        if processes < 1:
+            raise ValueError("ShardPool needs at least one process")
+        self.heartbeat_interval = heartbeat_interval
+        self.heartbeat_timeout = heartbeat_timeout
+        self.shards = [_Shard(index) for index in range(processes)]
+        self._sequence = itertools.count()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._supervisor: Optional[asyncio.Task] = None
+        self.running = False
+        self.restarts = metrics.counter('agent_worker_restarts_total', 'Worker processes restarted by the supervisor')
+    
+    def _spawn(self, shard: _Shard) -> None:
+        receiver, sender = _context.Pipe(duplex=False)
+        shard.inbox = _context.Queue()
+        shard.conn = receiver
+        shard.process = _context.Process(
+            target=_run_shard,
+            args=(shard.index, config.model_dump(), shard.inbox, sender, self.heartbeat_interval),
+            name=f"agent-shard-{shard.index}",
+            daemon=True
+        )
+        shard.process.start()
+        # Only the child writes to the pipe; EOF then means the child is gone
+        sender.close()
+        shard.metrics = {}
+        shard.last_seen = time.monotonic()
+        shard.reader = threading.Thread(target=self._read, args=(shard, receiver),
+                                        name=f"agent-shard-{shard.index}-reader", daemon=True)
+        shard.reader.start()
+    
+    def _read(self, shard: _Shard, conn) -> None:
+        """Forward one worker's replies to the event loop."""
+        while True:
+            try:
+                kind, payload = conn.recv()
+            except (EOFError, OSError):
+                return
+            try:
+                self._loop.call_soon_threadsafe(self._on_message, shard, conn, kind, payload)
+            except RuntimeError:
+                # Loop closed during shutdown
+                return
+    
+    def _on_message(self, shard: _Shard, conn, kind: str, payload: Any) -> None:
+        if conn is not shard.conn:
+            # Late reply from a worker that was already replaced
+            return
+        shard.last_seen = time.monotonic()
+        if kind == 'result':
+            seq, response = payload
+            future = shard.pending.pop(seq, None)
+            shard.processed += 1
+            if future is not None and not future.done():
+                future.set_result(response)
+        elif kind == 'metrics':
+            shard.metrics = metrics.merge(payload, shard.metrics)
+    
+    async def start(self) -> None:
+        """Start the worker processes and their supervisor."""
+        self._loop = asyncio.get_running_loop()
+        self.running = True
+        for shard in self.shards:
+            self._spawn(shard)
+        self._supervisor = asyncio.create_task(self._supervise())
+        logger.info(f"Started {len(self.shards)} worker processes")
+    
+    async def _supervise(self) -> None:
+        while True:
+            await asyncio.sleep(self.heartbeat_interval)
+            now = time.monotonic()
+            for shard in self.shards:
+                if not shard.process.is_alive():
+                    self._restart(shard, f"exited with code {shard.process.exitcode}")
+                elif now - shard.last_seen > self.heartbeat_timeout:
+                    self._restart(shard, f"sent no heartbeat for {now - shard.last_seen:.1f}s")
+    
+    def _restart(self, shard: _Shard, reason: str) -> None:
+        logger.error(f"Worker shard-{shard.index} {reason}; restarting")
+        self._close_shard(shard, timeout=1.0)
+        if shard.pending:
+            logger.error(f"Worker shard-{shard.index} lost {len(shard.pending)} in-flight messages")
+            shard.lost += len(shard.pending)
+            for future in shard.pending.values():
+                if not future.done():
+                    future.set_exception(WorkerLostError(f"Worker shard-{shard.index} {reason}"))
+            shard.pending.clear()
+        shard.restarts += 1
+        self.restarts.inc()
+        self._spawn(shard)
+    
+    def _close_shard(self, shard: _Shard, timeout: float) -> None:
+        if shard.process.is_alive():
+            shard.process.terminate()
+        shard.process.join(timeout)
+        if shard.process.is_alive():
+            shard.process.kill()
+            shard.process.join()
+        shard.inbox.close()
+        shard.conn.close()
+    
+    async def process_message(self, message: Message) -> Optional[str]:
+        """Hand a message to its shard and wait for the response.
+        
+        Raises ``WorkerLostError`` if the worker dies before it replies.
+        """
+        shard = self.shards[shard_index(message.channel, message.sender_id, len(self.shards))]
+        seq = next(self._sequence)
+        future = self._loop.create_future()
+        shard.pending[seq] = future
+        # Queued before the first await, so each shard sees messages in ingress order
+        shard.inbox.put((seq, message.to_record()))
+        return await future
+    
+    def _request_stop(self) -> bool:
+        if not self.running:
+            return False
+        self.running = False
+        if self._supervisor:
+            self._supervisor.cancel()
+        for shard in self.shards:
+            shard.inbox.put(None)
+        return True
+    
+    def _join(self, timeout: float) -> None:
+        deadline = time.monotonic() + timeout
+        for shard in self.shards:
+            shard.process.join(max(0.0, deadline - time.monotonic()))
+            if not shard.process.is_alive():
+                # The reader hits EOF once it has forwarded the worker's last report
+                shard.reader.join(1.0)
+            self._close_shard(shard, timeout=1.0)
+    
+    def _cancel_pending(self) -> None:
+        for shard in self.shards:
+            for future in shard.pending.values():
+                if not future.done():
+                    future.cancel()
+            shard.pending.clear()
+    
+    async def stop(self, timeout: float = 5.0) -> None:
+        """Stop the workers, letting them flush their stores; joins run off the event loop."""
+        if self._request_stop():
+            await asyncio.get_running_loop().run_in_executor(None, self._join, timeout)
+            self._cancel_pending()
+            # Let the last forwarded reports reach the registry
+            await asyncio.sleep(0)
+    
+    def stop_nowait(self, timeout: float = 5.0) -> None:
+        """Stop the workers from synchronous code, letting them flush their stores."""
+        if self._request_stop():
+            self._join(timeout)
+            self._cancel_pending()
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Return per-shard liveness, throughput, restarts and queued messages."""
+        return {
+            f"shard-{shard.index}": {
+                'alive': shard.process is not None and shard.process.is_alive(),
+                'pending': len(shard.pending),
+                'processed': shard.processed,
+                'restarts': shard.restarts,
+                'lost': shard.lost
+            }
+            for shard in self.shards
+        }
\ No newline at end of file
@@ -0,0 +1,176 @@
+"""SQLite storage backend with indexed message queries."""
+import json
+import logging
+import os
+import sqlite3
+import threading
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+from .storage import StorageBackend, TimeValue, encode_json, to_timestamp
+
+logger = logging.getLogger(__name__)
+
+COLUMNS = ('id', 'channel', 'sender_id', 'sender_name', 'text', 'attachments', 'received_at', 'metadata')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS messages (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    id TEXT NOT NULL UNIQUE,
+    channel TEXT NOT NULL,
+    sender_id TEXT NOT NULL,
+    sender_name TEXT NOT NULL DEFAULT '',
+    text TEXT NOT NULL DEFAULT '',
+    attachments TEXT NOT NULL DEFAULT '[]',
+    received_at TEXT NOT NULL,
+    metadata TEXT NOT NULL DEFAULT '{}'
+);
+CREATE INDEX IF NOT EXISTS idx_messages_channel ON messages (channel, received_at);
+CREATE INDEX IF NOT EXISTS idx_messages_sender ON messages (sender_id, received_at);
+CREATE INDEX IF NOT EXISTS idx_messages_received_at ON messages (received_at);
+CREATE INDEX IF NOT EXISTS idx_messages_conversation ON messages (channel, sender_id, received_at);
+"""
+
+# Map the log's fsync policies onto SQLite's synchronous levels (WAL mode)
+SYNCHRONOUS_LEVELS = {'always': 'FULL', 'interval': 'NORMAL', 'never': 'OFF'}
+
+class SQLiteStorageBackend(StorageBackend):
+    """Stores messages in a WAL-mode SQLite database.
+    
+    ``channel``, ``sender_id`` and ``received_at`` are indexed so filtering,
+    ordering and pagination run inside SQLite. ``metadata`` is kept as JSON text
+    and can be queried with ``json_extract``.
+    """
+    
+    indexed = True
+    
+    def __init__(self, path: str, fsync_policy: str = 'interval'):
+        if fsync_policy not in SYNCHRONOUS_LEVELS:
+            raise ValueError(f"Unknown fsync policy: {fsync_policy}")
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(f"PRAGMA synchronous={SYNCHRONOUS_LEVELS[fsync_policy]}")
+        self._conn.executescript(SCHEMA)
+        self._conn.commit()
+    
+    @staticmethod
+    def _to_row(record: Dict[str, Any]) -> tuple:
+        return (
+            record['id'],
+            record['channel'],
+            record['sender_id'],
+            record.get('sender_name', ''),
+            record.get('text', ''),
+            encode_json(record.get('attachments', [])),
+            to_timestamp(record['received_at']),
+            encode_json(record.get('metadata', {}))
+        )
+    
+    @staticmethod
+    def _to_record(row: tuple) -> Dict[str, Any]:
+        record = dict(zip(COLUMNS, row))
+        record['attachments'] = json.loads(record['attachments'])
+        record['metadata'] = json.loads(record['metadata'])
+        return record
+    
+    def _select(self, where: str = "", params: tuple = (), order: str = "seq",
+                limit: Optional[int] = None, offset: int = 0) -> List[Dict[str, Any]]:
+        sql = f"SELECT {', '.join(COLUMNS)} FROM messages"
+        if where:
+            sql += f" WHERE {where}"
+        sql += f" ORDER BY {order}"
+        if limit is not None or offset:
+            sql += " LIMIT ? OFFSET ?"
+            params = params + (limit if limit is not None else -1, offset)
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [self._to_record(row) for row in rows]
+    
+    def append_many(self, records: Iterable[Dict[str, Any]]) -> None:
+        """Insert several records in a single transaction.
+        
+        Records whose ``id`` is already stored are ignored.
+        """
+        rows = [self._to_row(record) for record in records]
+        if not rows:
+            return
+        with self._lock:
+            with self._conn:
+                self._conn.executemany(
+                    f"INSERT OR IGNORE INTO messages ({', '.join(COLUMNS)}) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    rows
+                )
+    
+    def iter_records(self) -> Iterator[Dict[str, Any]]:
+        """Stream every record in insertion order, in pages."""
+        last_seq = 0
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    f"SELECT seq, {', '.join(COLUMNS)} FROM messages WHERE seq > ? ORDER BY seq LIMIT 1000",
+                    (last_seq,)
+                ).fetchall()
+            if not rows:
+                return
+            for row in rows:
+                yield self._to_record(row[1:])
+            last_seq = rows[-1][0]
+    
+    def query(self, channel: Optional[str] = None, sender_id: Optional[str] = None,
+              since: Optional[TimeValue] = None, until: Optional[TimeValue] = None,
+              limit: Optional[int] = None, offset: int = 0,
+              newest_first: bool = False) -> List[Dict[str, Any]]:
+        """Return records matching all given filters, ordered by ``received_at``."""
+        clauses = []
+        params = []
+        for clause, value in (("channel = ?", channel), ("sender_id = ?", sender_id),
+                              ("received_at >= ?", to_timestamp(since)),
+                              ("received_at < ?", to_timestamp(until))):
+            if value is not None:
+                clauses.append(clause)
+                params.append(value)
+        direction = "DESC" if newest_first else "ASC"
+        return self._select(" AND ".join(clauses), tuple(params),
+                            order=f"received_at {direction}, seq {direction}",
+                            limit=limit, offset=offset)
+    
+    def latest_per_conversation(self, n: int, channel: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Return the newest ``n`` records of every (channel, sender_id) conversation."""
+        where = "WHERE channel = ?" if channel is not None else ""
+        params = (channel, n) if channel is not None else (n,)
+        sql = f"""
+            SELECT {', '.join(COLUMNS)} FROM (
+                SELECT *, ROW_NUMBER() OVER (
+                    PARTITION BY channel, sender_id ORDER BY received_at DESC, seq DESC
+                ) AS position
+                FROM messages {where}
+            )
+            WHERE position <= ?
+            ORDER BY channel, sender_id, position
+        """
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [self._to_record(row) for row in rows]
+    
+    def find_by_metadata(self, key: str, value: Any, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Return records whose ``metadata[key]`` equals ``value``."""
+        path = '$."' + key.replace('"', '\\"') + '"'
+        return self._select("json_extract(metadata, ?) = ?", (path, value), limit=limit)
+    
+    def count(self) -> int:
+        """Return the number of stored messages."""
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM messages").fetchone()[0]
+    
+    def flush(self) -> None:
+        """Checkpoint the write-ahead log into the main database file."""
+        with self._lock:
+            self._conn.execute("PRAGMA wal_checkpoint(PASSIVE)")
+    
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
\ No newline at end of file
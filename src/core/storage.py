@@ -0,0 +1,138 @@
+"""Storage backend interface for message records."""
+import json
+import logging
+import os
+from datetime import datetime
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+TimeValue = Union[datetime, str]
+
+# Reused so each record skips building an encoder; no padding, UTF-8 kept as is
+_RECORD_ENCODER = json.JSONEncoder(separators=(',', ':'), ensure_ascii=False, default=str)
+
+def encode_json(value: Any) -> str:
+    """Serialize a record or record field as compact JSON."""
+    return _RECORD_ENCODER.encode(value)
+
+def to_timestamp(value: Optional[TimeValue]) -> Optional[str]:
+    """Convert a datetime to the ISO string stored in ``received_at``.
+    
+    UTC is written as 'Z', as pydantic does, for strings too, so that stored
+    values and filters compare as strings whichever spelling they came in.
+    """
+    if value is None:
+        return None
+    if not isinstance(value, str):
+        value = value.isoformat()
+    if value.endswith('+00:00'):
+        value = value[:-6] + 'Z'
+    return value
+
+def parse_timestamp(value: str) -> datetime:
+    """Parse a stored ``received_at``; ``fromisoformat`` only reads 'Z' from Python 3.11."""
+    if value.endswith('Z'):
+        value = value[:-1] + '+00:00'
+    return datetime.fromisoformat(value)
+
+class StorageBackend:
+    """Interface implemented by message storage backends.
+    
+    Records are the JSON-mode dicts produced by ``Message.to_record``. The query
+    methods have streaming implementations built on ``iter_records``; indexed
+    backends override them to push filtering and pagination into the store.
+    """
+    
+    # True when query() is answered from an index rather than a full scan
+    indexed = False
+    
+    def append(self, record: Dict[str, Any]) -> None:
+        """Persist a single record."""
+        self.append_many([record])
+    
+    def append_many(self, records: Iterable[Dict[str, Any]]) -> None:
+        """Persist several records in one write."""
+        raise NotImplementedError
+    
+    def iter_records(self) -> Iterator[Dict[str, Any]]:
+        """Stream every record in insertion order."""
+        raise NotImplementedError
+    
+    def flush(self) -> None:
+        """Force pending writes to stable storage."""
+    
+    def close(self) -> None:
+        """Flush and release any open resources."""
+    
+    def query(self, channel: Optional[str] = None, sender_id: Optional[str] = None,
+              since: Optional[TimeValue] = None, until: Optional[TimeValue] = None,
+              limit: Optional[int] = None, offset: int = 0,
+              newest_first: bool = False) -> List[Dict[str, Any]]:
+        """Return records matching all given filters, ordered by ``received_at``.
+        
+        ``since`` is inclusive and ``until`` exclusive. Ties keep insertion order.
+        """
+        since, until = to_timestamp(since), to_timestamp(until)
+        matches = [
+            record for record in self.iter_records()
+            if (channel is None or record.get('channel') == channel)
+            and (sender_id is None or record.get('sender_id') == sender_id)
+            and (since is None or to_timestamp(record.get('received_at', '')) >= since)
+            and (until is None or to_timestamp(record.get('received_at', '')) < until)
+        ]
+        matches.sort(key=lambda record: to_timestamp(record.get('received_at', '')), reverse=newest_first)
+        end = offset + limit if limit is not None else None
+        return matches[offset:end]
+    
+    def recent_conversation(self, channel: str, sender_id: str, limit: int, max_bytes: int) -> List[Dict[str, Any]]:
+        """Return a conversation's newest records among about the last ``max_bytes`` stored, newest first.
+        
+        Gives unindexed backends a bounded lookup; the default is a ``query``.
+        """
+        return self.query(channel=channel, sender_id=sender_id, limit=limit, newest_first=True)
+    
+    def latest_per_conversation(self, n: int, channel: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Return the newest ``n`` records of every (channel, sender_id) conversation."""
+        conversations: Dict[tuple, List[Dict[str, Any]]] = {}
+        for record in self.query(channel=channel, newest_first=True):
+            key = (record.get('channel'), record.get('sender_id'))
+            bucket = conversations.setdefault(key, [])
+            if len(bucket) < n:
+                bucket.append(record)
+        return [record for key in sorted(conversations) for record in conversations[key]]
+    
+    def find_by_metadata(self, key: str, value: Any, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Return records whose ``metadata[key]`` equals ``value``."""
+        matches = (
+            record for record in self.iter_records()
+            if record.get('metadata', {}).get(key) == value
+        )
+        return list(islice(matches, limit))
+
+def migrate_json_file(json_path: str, backend: StorageBackend) -> int:
+    """Copy a legacy ``messages.json`` array into a backend, once.
+    
+    The legacy file is renamed with a ``.migrated`` suffix afterwards so the
+    migration never runs twice. Returns the number of records migrated.
+    """
+    if not os.path.exists(json_path):
+        return 0
+    
+    try:
+        with open(json_path, 'r') as f:
+            records = json.load(f)
+    except json.JSONDecodeError as e:
+        logger.error(f"Cannot migrate {json_path}: {e}")
+        return 0
+    
+    if not isinstance(records, list):
+        logger.error(f"Cannot migrate {json_path}: expected a JSON array")
+        return 0
+    
+    backend.append_many(records)
+    backend.flush()
+    os.replace(json_path, json_path + '.migrated')
+    logger.info(f"Migrated {len(records)} messages from {json_path}")
+    return len(records)
\ No newline at end of file
@@ -1,14 +1,94 @@
 """Response templates for different intents and channels."""
-from typing import Dict, List
+import json
+import logging
+import os
 import random
+import time
+from string import Formatter
+from typing import Callable, Dict, List, Optional, Tuple
+from .persistence import Message
+from ..config import config
+
+logger = logging.getLogger(__name__)
+
+FALLBACK_NAME = 'there'
+_UNKNOWN_NAMES = {'', 'Unknown', 'WhatsApp User'}
+
+def _sender_name(message: Optional[Message]) -> str:
+    if message is None or message.sender_name in _UNKNOWN_NAMES:
+        return FALLBACK_NAME
+    return message.sender_name
+
+def _first_name(message: Optional[Message]) -> str:
+    names = _sender_name(message).split(maxsplit=1)
+    return names[0] if names else FALLBACK_NAME
+
+# Placeholders a template may use and how each is read from the message
+FIELD_GETTERS: Dict[str, Callable[[Optional[Message]], str]] = {
+    'sender_name': _sender_name,
+    'first_name': _first_name,
+    'sender_id': lambda message: message.sender_id if message else '',
+    'channel': lambda message: message.channel if message else ''
+}
+TEMPLATE_FIELDS = tuple(FIELD_GETTERS)
+
+Token = Tuple[str, Optional[str]]
+
+def parse_template(source: str, allowed: Tuple[str, ...] = TEMPLATE_FIELDS) -> List[Token]:
+    """Split a template into ``(literal, field)`` tokens, rejecting unknown fields."""
+    tokens = []
+    for literal, field, spec, conversion in Formatter().parse(source):
+        if field is not None and (field not in allowed or spec or conversion):
+            raise ValueError(f"Unsupported placeholder {{{field}}} in template: {source!r}")
+        tokens.append((literal, field))
+    return tokens
+
+class CompiledTemplate:
+    """A template reduced to a part list with the placeholder slots recorded."""
+    
+    __slots__ = ('parts', 'slots', 'static')
+    
+    def __init__(self, tokens: List[Token]):
+        parts: List[str] = []
+        slots = []
+        for literal, field in tokens:
+            if literal:
+                # Merge adjacent literals so the join has as few parts as possible
+                if parts and not (slots and slots[-1][0] == len(parts) - 1):
+                    parts[-1] += literal
+                else:
+                    parts.append(literal)
+            if field is not None:
+                slots.append((len(parts), field))
+                parts.append('')
+        self.parts = parts
+        self.slots = tuple((index, FIELD_GETTERS[field]) for index, field in slots)
+        self.static = ''.join(parts) if not slots else None
+    
+    def render(self, message: Optional[Message] = None) -> str:
+        """Fill the placeholders from the message and join the parts."""
+        if self.static is not None:
+            return self.static
+        parts = self.parts.copy()
+        for index, getter in self.slots:
+            parts[index] = getter(message)
+        return ''.join(parts)
 
 class ResponseTemplates:
-    """Template-based response generation."""
+    """Template-based response generation.
+    
+    Every (intent, channel) variant is compiled once when templates are
+    loaded, so a reply is a random pick plus one join. Templates may be
+    loaded from a JSON file with ``intents``, ``channels`` and
+    ``auto_replies`` sections, which override the built-in ones; the file is
+    re-read when its modification time changes, and each load starts again
+    from the built-ins, so entries removed from the file go away.
+    """
     
-    def __init__(self):
+    def __init__(self, path: Optional[str] = None, reload_interval: Optional[float] = None):
         self.templates = {
             'greeting': [
-                "Hello! How can I help you today?",
+                "Hello {first_name}! How can I help you today?",
                 "Hi there! What can I do for you?",
                 "Hey! I'm here to assist you."
             ],
@@ -43,27 +123,98 @@ class ResponseTemplates:
                 "I'd like to help, but I need more information."
             ]
         }
-    
-    def get_response(self, intent: str, channel: str = None) -> str:
-        """Get a response template for the given intent."""
-        templates = self.templates.get(intent, self.templates['unknown'])
-        response = random.choice(templates)
-        
-        # Channel-specific modifications
-        if channel == 'email':
-            response = f"Dear valued customer,\n\n{response}\n\nBest regards,\nAgent Michael"
-        elif channel == 'telegram':
-            response = f"🤖 {response}"
-        
-        return response
-    
-    def get_auto_reply(self, channel: str) -> str:
-        """Get an automatic reply message."""
-        auto_replies = {
+        # Channel wrappers; {body} is replaced by the intent response
+        self.channel_wrappers = {
+            'email': "Dear valued customer,\n\n{body}\n\nBest regards,\nAgent Michael",
+            'telegram': "🤖 {body}"
+        }
+        self.auto_replies = {
             'email': "Thank you for your email. I've received your message and will respond shortly.",
             'telegram': "🤖 Thanks for your message! I'm processing it now.",
             'whatsapp': "Hi! I've received your message and will get back to you soon.",
             'linkedin': "Thank you for reaching out on LinkedIn. I'll respond to your message shortly.",
             'instagram': "Thanks for your DM! I'll get back to you as soon as possible."
         }
-        return auto_replies.get(channel, "Thank you for your message. I'll respond soon.")
\ No newline at end of file
+        # What each file load is applied on top of
+        self.builtins = (dict(self.templates), dict(self.channel_wrappers), dict(self.auto_replies))
+        self.path = config.response_templates_path if path is None else path
+        self.reload_interval = config.response_templates_reload_interval if reload_interval is None else reload_interval
+        self._mtime: Optional[float] = None
+        self._next_check = 0.0
+        self.compiled: Dict[Optional[str], Dict[str, List[CompiledTemplate]]] = {}
+        
+        if self.path:
+            self.load_file(self.path)
+        else:
+            self.compile()
+    
+    def compile(self) -> None:
+        """Compile every (intent, channel) variant; call after editing the tables."""
+        intents = {intent: [parse_template(text) for text in texts] for intent, texts in self.templates.items()}
+        wrappers = {channel: parse_template(wrapper, TEMPLATE_FIELDS + ('body',))
+                    for channel, wrapper in self.channel_wrappers.items()}
+        if 'unknown' not in intents:
+            raise ValueError("Templates must define the 'unknown' intent")
+        
+        compiled = {None: {intent: [CompiledTemplate(tokens) for tokens in variants]
+                           for intent, variants in intents.items()}}
+        for channel, wrapper in wrappers.items():
+            compiled[channel] = {intent: [CompiledTemplate(self._wrap(wrapper, tokens)) for tokens in variants]
+                                 for intent, variants in intents.items()}
+        self.compiled = compiled
+    
+    @staticmethod
+    def _wrap(wrapper: List[Token], body: List[Token]) -> List[Token]:
+        tokens = []
+        for literal, field in wrapper:
+            if field == 'body':
+                tokens.append((literal, None))
+                tokens.extend(body)
+            else:
+                tokens.append((literal, field))
+        return tokens
+    
+    def load_file(self, path: str) -> None:
+        """Load templates from a JSON file and compile them."""
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+        mtime = os.stat(path).st_mtime
+        
+        previous = (self.templates, self.channel_wrappers, self.auto_replies)
+        templates, channel_wrappers, auto_replies = self.builtins
+        self.templates = {**templates, **data.get('intents', {})}
+        self.channel_wrappers = {**channel_wrappers, **data.get('channels', {})}
+        self.auto_replies = {**auto_replies, **data.get('auto_replies', {})}
+        try:
+            self.compile()
+        except ValueError:
+            self.templates, self.channel_wrappers, self.auto_replies = previous
+            raise
+        self.path = path
+        self._mtime = mtime
+        logger.info(f"Loaded response templates from {path}")
+    
+    def _reload_if_changed(self) -> None:
+        now = time.monotonic()
+        if now < self._next_check:
+            return
+        self._next_check = now + self.reload_interval
+        try:
+            if os.stat(self.path).st_mtime != self._mtime:
+                self.load_file(self.path)
+        except (OSError, ValueError) as e:
+            # Keep serving the last good templates
+            logger.error(f"Error reloading response templates from {self.path}: {e}")
+    
+    def get_response(self, intent: str, channel: str = None, message: Optional[Message] = None) -> str:
+        """Get a response template for the given intent, personalized for the message."""
+        if self.path:
+            self._reload_if_changed()
+        by_intent = self.compiled.get(channel) or self.compiled[None]
+        variants = by_intent.get(intent) or by_intent['unknown']
+        # random() is a single C call, much cheaper than random.choice
+        return variants[int(random.random() * len(variants))].render(message)
+    
+    def get_auto_reply(self, channel: str) -> str:
+        """Get an automatic reply message."""
+        return self.auto_replies.get(channel, "Thank you for your message. I'll respond soon.")
\ No newline at end of file
@@ -0,0 +1,138 @@
+"""Write-behind persistence stage with group commit."""
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional
+from .persistence import Message, MessageStore
+
+logger = logging.getLogger(__name__)
+
+class WriteBehindQueue:
+    """Buffers messages in memory and saves them in batches off the event loop.
+    
+    A background task collects queued messages until ``max_batch_size`` is
+    reached or ``flush_interval`` seconds have passed since the first one, then
+    writes the batch with a single ``MessageStore.save_messages`` call in a
+    worker thread. ``submit`` waits when the queue is full (backpressure).
+    """
+    
+    def __init__(self, store: MessageStore, max_batch_size: int = 256,
+                 flush_interval: float = 0.05, max_queue_size: int = 10000):
+        self.store = store
+        self.max_batch_size = max_batch_size
+        self.flush_interval = flush_interval
+        self.max_queue_size = max_queue_size
+        self.queue: Optional[asyncio.Queue] = None
+        self.running = False
+        self._task: Optional[asyncio.Task] = None
+        self._pending: List[Message] = []
+        self._writing = False
+        self.batches_written = 0
+        self.messages_written = 0
+        self.largest_batch = 0
+    
+    async def start(self):
+        """Start the background flush task."""
+        if self.running:
+            return
+        self.queue = asyncio.Queue(maxsize=self.max_queue_size)
+        self.running = True
+        self._task = asyncio.create_task(self._run())
+        logger.info("Write-behind persistence started")
+    
+    async def submit(self, message: Message) -> None:
+        """Queue a message for persistence, waiting while the queue is full."""
+        if not self.running:
+            self.store.save_message(message)
+            return
+        await self.queue.put(message)
+    
+    async def _collect_batch(self) -> List[Message]:
+        loop = asyncio.get_running_loop()
+        # Messages taken off the queue live in _pending until handed to the
+        # writer thread, so a cancelled collection never loses them.
+        self._pending = [await self.queue.get()]
+        deadline = loop.time() + self.flush_interval
+        while len(self._pending) < self.max_batch_size:
+            try:
+                self._pending.append(self.queue.get_nowait())
+                continue
+            except asyncio.QueueEmpty:
+                pass
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                self._pending.append(await asyncio.wait_for(self.queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        batch, self._pending = self._pending, []
+        return batch
+    
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while self.running:
+            batch = await self._collect_batch()
+            self._writing = True
+            try:
+                await loop.run_in_executor(None, self._write, batch)
+            except Exception as e:
+                logger.error(f"Error persisting batch of {len(batch)} messages: {e}")
+            finally:
+                self._writing = False
+    
+    def _write(self, batch: List[Message]) -> None:
+        self.store.save_messages(batch)
+        self.batches_written += 1
+        self.messages_written += len(batch)
+        self.largest_batch = max(self.largest_batch, len(batch))
+    
+    def flush_pending(self) -> int:
+        """Synchronously write everything still queued; returns the count.
+        
+        Safe to call from signal handlers and other non-async shutdown paths.
+        """
+        if self.queue is None:
+            return 0
+        batch, self._pending = self._pending, []
+        while True:
+            try:
+                batch.append(self.queue.get_nowait())
+            except asyncio.QueueEmpty:
+                break
+        if batch:
+            self._write(batch)
+            logger.info(f"Flushed {len(batch)} pending messages on shutdown")
+        return len(batch)
+    
+    async def stop(self) -> None:
+        """Stop accepting new batches and write everything still queued."""
+        if not self.running:
+            return
+        self.running = False
+        if self._task:
+            # Let an in-flight batch finish; only interrupt batch collection
+            if not self._writing:
+                self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self.flush_pending()
+        self.store.backend.flush()
+    
+    def stop_nowait(self) -> None:
+        """Stop the writer from synchronous code, flushing queued messages."""
+        self.running = False
+        if self._task:
+            self._task.cancel()
+        self.flush_pending()
+        self.store.backend.flush()
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Return queue depth and batching counters."""
+        return {
+            'queued': self.queue.qsize() if self.queue else 0,
+            'batches_written': self.batches_written,
+            'messages_written': self.messages_written,
+            'largest_batch': self.largest_batch
+        }
\ No newline at end of file
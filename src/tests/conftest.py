@@ -0,0 +1,13 @@
+"""Shared test fixtures."""
+import pytest
+from ..config import config
+
+@pytest.fixture(autouse=True)
+def store_paths(tmp_path, monkeypatch):
+    """Keep message stores, the outbox and the dedup index out of the working directory."""
+    monkeypatch.setattr(config, 'message_store_dir', str(tmp_path / "messages"))
+    monkeypatch.setattr(config, 'message_store_sqlite_path', str(tmp_path / "messages.db"))
+    monkeypatch.setattr(config, 'message_store_legacy_path', str(tmp_path / "messages.json"))
+    monkeypatch.setattr(config, 'outbox_dir', '')
+    monkeypatch.setattr(config, 'dedup_path', '')
+    return tmp_path
\ No newline at end of file
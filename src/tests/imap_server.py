@@ -0,0 +1,189 @@
+"""A small stand-in IMAP server for connector tests.
+
+Speaks enough IMAP4rev1 (plus ENABLE and CONDSTORE's HIGHESTMODSEQ) for
+``EmailConnector``: LOGIN, SELECT, UID SEARCH, UID FETCH of ENVELOPE,
+BODYSTRUCTURE and partial body sections, UID STORE, NOOP and LOGOUT. Every
+command is logged so tests can assert on what was sent.
+"""
+import re
+import socketserver
+import threading
+from typing import Any, Dict, List, Optional, Set
+
+def _quote(value: str) -> str:
+    return '"' + value.replace('\\', '\\\\').replace('"', '\\"') + '"'
+
+def _address(name: str, mailbox: str, host: str) -> str:
+    return f"(({_quote(name)} NIL {_quote(mailbox)} {_quote(host)}))"
+
+class StandInIMAPServer:
+    """Serves one INBOX of plain-text messages on a free local port."""
+    
+    def __init__(self, uidvalidity: int = 1, condstore: bool = True):
+        self.uidvalidity = uidvalidity
+        self.condstore = condstore
+        self.messages: List[Dict[str, Any]] = []
+        self.uidnext = 1
+        self.modseq = 1
+        self.commands: List[str] = []
+        self.lock = threading.Lock()
+        self.server: Optional[socketserver.ThreadingTCPServer] = None
+    
+    @property
+    def port(self) -> int:
+        return self.server.server_address[1]
+    
+    def add_message(self, sender: str, subject: str, body: str, flags: Optional[Set[str]] = None) -> int:
+        """Deliver a message; returns its UID."""
+        with self.lock:
+            uid = self.uidnext
+            self.uidnext += 1
+            self.modseq += 1
+            mailbox, host = sender.split('@')
+            self.messages.append({'uid': uid, 'mailbox': mailbox, 'host': host, 'subject': subject,
+                                  'body': body.encode(), 'flags': set(flags or ())})
+            return uid
+    
+    def set_flags(self, uid: int, flags: Set[str]) -> None:
+        """Change flags as another mail client would."""
+        with self.lock:
+            for message in self.messages:
+                if message['uid'] == uid:
+                    message['flags'] |= flags
+                    self.modseq += 1
+    
+    def recreate_mailbox(self, uidvalidity: int) -> None:
+        """Simulate the mailbox being rebuilt, which invalidates every UID."""
+        with self.lock:
+            self.uidvalidity = uidvalidity
+            self.modseq += 1
+    
+    def start(self) -> 'StandInIMAPServer':
+        server = self
+        
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                server._session(self.rfile, self.wfile)
+        
+        self.server = socketserver.ThreadingTCPServer(('127.0.0.1', 0), Handler)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+    
+    def stop(self) -> None:
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+    
+    def commands_named(self, name: str) -> List[str]:
+        """Logged commands starting with ``name`` (tags stripped)."""
+        return [command for command in self.commands if command.upper().startswith(name.upper())]
+    
+    # Protocol
+    
+    def _capabilities(self) -> str:
+        return 'IMAP4rev1 ENABLE' + (' CONDSTORE' if self.condstore else '')
+    
+    def _uid_set(self, spec: str) -> Set[int]:
+        highest = self.messages[-1]['uid'] if self.messages else 0
+        uids = set()
+        for item in spec.split(','):
+            if ':' in item:
+                low, high = (highest if value == '*' else int(value) for value in item.split(':'))
+                uids.update(range(min(low, high), max(low, high) + 1))
+            else:
+                uids.add(highest if item == '*' else int(item))
+        return uids
+    
+    def _search(self, criteria: List[str]) -> List[int]:
+        if criteria and criteria[0].upper() == 'UNSEEN':
+            return [m['uid'] for m in self.messages if '\\Seen' not in m['flags']]
+        if len(criteria) == 2 and criteria[0].upper() == 'UID':
+            wanted = self._uid_set(criteria[1])
+            return [m['uid'] for m in self.messages if m['uid'] in wanted]
+        return [m['uid'] for m in self.messages]
+    
+    def _fetch_items(self, message: Dict[str, Any], items: List[str]) -> bytes:
+        out = [f"UID {message['uid']}".encode()]
+        body = message['body']
+        for item in items:
+            upper = item.upper()
+            if upper == 'ENVELOPE':
+                sender = _address('Sender', message['mailbox'], message['host'])
+                out.append(f'ENVELOPE (NIL {_quote(message["subject"])} {sender} {sender} {sender} '
+                           f'NIL NIL NIL NIL NIL)'.encode())
+            elif upper == 'BODYSTRUCTURE':
+                lines = body.count(b'\n') + 1
+                out.append(f'BODYSTRUCTURE ("TEXT" "PLAIN" ("CHARSET" "utf-8") NIL NIL "7BIT" '
+                           f'{len(body)} {lines} NIL NIL NIL NIL)'.encode())
+            elif upper == 'FLAGS':
+                out.append(f"FLAGS ({' '.join(sorted(message['flags']))})".encode())
+            else:
+                match = re.match(r'BODY(?:\.PEEK)?\[(1|TEXT)?\](?:<(\d+)\.(\d+)>)?$', upper)
+                if not match:
+                    continue
+                start = int(match.group(2) or 0)
+                data = body[start:start + int(match.group(3))] if match.group(3) else body
+                origin = f"<{start}>" if match.group(2) is not None else ''
+                out.append(f"BODY[{match.group(1) or ''}]{origin} {{{len(data)}}}\r\n".encode() + data)
+        return b' '.join(out)
+    
+    def _session(self, rfile, wfile) -> None:
+        def send(line):
+            wfile.write((line if isinstance(line, bytes) else line.encode()) + b'\r\n')
+        
+        send('* OK stand-in IMAP ready')
+        while True:
+            line = rfile.readline()
+            if not line:
+                return
+            tag, _, rest = line.decode().rstrip('\r\n').partition(' ')
+            with self.lock:
+                self.commands.append(rest)
+                done = self._command(tag, rest, send)
+            wfile.flush()
+            if done:
+                return
+    
+    def _command(self, tag: str, rest: str, send) -> bool:
+        words = rest.split(' ')
+        command = words[0].upper()
+        if command == 'CAPABILITY':
+            send(f'* CAPABILITY {self._capabilities()}')
+        elif command == 'ENABLE':
+            send(f"* ENABLED {' '.join(words[1:])}")
+        elif command == 'SELECT':
+            send(f'* {len(self.messages)} EXISTS')
+            send('* 0 RECENT')
+            send('* FLAGS (\\Seen \\Answered \\Flagged \\Deleted \\Draft)')
+            send(f'* OK [UIDVALIDITY {self.uidvalidity}] UIDs valid')
+            send(f'* OK [UIDNEXT {self.uidnext}] Predicted next UID')
+            if self.condstore:
+                send(f'* OK [HIGHESTMODSEQ {self.modseq}] Highest')
+            send(f'{tag} OK [READ-WRITE] SELECT completed')
+            return False
+        elif command == 'LOGOUT':
+            send('* BYE logging out')
+            send(f'{tag} OK LOGOUT completed')
+            return True
+        elif command == 'UID':
+            subcommand = words[1].upper()
+            if subcommand == 'SEARCH':
+                criteria = [word for word in words[2:] if word.upper() != 'ALL']
+                send('* SEARCH ' + ' '.join(str(uid) for uid in self._search(criteria)))
+            elif subcommand in ('FETCH', 'STORE'):
+                wanted = self._uid_set(words[2])
+                if subcommand == 'FETCH':
+                    items = ' '.join(words[3:]).strip('()').split(' ')
+                else:
+                    flags = set(' '.join(words[4:]).strip('()').split())
+                    items = ['FLAGS']
+                for seq, message in enumerate(self.messages, start=1):
+                    if message['uid'] in wanted:
+                        if subcommand == 'STORE':
+                            message['flags'] |= flags
+                            self.modseq += 1
+                        send(f'* {seq} FETCH ('.encode() + self._fetch_items(message, items) + b')')
+        # LOGIN, NOOP and anything else simply succeed
+        send(f'{tag} OK {command} completed')
+        return False
\ No newline at end of file
@@ -0,0 +1,125 @@
+"""A stand-in Telegram Bot API server for connector tests.
+
+Serves the Bot API methods ``TelegramConnector`` uses (getMe, getUpdates,
+setWebhook, deleteWebhook and sendMessage) from ``HTTPServer`` on the test's
+event loop. Point ``TELEGRAM_API_URL`` at ``api_url`` to use it.
+"""
+import asyncio
+import json
+import time
+from collections import defaultdict
+from typing import Any, Dict, List, Optional
+from ..utils.http_server import HTTPRequest, HTTPResponse, HTTPServer
+
+TOKEN = "123456:TEST-TOKEN"
+
+def _decode(params: Dict[str, str]) -> Dict[str, Any]:
+    """python-telegram-bot sends strings as-is and everything else as JSON."""
+    decoded = {}
+    for key, value in params.items():
+        try:
+            decoded[key] = json.loads(value)
+        except ValueError:
+            decoded[key] = value
+    return decoded
+
+class StandInBotAPIServer:
+    """Queues updates for ``getUpdates`` and records what the bot sends.
+    
+    Updates are confirmed by the ``offset`` of the next ``getUpdates`` call,
+    which long-polls until an update arrives or its timeout passes, as the
+    real API does.
+    """
+    
+    def __init__(self, token: str = TOKEN):
+        self.token = token
+        self.server = HTTPServer('127.0.0.1', 0)
+        self.updates: List[Dict[str, Any]] = []
+        self.sent: List[Dict[str, Any]] = []
+        self.webhook: Dict[str, Any] = {}
+        self.calls: Dict[str, int] = defaultdict(int)
+        self.next_update_id = 1
+        self._arrived = asyncio.Event()
+        handlers = {
+            'getMe': self._get_me,
+            'getUpdates': self._get_updates,
+            'setWebhook': self._set_webhook,
+            'deleteWebhook': self._delete_webhook,
+            'sendMessage': self._send_message
+        }
+        for method, handler in handlers.items():
+            self.server.route('POST', f"/bot{token}/{method}", self._endpoint(method, handler))
+    
+    @property
+    def api_url(self) -> str:
+        return f"http://127.0.0.1:{self.server.port}/bot"
+    
+    async def start(self) -> None:
+        await self.server.start()
+    
+    def close(self) -> None:
+        self.server.close()
+        # Release long polls still waiting for updates
+        self._arrived.set()
+    
+    def make_update(self, chat_id: int, text: str, user_id: Optional[int] = None) -> Dict[str, Any]:
+        """Build a private-chat message update with the next update ID."""
+        update_id = self.next_update_id
+        self.next_update_id += 1
+        return {
+            'update_id': update_id,
+            'message': {
+                'message_id': update_id,
+                'date': int(time.time()),
+                'chat': {'id': chat_id, 'type': 'private'},
+                'from': {'id': user_id or chat_id, 'is_bot': False, 'first_name': 'User'},
+                'text': text
+            }
+        }
+    
+    def add_update(self, chat_id: int, text: str, user_id: Optional[int] = None) -> Dict[str, Any]:
+        """Queue an update for the next ``getUpdates``."""
+        update = self.make_update(chat_id, text, user_id)
+        self.updates.append(update)
+        self._arrived.set()
+        return update
+    
+    def _endpoint(self, method: str, handler):
+        async def endpoint(request: HTTPRequest) -> HTTPResponse:
+            self.calls[method] += 1
+            result = await handler(_decode(request.form()))
+            return HTTPResponse(200, json.dumps({'ok': True, 'result': result}).encode(), 'application/json')
+        return endpoint
+    
+    async def _get_me(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        return {'id': int(self.token.split(':')[0]), 'is_bot': True, 'first_name': 'Stand-in',
+                'username': 'standin_bot'}
+    
+    async def _get_updates(self, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+        offset = int(params.get('offset', 0))
+        self.updates = [update for update in self.updates if update['update_id'] >= offset]
+        timeout = float(params.get('timeout', 0))
+        if not self.updates and timeout:
+            self._arrived.clear()
+            try:
+                await asyncio.wait_for(self._arrived.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        return self.updates[:int(params.get('limit', 100))]
+    
+    async def _set_webhook(self, params: Dict[str, Any]) -> bool:
+        self.webhook = params
+        return True
+    
+    async def _delete_webhook(self, params: Dict[str, Any]) -> bool:
+        self.webhook = {}
+        return True
+    
+    async def _send_message(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        self.sent.append(params)
+        return {
+            'message_id': len(self.sent),
+            'date': int(time.time()),
+            'chat': {'id': int(params['chat_id']), 'type': 'private'},
+            'text': str(params['text'])
+        }
\ No newline at end of file
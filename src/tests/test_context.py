@@ -0,0 +1,89 @@
+"""Tests for the conversation context cache."""
+import pytest
+from datetime import datetime, timedelta
+from unittest.mock import Mock
+from ..core.context import ConversationContextCache
+from ..core.message_log import SegmentedLog
+from ..core.nlp import IntentDetector
+from ..core.persistence import Message, MessageStore
+from ..core.sqlite_store import SQLiteStorageBackend
+
+def make_message(index: int, text: str, sender_id: str = "user123") -> Message:
+    return Message(
+        id=f"msg-{index}",
+        channel="test",
+        sender_id=sender_id,
+        sender_name="Test User",
+        text=text,
+        received_at=datetime(2024, 1, 1) + timedelta(minutes=index)
+    )
+
+@pytest.fixture
+def store(tmp_path):
+    """Create an indexed message store in a temporary directory."""
+    return MessageStore(
+        backend=SQLiteStorageBackend(str(tmp_path / "messages.db")),
+        legacy_path=str(tmp_path / "messages.json")
+    )
+
+@pytest.mark.asyncio
+async def test_miss_warms_from_store_then_hits(store):
+    """Test a miss loads the newest turns with intents, and later lookups hit."""
+    store.save_messages([make_message(0, "hello"), make_message(1, "is this a bug?"), make_message(2, "thanks")])
+    cache = ConversationContextCache(store, IntentDetector(), max_turns=2)
+    
+    context = await cache.get("test", "user123")
+    assert [turn.id for turn in context.turns] == ["msg-1", "msg-2"]
+    assert context.turns[0].intents == ['question', 'complaint']
+    assert context.last_intent == 'thanks'
+    
+    await cache.record(make_message(3, "goodbye"), ['goodbye'])
+    await cache.record(make_message(3, "goodbye"), ['goodbye'])
+    context = await cache.get("test", "user123")
+    
+    assert [turn.id for turn in context.turns] == ["msg-2", "msg-3"]
+    stats = cache.get_stats()
+    assert (stats['hits'], stats['misses']) == (3, 1)
+
+@pytest.mark.asyncio
+async def test_lru_eviction_and_ttl(store):
+    """Test the cache stays within its size and expires idle conversations."""
+    cache = ConversationContextCache(store, IntentDetector(), max_entries=2, ttl=60)
+    for sender in ("a", "b", "a", "c"):
+        await cache.get("test", sender)
+    
+    assert list(cache.entries) == [("test", "a"), ("test", "c")]
+    assert cache.get_stats()['evictions'] == 1
+    
+    cache.entries[("test", "a")].touched_at -= 61
+    await cache.get("test", "a")
+    
+    assert cache.get_stats()['expirations'] == 1
+    assert cache.get_stats()['misses'] == 4
+
+@pytest.mark.asyncio
+async def test_unindexed_store_warms_from_the_tail_only(tmp_path, monkeypatch):
+    """Test a miss on the log backend reads only the end of the log, across segments, never the whole history."""
+    store = MessageStore(
+        backend=SegmentedLog(str(tmp_path / "messages"), segment_max_bytes=1024),
+        legacy_path=str(tmp_path / "messages.json")
+    )
+    store.save_messages([make_message(0, "hello")])
+    for index in range(1, 40):
+        store.save_messages([make_message(index, "filler", sender_id=f"other{index}")])
+    store.save_messages([make_message(40, "is this a bug?"), make_message(41, "thanks")])
+    store.save_messages([make_message(42, "hi", sender_id="user1234")])
+    monkeypatch.setattr(store.backend, 'query', Mock(side_effect=AssertionError("scanned the log")))
+    
+    cache = ConversationContextCache(store, IntentDetector(), max_turns=5, scan_bytes=2048)
+    context = await cache.get("test", "user123")
+    assert [turn.id for turn in context.turns] == ["msg-40", "msg-41"]
+    assert context.last_intent == 'thanks'
+    assert len(store.backend.segment_numbers()) > 3
+    
+    # The whole log is within the budget: the first message is found too
+    cache = ConversationContextCache(store, IntentDetector(), max_turns=5, scan_bytes=1024 * 1024)
+    assert [turn.id for turn in (await cache.get("test", "user123")).turns] == ["msg-0", "msg-40", "msg-41"]
+    
+    cache = ConversationContextCache(store, IntentDetector(), scan_bytes=0)
+    assert list((await cache.get("test", "user123")).turns) == []
\ No newline at end of file
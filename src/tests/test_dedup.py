@@ -0,0 +1,153 @@
+"""Tests for the provider message ID dedup index."""
+import asyncio
+import pytest
+from datetime import datetime
+from ..core.dedup import BloomFilter, DedupIndex
+from ..core.persistence import Message
+from ..core.router import MessageRouter
+
+def test_recent_duplicates_are_caught_in_memory():
+    """Test a redelivery is reported once per channel, and channels do not collide."""
+    index = DedupIndex(max_entries=2)
+    
+    assert not index.seen('whatsapp', 'SM1')
+    # Still being handled: a redelivery now is a duplicate too
+    assert index.seen('whatsapp', 'SM1')
+    index.record('whatsapp', 'SM1')
+    assert index.seen('whatsapp', 'SM1')
+    for key in ('SM1', '42:7'):
+        assert not index.seen('telegram', key)
+        index.record('telegram', key)
+    
+    # Memory-only: the evicted key is forgotten
+    assert list(index.recent) == ['telegram:SM1', 'telegram:42:7']
+    assert not index.seen('whatsapp', 'SM1')
+    assert index.get_stats()['duplicates'] == {'whatsapp': 2}
+
+def test_released_keys_are_processed_again():
+    """Test a message that was never accepted is not treated as a duplicate later."""
+    index = DedupIndex()
+    
+    assert not index.seen('whatsapp', 'SM1')
+    index.release('whatsapp', 'SM1')
+    
+    assert not index.seen('whatsapp', 'SM1')
+    assert index.get_stats()['duplicates'] == {}
+
+def test_index_survives_restart_and_eviction(tmp_path):
+    """Test keys outside the memory window or from a previous run are still found."""
+    path = str(tmp_path / "dedup.db")
+    index = DedupIndex(path, max_entries=1)
+    for uid in range(3):
+        index.seen('email', f"1:{uid}")
+        index.record('email', f"1:{uid}")
+    # Claimed but never handled before the restart
+    index.seen('email', "1:3")
+    
+    assert index.seen('email', "1:0")
+    assert index.get_stats()['duplicates_persistent'] == 1
+    index.close()
+    
+    reopened = DedupIndex(path, max_entries=2)
+    assert list(reopened.recent) == ['email:1:1', 'email:1:2']
+    assert reopened.seen('email', "1:0")
+    assert not reopened.seen('email', "1:3")
+    assert not reopened.seen('email', "2:1")
+
+def test_old_keys_are_pruned(tmp_path):
+    """Test rows older than the retention window are deleted."""
+    index = DedupIndex(str(tmp_path / "dedup.db"), max_entries=1, retention=0, prune_every=2)
+    index.record('whatsapp', 'SM1')
+    index.record('whatsapp', 'SM2')
+    
+    assert index._conn.execute("SELECT key FROM seen").fetchall() == [('whatsapp:SM2',)]
+
+def test_bloom_filter_has_no_false_negatives():
+    """Test every added key is found and few absent ones are."""
+    bloom = BloomFilter(1000)
+    for i in range(1000):
+        bloom.add(f"telegram:{i}")
+    
+    assert all(f"telegram:{i}" in bloom for i in range(1000))
+    assert sum(f"whatsapp:{i}" in bloom for i in range(1000)) < 50
+
+def test_new_ids_skip_the_database(tmp_path):
+    """Test SQLite is only queried for a key the filter says may be stored."""
+    path = str(tmp_path / "dedup.db")
+    index = DedupIndex(path, max_entries=1)
+    index.seen('email', "1:0")
+    index.record('email', "1:0")
+    index.close()
+    
+    reopened = DedupIndex(path, max_entries=1)
+    reopened.recent.clear()
+    queries = []
+    reopened._conn.set_trace_callback(queries.append)
+    for uid in range(1, 50):
+        assert not reopened.seen('email', f"1:{uid}")
+    assert queries == []
+    assert reopened.get_stats()['lookups_skipped'] == 49
+    
+    assert reopened.seen('email', "1:0")
+    assert len(queries) == 1
+
+@pytest.mark.asyncio
+async def test_started_index_writes_in_batches_off_the_loop(tmp_path):
+    """Test recorded keys are held in memory, then written together; close writes the rest."""
+    path = str(tmp_path / "dedup.db")
+    index = DedupIndex(path, flush_interval=0.02)
+    index.start()
+    for i in range(10):
+        index.seen('whatsapp', f"SM{i}")
+        index.record('whatsapp', f"SM{i}")
+    
+    assert index.get_stats()['unwritten'] == 10
+    assert index.seen('whatsapp', "SM3")
+    for _ in range(100):
+        await asyncio.sleep(0.01)
+        if not index.get_stats()['unwritten']:
+            break
+    assert index._conn.execute("SELECT COUNT(*) FROM seen").fetchone() == (10,)
+    
+    index.record('whatsapp', "SM10")
+    index.close()
+    assert DedupIndex(path).seen('whatsapp', "SM10")
+
+@pytest.mark.asyncio
+async def test_router_drops_redelivered_messages(tmp_path):
+    """Test only the first delivery of a provider ID reaches the ingress queue."""
+    router = MessageRouter()
+    router.dedup = DedupIndex(str(tmp_path / "dedup.db"))
+    
+    def delivery(message_id):
+        return Message(id=message_id, channel="whatsapp", sender_id="+15550001", sender_name="Ann",
+                       text="hi", received_at=datetime.now(), metadata={'provider_id': 'SM123'})
+    
+    assert await router.enqueue(delivery("a"))
+    assert await router.enqueue(delivery("b"))
+    
+    assert router.ingress.get_stats()['depth'] == 1
+    assert router.get_stats()['dedup']['duplicates'] == {'whatsapp': 1}
+    router.stop()
+
+@pytest.mark.asyncio
+async def test_rejected_and_dropped_messages_are_not_recorded(monkeypatch):
+    """Test a redelivery of a message turned away by backpressure is queued again."""
+    router = MessageRouter()
+    router.ingress.maxsize = 1
+    router.ingress.channel_policies = {'whatsapp': 'reject', 'telegram': 'drop_oldest'}
+    
+    def delivery(channel, provider_id):
+        return Message(id=provider_id, channel=channel, sender_id="+15550001", sender_name="Ann",
+                       text="hi", received_at=datetime.now(), metadata={'provider_id': provider_id})
+    
+    assert await router.enqueue(delivery('telegram', 'T1'))
+    assert await router.enqueue(delivery('telegram', 'T2'))
+    assert not await router.enqueue(delivery('whatsapp', 'SM1'))
+    
+    # T1 was dropped and SM1 rejected, so neither counts as seen
+    assert await router.enqueue(delivery('telegram', 'T1'))
+    assert router.ingress.get_stats()['dropped'] == {'telegram': 2}
+    assert not router.dedup.seen('whatsapp', 'SM1')
+    assert router.dedup.get_stats()['duplicates'] == {}
+    router.stop()
\ No newline at end of file
@@ -1,74 +1,301 @@
 """Tests for email connector."""
+import asyncio
+import json
+import time
 import pytest
-from unittest.mock import Mock, patch, MagicMock
+from unittest.mock import AsyncMock, Mock, patch, MagicMock
+from imapclient.response_parser import parse_fetch_response
+from ..connectors import email_connector as email_module
 from ..connectors.email_connector import EmailConnector
 from ..config import config
+from .imap_server import StandInIMAPServer
+
+@pytest.fixture(autouse=True)
+def checkpoint_path(tmp_path, monkeypatch):
+    """Keep each test's sync checkpoint out of the shared message store."""
+    path = str(tmp_path / 'email_checkpoint.json')
+    monkeypatch.setattr(config, 'email_checkpoint_path', path)
+    return path
 
 @pytest.fixture
 def email_connector():
     """Create an email connector for testing."""
     return EmailConnector()
 
+@pytest.fixture
+def mock_imap():
+    """Patch the IMAP client used by the connector."""
+    with patch.object(email_module, 'IMAPClient') as mock_imap:
+        mock_imap.return_value.has_capability.return_value = False
+        mock_imap.return_value.select_folder.return_value = {b'UIDVALIDITY': 1, b'UIDNEXT': 1}
+        yield mock_imap
+
+PLAIN_TEXT = (b'TEXT', b'PLAIN', (b'CHARSET', b'utf-8'), None, None, b'7BIT', 17, 1, None, None, None, None)
+
+def make_fetch_data(mailbox: bytes, subject: bytes = b'Test Subject', structure=PLAIN_TEXT):
+    envelope = Mock()
+    envelope.from_ = [Mock()]
+    envelope.from_[0].mailbox = mailbox
+    envelope.from_[0].host = b'example.com'
+    envelope.from_[0].name = b'Test User'
+    envelope.subject = subject
+    return {b'ENVELOPE': envelope, b'BODYSTRUCTURE': structure}
+
+def serve_fetch(client, structures, payloads):
+    """Answer the structure FETCH and then the partial text FETCHes."""
+    def fetch(ids, items):
+        if items == ['ENVELOPE', 'BODYSTRUCTURE']:
+            return {msg_id: structures[msg_id] for msg_id in ids}
+        key = items[0].replace('.PEEK', '').split('<')[0] + '<0>'
+        return {msg_id: {key.encode(): payloads[msg_id]} for msg_id in ids}
+    client.fetch.side_effect = fetch
+
 @pytest.mark.asyncio
-async def test_send_message(email_connector):
+async def test_send_message(monkeypatch):
     """Test sending email message."""
+    monkeypatch.setattr(config, 'email_user', 'agent@example.com')
+    email_connector = EmailConnector()
+    
     with patch('smtplib.SMTP') as mock_smtp:
-        mock_server = MagicMock()
-        mock_smtp.return_value.__enter__.return_value = mock_server
+        mock_server = mock_smtp.return_value
         
         await email_connector.send_message("test@example.com", "Test message")
+        await email_connector.send_message("other@example.com", "Second message")
         
+        # Both messages go over one authenticated session
+        mock_smtp.assert_called_once()
         mock_server.starttls.assert_called_once()
         mock_server.login.assert_called_once()
-        mock_server.send_message.assert_called_once()
+        assert mock_server.send_message.call_count == 2
 
 @pytest.mark.asyncio
-async def test_check_emails():
+async def test_check_emails(mock_imap):
     """Test checking for new emails."""
     email_connector = EmailConnector()
+    mock_client = mock_imap.return_value
     
-    with patch('imapclient.IMAPClient') as mock_imap:
-        mock_client = MagicMock()
-        mock_imap.return_value.__enter__.return_value = mock_client
-        
-        # Mock empty inbox
-        mock_client.search.return_value = []
-        
-        await email_connector.check_emails()
-        
-        mock_client.login.assert_called_once()
-        mock_client.select_folder.assert_called_once_with('INBOX')
-        mock_client.search.assert_called_once_with('UNSEEN')
+    # Mock empty inbox
+    mock_client.search.return_value = []
+    
+    await email_connector.check_emails()
+    
+    mock_client.login.assert_called_once()
+    mock_client.select_folder.assert_called_once_with('INBOX')
+    mock_client.search.assert_called_once_with('UNSEEN')
+    mock_client.fetch.assert_not_called()
 
 @pytest.mark.asyncio
-async def test_check_emails_with_messages():
+async def test_check_emails_with_messages(mock_imap):
     """Test checking emails when messages are present."""
     email_connector = EmailConnector()
     mock_router = Mock()
-    mock_router.route_message = Mock()
+    mock_router.enqueue = AsyncMock()
     email_connector.router = mock_router
+    mock_client = mock_imap.return_value
     
-    with patch('imapclient.IMAPClient') as mock_imap:
-        mock_client = MagicMock()
-        mock_imap.return_value.__enter__.return_value = mock_client
-        
-        # Mock message data
-        mock_client.search.return_value = [1]
-        mock_envelope = Mock()
-        mock_envelope.from_ = [Mock()]
-        mock_envelope.from_[0].mailbox = b'test'
-        mock_envelope.from_[0].host = b'example.com'
-        mock_envelope.from_[0].name = b'Test User'
-        mock_envelope.subject = b'Test Subject'
-        
-        mock_client.fetch.return_value = {
-            1: {
-                b'ENVELOPE': mock_envelope,
-                b'BODY[TEXT]': b'Test message body'
-            }
-        }
-        
-        await email_connector.check_emails()
-        
-        # Verify message was processed
-        assert mock_router.route_message.called
\ No newline at end of file
+    # Mock message data
+    mock_client.search.return_value = [1, 2]
+    serve_fetch(mock_client, {1: make_fetch_data(b'first'), 2: make_fetch_data(b'second')},
+                {1: b'Test message body', 2: b'Another body'})
+    
+    await email_connector.check_emails()
+    
+    # Structure for every message in one round trip, then the text parts in another
+    assert [c.args for c in mock_client.fetch.call_args_list] == [
+        ([1, 2], ['ENVELOPE', 'BODYSTRUCTURE']),
+        ([1, 2], [f'BODY.PEEK[1]<0.{config.email_max_text_bytes}>'])
+    ]
+    assert mock_router.enqueue.call_count == 2
+    assert mock_router.enqueue.call_args_list[0].args[0].sender_id == 'first@example.com'
+    assert mock_router.enqueue.call_args_list[0].args[0].text == 'Test message body'
+    mock_client.add_flags.assert_called_once_with([1, 2], [b'\\Seen'])
+
+@pytest.mark.asyncio
+async def test_session_is_reused(mock_imap):
+    """Test that repeated checks share one logged-in session."""
+    email_connector = EmailConnector()
+    mock_imap.return_value.search.return_value = []
+    
+    await email_connector.check_emails()
+    await email_connector.check_emails()
+    
+    mock_imap.assert_called_once()
+    mock_imap.return_value.login.assert_called_once()
+
+@pytest.mark.asyncio
+async def test_wait_for_mail_uses_idle(mock_imap):
+    """Test IDLE is used when the server supports it."""
+    email_connector = EmailConnector()
+    mock_client = mock_imap.return_value
+    mock_client.has_capability.return_value = True
+    mock_client.idle_check.return_value = [(3, b'EXISTS')]
+    await email_connector.connect()
+    
+    assert await email_connector.wait_for_mail()
+    
+    mock_client.idle.assert_called_once()
+    mock_client.idle_done.assert_called_once()
+    mock_client.noop.assert_not_called()
+
+@pytest.mark.asyncio
+async def test_idle_timeout_syncs_and_stop_ends_idle(mock_imap, monkeypatch):
+    """Test a quiet IDLE still triggers a sync, and stopping ends IDLE without waiting out the timeout."""
+    email_connector = EmailConnector()
+    mock_client = mock_imap.return_value
+    mock_client.has_capability.return_value = True
+    mock_client.idle_check.side_effect = lambda timeout: time.sleep(min(timeout, 0.01)) or []
+    await email_connector.connect()
+    email_connector.running = True
+    
+    monkeypatch.setattr(config, 'email_idle_timeout', 0.05)
+    assert await email_connector.wait_for_mail()
+    
+    monkeypatch.setattr(config, 'email_idle_timeout', 60)
+    waiting = asyncio.create_task(email_connector.wait_for_mail())
+    await asyncio.sleep(0.05)
+    email_connector.running = False
+    assert not await asyncio.wait_for(waiting, 1.0)
+    assert mock_client.idle_done.call_count == 2
+
+@pytest.mark.asyncio
+async def test_wait_for_mail_falls_back_to_noop(mock_imap, monkeypatch):
+    """Test NOOP polling when the server lacks IDLE."""
+    monkeypatch.setattr(config, 'email_poll_interval', 0)
+    email_connector = EmailConnector()
+    mock_client = mock_imap.return_value
+    mock_client.has_capability.return_value = False
+    mock_client.noop.return_value = (b'NOOP completed', [])
+    await email_connector.connect()
+    
+    assert not await email_connector.wait_for_mail()
+    
+    mock_client.idle.assert_not_called()
+    mock_client.noop.assert_called_once()
+
+@pytest.mark.asyncio
+async def test_attachments_are_referenced_not_downloaded(mock_imap):
+    """Test only the text part is fetched and attachments become IMAP references."""
+    structure = parse_fetch_response([
+        b'1 (UID 7 BODYSTRUCTURE ((("TEXT" "PLAIN" ("CHARSET" "utf-8") NIL NIL "QUOTED-PRINTABLE" 40 2 '
+        b'NIL NIL NIL NIL)("TEXT" "HTML" ("CHARSET" "utf-8") NIL NIL "7BIT" 300 8 NIL NIL NIL NIL) '
+        b'"ALTERNATIVE" ("BOUNDARY" "inner") NIL NIL NIL)("APPLICATION" "PDF" ("NAME" "report.pdf") NIL '
+        b'NIL "BASE64" 20000000 NIL ("ATTACHMENT" ("FILENAME" "report.pdf")) NIL NIL) "MIXED" '
+        b'("BOUNDARY" "outer") NIL NIL NIL))'
+    ], uid_is_key=True)[7][b'BODYSTRUCTURE']
+    email_connector = EmailConnector()
+    email_connector.router = Mock(enqueue=AsyncMock())
+    mock_client = mock_imap.return_value
+    mock_client.search.return_value = [7]
+    serve_fetch(mock_client, {7: make_fetch_data(b'jane', structure=structure)},
+                {7: b'Please see the attached report, caf=C3=A9.'})
+    
+    await email_connector.check_emails()
+    
+    assert mock_client.fetch.call_args_list[1].args == ([7], [f'BODY.PEEK[1.1]<0.{config.email_max_text_bytes}>'])
+    message = email_connector.router.enqueue.call_args.args[0]
+    assert message.text == 'Please see the attached report, café.'
+    assert message.attachments == [f'imap://{config.email_imap_host}/INBOX/;UID=7/;SECTION=2']
+    assert message.metadata['attachments'] == [
+        {'filename': 'report.pdf', 'content_type': 'application/pdf', 'size': 20000000}
+    ]
+@pytest.fixture
+def imap_server(monkeypatch):
+    """Run the stand-in IMAP server and point the connector at it."""
+    server = StandInIMAPServer().start()
+    monkeypatch.setattr(config, 'email_imap_host', '127.0.0.1')
+    monkeypatch.setattr(config, 'email_imap_port', server.port)
+    monkeypatch.setattr(config, 'email_imap_ssl', False)
+    monkeypatch.setattr(config, 'email_user', 'agent@example.com')
+    monkeypatch.setattr(config, 'email_password', 'secret')
+    yield server
+    server.stop()
+
+async def sync_once(server) -> list:
+    """Run one connector session against ``server``; return the routed senders."""
+    connector = EmailConnector()
+    connector.router = Mock(enqueue=AsyncMock())
+    await connector.check_emails()
+    await connector.disconnect()
+    return [c.args[0].sender_id for c in connector.router.enqueue.call_args_list]
+
+@pytest.mark.asyncio
+async def test_incremental_sync_resumes_from_checkpoint(imap_server, checkpoint_path):
+    """Test a restart fetches only mail that arrived since the saved checkpoint."""
+    imap_server.add_message('old@example.com', 'Read', 'Already handled', flags={'\\Seen'})
+    imap_server.add_message('first@example.com', 'Hi', 'Hello there')
+    
+    # First run: no checkpoint, so the unread mail is taken once
+    assert await sync_once(imap_server) == ['first@example.com']
+    assert imap_server.commands_named('UID SEARCH') == ['UID SEARCH UNSEEN']
+    with open(checkpoint_path) as f:
+        assert json.load(f)['last_uid'] == 2
+    
+    # Nothing arrived: UIDNEXT shows no new UID, so no search at all
+    imap_server.commands.clear()
+    assert await sync_once(imap_server) == []
+    assert imap_server.commands_named('UID SEARCH') == []
+    
+    # New mail is found by UID even if another client already read it
+    uid = imap_server.add_message('second@example.com', 'Again', 'Another one')
+    imap_server.set_flags(uid, {'\\Seen'})
+    imap_server.commands.clear()
+    assert await sync_once(imap_server) == ['second@example.com']
+    assert imap_server.commands_named('UID SEARCH') == ['UID SEARCH UID 3:*']
+    assert imap_server.commands_named('UID FETCH')[0].startswith('UID FETCH 3 ')
+
+@pytest.mark.asyncio
+async def test_incremental_sync_skips_stale_highest_uid(imap_server):
+    """Test "n:*" matching the last seen UID does not refetch it."""
+    imap_server.add_message('first@example.com', 'Hi', 'Hello there')
+    connector = EmailConnector()
+    connector.router = Mock(enqueue=AsyncMock())
+    await connector.check_emails()
+    imap_server.commands.clear()
+    
+    # Later checks in the session search by UID; the server still answers with UID 1
+    await connector.check_emails()
+    await connector.disconnect()
+    
+    assert connector.router.enqueue.call_count == 1
+    assert imap_server.commands_named('UID SEARCH') == ['UID SEARCH UID 2:*']
+    assert imap_server.commands_named('UID FETCH') == []
+
+@pytest.mark.asyncio
+async def test_uidvalidity_change_resets_checkpoint(imap_server, checkpoint_path):
+    """Test a recreated mailbox is resynced from its unread mail."""
+    imap_server.add_message('first@example.com', 'Hi', 'Hello there')
+    assert await sync_once(imap_server) == ['first@example.com']
+    
+    imap_server.recreate_mailbox(uidvalidity=2)
+    imap_server.add_message('second@example.com', 'Again', 'Another one')
+    imap_server.commands.clear()
+    assert await sync_once(imap_server) == ['second@example.com']
+    assert imap_server.commands_named('UID SEARCH') == ['UID SEARCH UNSEEN']
+    with open(checkpoint_path) as f:
+        assert json.load(f)['uidvalidity'] == 2
+
+@pytest.mark.asyncio
+async def test_rejected_mail_is_left_for_the_next_sync(imap_server, checkpoint_path):
+    """Test mail the router refuses stays unseen and the checkpoint stops before it."""
+    imap_server.add_message('first@example.com', 'Hi', 'Hello there')
+    assert await sync_once(imap_server) == ['first@example.com']
+    for sender in ('second@example.com', 'third@example.com', 'fourth@example.com'):
+        imap_server.add_message(sender, 'Hi', 'Hello there')
+    
+    # The queue accepts one message, then fills up
+    connector = EmailConnector()
+    connector.router = Mock(enqueue=AsyncMock(side_effect=[True, False]))
+    await connector.check_emails()
+    assert connector.backlog
+    assert connector.router.enqueue.call_count == 2
+    with open(checkpoint_path) as f:
+        assert json.load(f)['last_uid'] == 2
+    
+    # The next sync picks up from the first refused message
+    connector.router.enqueue = AsyncMock(return_value=True)
+    await connector.check_emails()
+    await connector.disconnect()
+    assert [c.args[0].sender_id for c in connector.router.enqueue.call_args_list] == [
+        'third@example.com', 'fourth@example.com'
+    ]
+    assert not connector.backlog
\ No newline at end of file
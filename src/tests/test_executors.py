@@ -0,0 +1,74 @@
+"""Tests for blocking-I/O executors."""
+import asyncio
+import threading
+import time
+import pytest
+from ..utils.executors import BlockingPool, ExecutorRegistry, LoopLagMonitor
+
+@pytest.mark.asyncio
+async def test_run_returns_result_off_the_loop():
+    """Test calls run in a pool thread and return their result."""
+    pool = BlockingPool('test', max_workers=2)
+    
+    name = await pool.run(lambda: threading.current_thread().name)
+    
+    assert name.startswith('test-io')
+    assert pool.get_stats()['completed'] == 1
+    pool.shutdown()
+
+@pytest.mark.asyncio
+async def test_pool_is_bounded_and_reports_queue_wait():
+    """Test calls beyond max_workers wait in the queue."""
+    pool = BlockingPool('test', max_workers=1)
+    
+    await asyncio.gather(*(pool.run(time.sleep, 0.02) for _ in range(3)))
+    
+    stats = pool.get_stats()
+    assert stats['completed'] == 3
+    assert stats['wait_max'] >= 0.03
+    assert stats['queued'] == 0 and stats['active'] == 0
+    pool.shutdown()
+
+@pytest.mark.asyncio
+async def test_timeout_cancels_queued_call():
+    """Test a timed-out call that never started is dropped from the queue."""
+    pool = BlockingPool('test', max_workers=1)
+    calls = []
+    blocker = asyncio.ensure_future(pool.run(time.sleep, 0.1))
+    await asyncio.sleep(0)
+    
+    with pytest.raises(asyncio.TimeoutError):
+        await pool.run(calls.append, 1, timeout=0.01)
+    await blocker
+    
+    assert calls == []
+    assert pool.get_stats()['timed_out'] == 1
+    assert pool.get_stats()['queued'] == 0
+    pool.shutdown()
+
+@pytest.mark.asyncio
+async def test_registry_creates_pools_per_channel():
+    """Test each channel gets its own pool with its configured size."""
+    registry = ExecutorRegistry(default_workers=3, pool_sizes={'email_imap': 1})
+    
+    await registry.run('email_imap', int, '1')
+    await registry.run('whatsapp', int, '2')
+    
+    assert registry.get('email_imap').max_workers == 1
+    assert registry.get('whatsapp').max_workers == 3
+    assert set(registry.get_stats()) == {'email_imap', 'whatsapp'}
+    registry.shutdown()
+
+@pytest.mark.asyncio
+async def test_lag_monitor_detects_blocked_loop():
+    """Test that blocking the loop is reported as a stall."""
+    monitor = LoopLagMonitor(interval=0.01, threshold=0.02)
+    monitor.start()
+    await asyncio.sleep(0.02)
+    
+    time.sleep(0.1)
+    await asyncio.sleep(0.03)
+    monitor.stop()
+    
+    assert monitor.get_stats()['stalls'] >= 1
+    assert monitor.get_stats()['max_lag'] >= 0.05
\ No newline at end of file
@@ -0,0 +1,63 @@
+"""Tests for the webhook HTTP server."""
+import asyncio
+import pytest
+import pytest_asyncio
+from ..utils.http_server import HTTPResponse, HTTPServer
+
+async def read_response(reader):
+    head = await reader.readuntil(b'\r\n\r\n')
+    lines = head.decode().split('\r\n')
+    headers = dict(line.split(': ', 1) for line in lines[1:] if line)
+    body = await reader.readexactly(int(headers['Content-Length']))
+    return int(lines[0].split(' ')[1]), headers, body
+
+@pytest_asyncio.fixture
+async def server():
+    """Start an echo server on a free port."""
+    async def echo(request):
+        return HTTPResponse(200, request.body + request.query.encode())
+    
+    http_server = HTTPServer('127.0.0.1', 0)
+    http_server.route('POST', '/echo', echo)
+    await http_server.start()
+    yield http_server
+    http_server.close()
+
+@pytest.mark.asyncio
+async def test_keep_alive_serves_several_requests(server):
+    """Test one connection carries several requests, including pipelined ones."""
+    reader, writer = await asyncio.open_connection('127.0.0.1', server.port)
+    request = b'POST /echo?x=1 HTTP/1.1\r\nHost: test\r\nContent-Length: 5\r\n\r\nhello'
+    writer.write(request + request)
+    
+    responses = [await read_response(reader) for _ in range(2)]
+    writer.close()
+    
+    assert [(status, body) for status, _, body in responses] == [(200, b'hellox=1')] * 2
+    assert responses[0][1]['Connection'] == 'keep-alive'
+    assert server.get_stats()['requests'] == 2
+    assert server.total_connections == 1
+
+@pytest.mark.asyncio
+async def test_connection_close_and_errors(server):
+    """Test unknown paths, wrong methods, bad lengths and oversized requests get the right status."""
+    server.max_body_size = 10
+    server.body_timeout = 0.05
+    cases = [
+        (b'GET /missing HTTP/1.1\r\nConnection: close\r\n\r\n', 404),
+        (b'GET /echo HTTP/1.1\r\nConnection: close\r\n\r\n', 405),
+        (b'POST /echo HTTP/1.1\r\nContent-Length: 100\r\n\r\n', 413),
+        (b'garbage\r\n\r\n', 400),
+        (b'POST /echo HTTP/1.1\r\nContent-Length: -1\r\n\r\n', 400),
+        (b'POST /echo HTTP/1.1\r\nX-Padding: ' + b'x' * server.max_header_size + b'\r\n\r\n', 431),
+        (b'POST /echo HTTP/1.1\r\nContent-Length: 5\r\n\r\nhe', 408)
+    ]
+    for request, expected in cases:
+        reader, writer = await asyncio.open_connection('127.0.0.1', server.port)
+        writer.write(request)
+        status, headers, _ = await read_response(reader)
+        assert (status, headers['Connection']) == (expected, 'close')
+        assert await reader.read() == b''
+        writer.close()
+    
+    assert server.get_stats()['responses'] == {404: 1, 405: 1, 413: 1, 400: 2, 431: 1, 408: 1}
\ No newline at end of file
@@ -0,0 +1,70 @@
+"""Tests for the ingress queue."""
+import asyncio
+import pytest
+from datetime import datetime
+from ..core.ingress import IngressQueue
+from ..core.persistence import Message
+
+def make_message(index: int, channel: str = "test") -> Message:
+    return Message(
+        id=f"msg-{index}",
+        channel=channel,
+        sender_id="user123",
+        sender_name="Test User",
+        text="Hello",
+        received_at=datetime.now()
+    )
+
+@pytest.mark.asyncio
+async def test_fifo_order():
+    """Test messages come out in the order they were queued."""
+    queue = IngressQueue(maxsize=10)
+    for i in range(3):
+        await queue.put(make_message(i))
+    
+    ids = [(await queue.get()).id for _ in range(3)]
+    
+    assert ids == ["msg-0", "msg-1", "msg-2"]
+    assert queue.get_stats()['max_depth'] == 3
+
+@pytest.mark.asyncio
+async def test_reject_policy():
+    """Test that a full queue rejects messages on reject channels."""
+    queue = IngressQueue(maxsize=1, channel_policies={'test': 'reject'})
+    
+    assert await queue.put(make_message(1))
+    assert not await queue.put(make_message(2))
+    assert queue.get_stats()['rejected'] == {'test': 1}
+
+@pytest.mark.asyncio
+async def test_drop_oldest_policy_drops_same_channel():
+    """Test drop_oldest evicts the channel's oldest queued message."""
+    queue = IngressQueue(maxsize=2, channel_policies={'telegram': 'drop_oldest'})
+    await queue.put(make_message(1, channel="email"))
+    await queue.put(make_message(2, channel="telegram"))
+    
+    assert await queue.put(make_message(3, channel="telegram"))
+    
+    ids = [(await queue.get()).id for _ in range(2)]
+    assert ids == ["msg-1", "msg-3"]
+    assert queue.get_stats()['dropped'] == {'telegram': 1}
+
+@pytest.mark.asyncio
+async def test_block_policy_waits_for_space():
+    """Test that a blocking put resumes once a consumer makes room."""
+    queue = IngressQueue(maxsize=1)
+    await queue.put(make_message(1))
+    
+    put_task = asyncio.create_task(queue.put(make_message(2)))
+    await asyncio.sleep(0.01)
+    assert not put_task.done()
+    
+    assert (await queue.get()).id == "msg-1"
+    assert await put_task
+    assert (await queue.get()).id == "msg-2"
+    assert queue.get_stats()['blocked'] == {'test': 1}
+
+def test_unknown_policy_is_rejected():
+    """Test configuration errors surface at construction time."""
+    with pytest.raises(ValueError):
+        IngressQueue(default_policy='spill')
\ No newline at end of file
@@ -0,0 +1,76 @@
+"""Tests for metrics collection and export."""
+import asyncio
+import json
+import pytest
+from ..utils.metrics import Histogram, MetricsRegistry, create_metrics_server
+
+def test_histogram_buckets_and_quantiles():
+    """Test observations land in the first bucket whose bound covers them."""
+    histogram = Histogram(buckets=(0.001, 0.01, 0.1))
+    for value in (0.0005, 0.001, 0.005, 0.05, 0.05, 5.0):
+        histogram.observe(value)
+    
+    assert histogram.counts == [2, 1, 2, 1]
+    assert histogram.count == 6
+    assert histogram.quantile(0.5) == 0.01
+    assert histogram.quantile(0.8) == 0.1
+    assert histogram.quantile(1.0) == float('inf')
+
+def test_registry_reuses_children_and_renders_prometheus():
+    """Test get-or-create lookups and the text exposition format."""
+    registry = MetricsRegistry()
+    sent = registry.counter('sent_total', 'Sent messages', channel='email')
+    assert registry.counter('sent_total', channel='email') is sent
+    sent.inc(3)
+    registry.histogram('stage_seconds', 'Stage time', buckets=(0.1, 1.0), stage='intent').observe(0.5)
+    
+    text = registry.render_prometheus()
+    
+    assert '# TYPE sent_total counter\nsent_total{channel="email"} 3\n' in text
+    assert 'stage_seconds_bucket{stage="intent",le="0.1"} 0' in text
+    assert 'stage_seconds_bucket{stage="intent",le="1.0"} 1' in text
+    assert 'stage_seconds_bucket{stage="intent",le="+Inf"} 1' in text
+    assert 'stage_seconds_count{stage="intent"} 1' in text
+    with pytest.raises(ValueError):
+        registry.histogram('sent_total')
+
+def test_merge_adds_changes_since_the_last_export():
+    """Test another registry's exports are merged as deltas, so repeated reports are not counted twice."""
+    worker, parent = MetricsRegistry(), MetricsRegistry()
+    sent = worker.counter('sent_total', 'Sent messages', channel='email')
+    stage = worker.histogram('stage_seconds', 'Stage time', buckets=(0.1, 1.0), stage='intent')
+    sent.inc(2)
+    stage.observe(0.05)
+    seen = parent.merge(worker.export())
+    sent.inc()
+    stage.observe(0.5)
+    parent.merge(worker.export(), seen)
+    
+    assert parent.counter('sent_total', channel='email').value == 3
+    merged = parent.histogram('stage_seconds', buckets=(0.1, 1.0), stage='intent')
+    assert merged.counts == [1, 1, 0] and merged.count == 2 and merged.sum == pytest.approx(0.55)
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint_serves_text_and_json():
+    """Test the endpoint serves both formats over HTTP."""
+    registry = MetricsRegistry()
+    registry.counter('received_total', channel='telegram').inc()
+    server = create_metrics_server(registry, '127.0.0.1', 0)
+    await server.start()
+    
+    async def get(path):
+        reader, writer = await asyncio.open_connection('127.0.0.1', server.port)
+        writer.write(f'GET {path} HTTP/1.1\r\nHost: test\r\nConnection: close\r\n\r\n'.encode())
+        response = await reader.read()
+        writer.close()
+        return response.split(b'\r\n\r\n', 1)
+    
+    try:
+        head, body = await get('/metrics')
+        assert head.startswith(b'HTTP/1.1 200')
+        assert b'received_total{channel="telegram"} 1' in body
+        
+        head, body = await get('/metrics.json')
+        assert json.loads(body)['received_total'] == [{'labels': {'channel': 'telegram'}, 'value': 1}]
+    finally:
+        server.close()
\ No newline at end of file
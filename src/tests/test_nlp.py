@@ -0,0 +1,89 @@
+"""Tests for intent detection."""
+import random
+import re
+import pytest
+from ..core.nlp import IntentDetector
+
+def reference_detect_intent(intent_patterns, text):
+    """The original per-pattern implementation, used as the oracle."""
+    text_lower = text.lower()
+    detected_intents = []
+    for intent, patterns in intent_patterns.items():
+        for pattern in patterns:
+            if re.search(pattern, text_lower):
+                detected_intents.append(intent)
+                break
+    return {
+        'primary_intent': detected_intents[0] if detected_intents else 'unknown',
+        'all_intents': detected_intents,
+        'confidence': 0.8 if detected_intents else 0.1
+    }
+
+VOCABULARY = [
+    'hello', 'hi', 'hey', 'good', 'morning', 'afternoon', 'what', 'how', 'when',
+    'where', 'why', 'who', 'please', 'can', 'could', 'would', 'you', 'problem',
+    'issue', 'error', 'bug', 'wrong', 'thank', 'thanks', 'appreciate', 'bye',
+    'goodbye', 'see', 'farewell', 'hiking', 'whatever', 'thankful', 'buggy',
+    'goodbyes', 'order', 'my', 'the', 'Hello', 'WHY', 'x', '42'
+]
+SEPARATORS = [' ', ' ', ' ', ', ', '. ', '? ', '! ', '\n', '-', '_', "'"]
+
+def random_texts(count, seed=1234):
+    rng = random.Random(seed)
+    texts = []
+    for _ in range(count):
+        words = [rng.choice(VOCABULARY) for _ in range(rng.randint(0, 12))]
+        texts.append(''.join(word + rng.choice(SEPARATORS) for word in words))
+    return texts
+
+HANDWRITTEN_TEXTS = [
+    "",
+    "Hello, can you help me? I have a problem with my order, thanks!",
+    "goodbye",
+    "good morning",
+    "good",
+    "see you later",
+    "hiking is fun",
+    "what?",
+    "Why is this WRONG",
+    "ok",
+    "thankful for the help",
+    "could you please see you",
+]
+
+@pytest.fixture
+def detector():
+    """Create an intent detector for testing."""
+    return IntentDetector()
+
+def test_matches_reference_on_default_table(detector):
+    """Differential test against the per-pattern implementation."""
+    for text in HANDWRITTEN_TEXTS + random_texts(2000):
+        assert detector.detect_intent(text) == reference_detect_intent(detector.intent_patterns, text), text
+
+def test_matches_reference_on_custom_table(detector):
+    """Overlapping keywords, literals and arbitrary regexes must behave as before."""
+    detector.intent_patterns['farewell_phrase'] = [r'\b(see you|you later)\b']
+    detector.intent_patterns['morning'] = [r'\bmorning\b']
+    detector.intent_patterns['good_word'] = [r'\bgood\b']
+    detector.intent_patterns['exclaim'] = [r'!', r'\bwow\b']
+    detector.intent_patterns['repeat'] = [r'\b(\w+) \1\b']
+    detector.intent_patterns['bare_alternation'] = [r'\bhik|ful\b']
+    texts = HANDWRITTEN_TEXTS + random_texts(2000, seed=99) + ["see you later", "good good", "wow!"]
+    for text in texts:
+        assert detector.detect_intent(text) == reference_detect_intent(detector.intent_patterns, text), text
+
+def test_detect_intents_batch(detector):
+    """Test the batch API returns one result per text, in order."""
+    texts = ["hello there", "is this a bug?", "nothing here"]
+    
+    results = detector.detect_intents(texts)
+    
+    assert [result['primary_intent'] for result in results] == ['greeting', 'question', 'unknown']
+    assert results[1]['all_intents'] == ['question', 'complaint']
+
+def test_extract_entities(detector):
+    """Test email and phone extraction."""
+    entities = detector.extract_entities("Mail me at jane@example.com or call 555-123-4567")
+    
+    assert entities == {'emails': ['jane@example.com'], 'phones': ['555-123-4567']}
\ No newline at end of file
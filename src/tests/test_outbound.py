@@ -0,0 +1,166 @@
+"""Tests for the outbound send scheduler."""
+import asyncio
+import time
+import pytest
+from ..core.outbound import OutboundScheduler, TokenBucket
+from ..utils.retry import RetryAfterError, RetryPolicy
+
+class RecordingConnector:
+    """Connector stand-in that records when each send happened."""
+    
+    def __init__(self, rate_limits=None, failures=None):
+        self.rate_limits = rate_limits
+        self.failures = list(failures or [])
+        self.sent = []
+    
+    async def send_message(self, recipient, text):
+        if self.failures:
+            raise self.failures.pop(0)
+        self.sent.append((recipient, text, time.monotonic()))
+
+async def wait_for_sends(connector, count, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while len(connector.sent) < count and time.monotonic() < deadline:
+        await asyncio.sleep(0.005)
+
+def test_token_bucket():
+    """Test the bucket allows a burst and then reports the refill delay."""
+    bucket = TokenBucket(rate=10, capacity=2)
+    now = bucket.updated
+    
+    for _ in range(2):
+        assert bucket.delay(now) == 0
+        bucket.take(now)
+    
+    assert bucket.delay(now) == pytest.approx(0.1)
+    assert bucket.delay(now + 0.11) == 0
+
+@pytest.mark.asyncio
+async def test_sends_inline_when_not_started():
+    """Test replies go straight to the connector before the scheduler starts."""
+    connector = RecordingConnector()
+    scheduler = OutboundScheduler({'test': connector})
+    
+    await scheduler.submit('test', 'user1', 'hi')
+    
+    assert [sent[:2] for sent in connector.sent] == [('user1', 'hi')]
+
+@pytest.mark.asyncio
+async def test_paces_to_global_rate():
+    """Test a burst beyond the bucket capacity is spread out at the configured rate."""
+    connector = RecordingConnector(rate_limits={'global': (50, 2)})
+    scheduler = OutboundScheduler({'test': connector})
+    scheduler.start()
+    
+    for i in range(6):
+        await scheduler.submit('test', f'user{i}', 'hi')
+    await wait_for_sends(connector, 6)
+    scheduler.stop()
+    
+    assert len(connector.sent) == 6
+    # Two sends go out in the burst, the other four at 50 msg/s
+    assert connector.sent[-1][2] - connector.sent[0][2] >= 0.07
+
+@pytest.mark.asyncio
+async def test_per_recipient_limit_keeps_order_and_serves_others():
+    """Test one busy recipient does not hold up the rest and its replies stay in order."""
+    connector = RecordingConnector(rate_limits={'per_recipient': (20, 1)})
+    scheduler = OutboundScheduler({'test': connector})
+    scheduler.start()
+    
+    for i in range(3):
+        await scheduler.submit('test', 'busy', f'reply {i}')
+    await scheduler.submit('test', 'other', 'hello')
+    await wait_for_sends(connector, 4)
+    scheduler.stop()
+    
+    assert [text for recipient, text, _ in connector.sent if recipient == 'busy'] == ['reply 0', 'reply 1', 'reply 2']
+    assert [recipient for recipient, _, _ in connector.sent][:2] == ['busy', 'other']
+
+@pytest.mark.asyncio
+async def test_retry_after_pauses_and_resends():
+    """Test a retry-after hint pauses the channel and the message is sent afterwards."""
+    connector = RecordingConnector(failures=[RetryAfterError(0.05)])
+    scheduler = OutboundScheduler({'test': connector})
+    scheduler.start()
+    
+    started = time.monotonic()
+    await scheduler.submit('test', 'user1', 'hi')
+    await wait_for_sends(connector, 1)
+    stats = scheduler.get_stats()['test']
+    scheduler.stop()
+    
+    assert [sent[:2] for sent in connector.sent] == [('user1', 'hi')]
+    assert connector.sent[0][2] - started >= 0.05
+    assert stats['retry_after_hints'] == 1
+    assert stats['sent'] == 1
+@pytest.mark.asyncio
+async def test_failed_send_is_retried_without_holding_up_others():
+    """Test a failure is retried from a timer, later replies to that recipient wait, others go out."""
+    connector = RecordingConnector(failures=[ConnectionError("reset by peer")])
+    scheduler = OutboundScheduler({'test': connector}, retry_policy=RetryPolicy(base_delay=0.05))
+    scheduler.start()
+    
+    await scheduler.submit('test', 'user1', 'first')
+    await scheduler.submit('test', 'user1', 'second')
+    await scheduler.submit('test', 'user2', 'hello')
+    await wait_for_sends(connector, 3)
+    stats = scheduler.get_stats()['test']
+    scheduler.stop()
+    
+    assert [sent[:2] for sent in connector.sent] == [('user2', 'hello'), ('user1', 'first'), ('user1', 'second')]
+    assert stats['retries']['scheduled'] == 1
+    assert stats['failed'] == 0
+
+@pytest.mark.asyncio
+async def test_open_circuit_sheds_sends_until_probe():
+    """Test the breaker stops calling a failing provider and probes it once after the timeout."""
+    connector = RecordingConnector(failures=[ConnectionError("down")] * 3)
+    scheduler = OutboundScheduler({'test': connector}, max_in_flight=1, retry_policy=RetryPolicy(max_attempts=0),
+                                  failure_threshold=2, reset_timeout=0.1)
+    scheduler.start()
+    
+    for i in range(5):
+        await scheduler.submit('test', f'user{i}', 'hi')
+    await asyncio.sleep(0.05)
+    # Two failures opened the circuit; the rest are held instead of sent
+    assert len(connector.failures) == 1
+    assert scheduler.get_stats()['test']['circuit'] == 'open'
+    assert scheduler.get_stats()['test']['queued'] == 3
+    
+    # The probe fails and reopens the circuit, the next probe succeeds and closes it
+    await wait_for_sends(connector, 2, timeout=1.0)
+    stats = scheduler.get_stats()['test']
+    scheduler.stop()
+    
+    assert len(connector.sent) == 2
+    assert stats['circuit'] == 'closed'
+
+@pytest.mark.asyncio
+async def test_drain_waits_for_send_tasks_and_stop_cancels_them():
+    """Test drain returns only once send tasks finish, and stop cancels those still running."""
+    release = asyncio.Event()
+    
+    class SlowConnector(RecordingConnector):
+        async def send_message(self, recipient, text):
+            await release.wait()
+            await super().send_message(recipient, text)
+    
+    scheduler = OutboundScheduler({'test': SlowConnector()})
+    scheduler.start()
+    await scheduler.submit('test', 'user1', 'hi')
+    assert not await scheduler.drain(0.05)
+    sends = set(scheduler.channels['test'].sends)
+    assert len(sends) == 1
+    
+    release.set()
+    assert await scheduler.drain(1.0)
+    assert not scheduler.channels['test'].sends
+    
+    release.clear()
+    await scheduler.submit('test', 'user2', 'hi')
+    await asyncio.sleep(0.01)
+    sends = set(scheduler.channels['test'].sends)
+    scheduler.stop()
+    await asyncio.sleep(0)
+    assert all(task.cancelled() for task in sends)
\ No newline at end of file
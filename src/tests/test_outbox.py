@@ -0,0 +1,221 @@
+"""Tests for the durable reply outbox."""
+import asyncio
+import threading
+import pytest
+from datetime import datetime
+from ..config import config
+from ..core.outbound import OutboundScheduler
+from ..core.outbox import Outbox
+from ..core.persistence import Message
+from ..core.router import MessageRouter
+from ..utils.metrics import metrics
+from ..utils.retry import RetryPolicy
+
+class FlakyConnector:
+    """Connector stand-in that fails while ``down`` is set and can stall sends."""
+    
+    def __init__(self, down=False, stall=None):
+        self.down = down
+        self.stall = stall
+        self.sent = []
+    
+    async def send_message(self, recipient, text):
+        if self.stall:
+            await self.stall.wait()
+        if self.down:
+            raise ConnectionError("provider unreachable")
+        self.sent.append((recipient, text))
+
+class StartingConnector(FlakyConnector):
+    """Connector stand-in that cannot send until its ``ready`` event is set."""
+    
+    def __init__(self):
+        super().__init__()
+        self.ready = asyncio.Event()
+    
+    async def start(self):
+        await asyncio.Future()
+
+def test_unacknowledged_replies_survive_a_crash(tmp_path):
+    """Test reopening the outbox without a clean close recovers pending replies in order."""
+    outbox = Outbox(str(tmp_path / "outbox"))
+    first = outbox.add('telegram', '42', 'one')
+    outbox.add('telegram', '42', 'two')
+    outbox.add('email', 'a@example.com', 'three')
+    outbox.ack(first)
+    outbox.flush()
+    
+    # No close(): the process died here
+    recovered = Outbox(str(tmp_path / "outbox"))
+    assert [entry['text'] for entry in recovered.unacknowledged()] == ['two', 'three']
+    assert recovered.get_stats()['recovered'] == 2
+
+def test_log_is_truncated_once_everything_is_acknowledged(tmp_path):
+    """Test a fully acknowledged outbox leaves no history behind."""
+    outbox = Outbox(str(tmp_path / "outbox"))
+    for i in range(3):
+        outbox.ack(outbox.add('telegram', '42', f'reply {i}'))
+    outbox.close()
+    
+    assert list(Outbox(str(tmp_path / "outbox")).log.iter_records()) == []
+
+def test_compaction_keeps_only_pending_replies(tmp_path):
+    """Test compacting with replies pending rewrites the log down to those replies."""
+    outbox = Outbox(str(tmp_path / "outbox"), compact_every=3)
+    kept = outbox.add('telegram', '42', 'kept')
+    for i in range(3):
+        outbox.ack(outbox.add('telegram', '42', f'reply {i}'))
+    outbox.flush()
+    
+    assert [record['id'] for record in outbox.log.iter_records()] == [kept]
+    assert len(outbox.log.segment_numbers()) == 1
+    later = outbox.add('email', 'a@example.com', 'later')
+    
+    # No close(): the rewritten log replays to the same pending replies
+    recovered = Outbox(str(tmp_path / "outbox"))
+    assert [entry['id'] for entry in recovered.unacknowledged()] == [kept, later]
+
+@pytest.mark.asyncio
+async def test_flush_async_compacts_off_the_loop_in_write_order(tmp_path):
+    """Test acks and compaction run in the worker thread, ordered with adds made after them."""
+    outbox = Outbox(str(tmp_path / "outbox"), compact_every=2)
+    kept = outbox.add('telegram', '42', 'kept')
+    for i in range(2):
+        outbox.ack(outbox.add('telegram', '42', f'reply {i}'))
+    threads = []
+    rewrite = outbox.log.rewrite
+    outbox.log.rewrite = lambda records: threads.append(threading.current_thread()) or rewrite(records)
+    
+    _, later = await asyncio.gather(outbox.flush_async(), outbox.add_async('email', 'a@example.com', 'later'))
+    
+    assert threads and threads[0] is not threading.current_thread()
+    recovered = Outbox(str(tmp_path / "outbox"))
+    assert [entry['id'] for entry in recovered.unacknowledged()] == [kept, later]
+
+@pytest.mark.asyncio
+async def test_add_async_writes_before_returning(tmp_path):
+    """Test a reply added from the event loop is on disk once ``add_async`` returns."""
+    outbox = Outbox(str(tmp_path / "outbox"), fsync_policy='always')
+    entry_id = await outbox.add_async('telegram', '42', 'hello')
+    
+    assert [record['id'] for record in Outbox(str(tmp_path / "outbox")).log.iter_records()] == [entry_id]
+
+@pytest.mark.asyncio
+async def test_unsent_replies_are_replayed_on_next_start(tmp_path):
+    """Test a reply the provider never confirmed is sent by the next run, once."""
+    stall = asyncio.Event()
+    outbox = Outbox(str(tmp_path / "outbox"))
+    scheduler = OutboundScheduler({'test': FlakyConnector(stall=stall)}, outbox=outbox)
+    scheduler.start()
+    await scheduler.submit('test', 'user1', 'hello')
+    assert not await scheduler.drain(0.1)
+    scheduler.stop()
+    stall.set()
+    
+    outbox = Outbox(str(tmp_path / "outbox"))
+    connector = FlakyConnector()
+    scheduler = OutboundScheduler({'test': connector}, outbox=outbox)
+    scheduler.start()
+    assert scheduler.replay() == 1
+    assert await scheduler.drain(1.0)
+    scheduler.stop()
+    
+    assert connector.sent == [('user1', 'hello')]
+    assert Outbox(str(tmp_path / "outbox")).unacknowledged() == []
+
+@pytest.mark.asyncio
+async def test_given_up_replies_are_dead_lettered(tmp_path):
+    """Test a reply whose retries ran out is acknowledged and counted, not kept for replay."""
+    dead_letters = metrics.counter('agent_replies_dead_lettered_total', channel='test')
+    before = dead_letters.value
+    outbox = Outbox(str(tmp_path / "outbox"))
+    connector = FlakyConnector(down=True)
+    # Give up at once rather than retrying
+    scheduler = OutboundScheduler({'test': connector}, outbox=outbox, retry_policy=RetryPolicy(max_attempts=0))
+    scheduler.start()
+    await scheduler.submit('test', 'user1', 'hello')
+    assert await scheduler.drain(1.0)
+    
+    assert scheduler.get_stats()['test']['failed'] == 1
+    assert dead_letters.value == before + 1
+    scheduler.stop()
+    assert connector.sent == []
+    assert Outbox(str(tmp_path / "outbox")).unacknowledged() == []
+
+@pytest.mark.asyncio
+async def test_outage_holds_replies_until_the_provider_recovers(tmp_path):
+    """Test an exhausted budget and an open breaker keep replies pending, and they go out after recovery."""
+    dead_letters = metrics.counter('agent_replies_dead_lettered_total', channel='test')
+    before = dead_letters.value
+    outbox = Outbox(str(tmp_path / "outbox"))
+    connector = FlakyConnector(down=True)
+    scheduler = OutboundScheduler({'test': connector}, outbox=outbox,
+                                  retry_policy=RetryPolicy(max_attempts=5, base_delay=0.01, max_delay=0.05),
+                                  failure_threshold=5, reset_timeout=0.05)
+    scheduler.start()
+    for i in range(20):
+        await scheduler.submit('test', f'user{i}', 'hello')
+    await asyncio.sleep(0.2)
+    
+    assert dead_letters.value == before
+    assert len(outbox.pending) == 20
+    assert scheduler.get_stats()['test']['retries']['over_budget'] > 0
+    
+    connector.down = False
+    assert await scheduler.drain(2.0)
+    scheduler.stop()
+    
+    assert sorted(recipient for recipient, _ in connector.sent) == sorted(f'user{i}' for i in range(20))
+    assert dead_letters.value == before
+    assert Outbox(str(tmp_path / "outbox")).unacknowledged() == []
+
+@pytest.mark.asyncio
+async def test_drain_respects_deadline(tmp_path, monkeypatch):
+    """Test shutdown waits for replies, and leaves those past the deadline in the outbox."""
+    monkeypatch.setattr(config, 'message_store_dir', str(tmp_path / "messages"))
+    stall = asyncio.Event()
+    connector = FlakyConnector(stall=stall)
+    router = MessageRouter()
+    router.register_connector('test', connector)
+    await router.start()
+    
+    await router.enqueue(Message(id="m1", channel="test", sender_id="user1", sender_name="Ann",
+                                 text="hello", received_at=datetime.now()))
+    assert not await router.drain(0.2)
+    stall.set()
+    assert await router.drain(2.0)
+    assert len(connector.sent) == 1
+    
+    # Stop before the stalled send of a second reply completes: it is kept for replay
+    stall.clear()
+    await router.enqueue(Message(id="m2", channel="test", sender_id="user1", sender_name="Ann",
+                                 text="hello again", received_at=datetime.now()))
+    assert not await router.drain(0.2)
+    router.stop()
+    assert len(Outbox(str(tmp_path / "messages" / "outbox")).unacknowledged()) == 1
+    stall.set()
+    await asyncio.sleep(0)
+
+@pytest.mark.asyncio
+async def test_replay_waits_for_the_connector_to_be_ready(tmp_path):
+    """Test replies from a previous run are resent only once their connector is ready."""
+    outbox = Outbox(str(tmp_path / "messages" / "outbox"))
+    outbox.add('test', 'user1', 'hello')
+    outbox.close()
+    connector = StartingConnector()
+    router = MessageRouter()
+    router.register_connector('test', connector)
+    task = asyncio.create_task(router.start())
+    
+    await asyncio.sleep(0.05)
+    assert connector.sent == []
+    connector.ready.set()
+    for _ in range(100):
+        if connector.sent:
+            break
+        await asyncio.sleep(0.01)
+    
+    router.stop()
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+    assert connector.sent == [('user1', 'hello')]
\ No newline at end of file
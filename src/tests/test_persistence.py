@@ -0,0 +1,198 @@
+"""Tests for message persistence."""
+import json
+import os
+import time
+import pytest
+from datetime import datetime, timedelta, timezone
+from ..core.persistence import Message, MessageStore
+from ..core import message_log
+from ..core.message_log import SegmentedLog
+from ..core.sqlite_store import SQLiteStorageBackend
+
+def make_message(index: int, channel: str = "test") -> Message:
+    return Message(
+        id=f"msg-{index}",
+        channel=channel,
+        sender_id=f"user{index % 3}",
+        sender_name="Test User",
+        text=f"Message number {index}",
+        received_at=datetime(2024, 1, 1, 12, 0, index % 60),
+        metadata={'index': index}
+    )
+
+def make_backend(kind: str, tmp_path):
+    if kind == 'sqlite':
+        return SQLiteStorageBackend(str(tmp_path / "messages.db"))
+    return SegmentedLog(str(tmp_path / "messages"))
+
+@pytest.fixture(params=['log', 'sqlite'])
+def store(request, tmp_path):
+    """Create a message store on each backend in a temporary directory."""
+    return MessageStore(
+        backend=make_backend(request.param, tmp_path),
+        legacy_path=str(tmp_path / "messages.json")
+    )
+
+def test_save_and_load_messages(store):
+    """Test that saved messages are read back in order."""
+    for i in range(5):
+        store.save_message(make_message(i))
+    
+    messages = store.load_messages()
+    
+    assert [msg['id'] for msg in messages] == [f"msg-{i}" for i in range(5)]
+    assert messages[0]['metadata'] == {'index': 0}
+
+def test_get_messages_by_channel(store):
+    """Test filtering messages by channel."""
+    store.save_message(make_message(1, channel="email"))
+    store.save_message(make_message(2, channel="telegram"))
+    store.save_message(make_message(3, channel="email"))
+    
+    messages = store.get_messages_by_channel("email")
+    
+    assert [msg['id'] for msg in messages] == ["msg-1", "msg-3"]
+
+def test_segment_rollover(tmp_path):
+    """Test that the log starts a new segment once the size limit is reached."""
+    log = SegmentedLog(str(tmp_path), segment_max_bytes=200, fsync_policy='never')
+    for i in range(20):
+        log.append({'id': i, 'text': 'x' * 50})
+    
+    assert len(log.segment_numbers()) > 1
+    assert [record['id'] for record in log.iter_records()] == list(range(20))
+
+def test_interval_fsync_covers_the_last_write_of_a_burst(tmp_path, monkeypatch):
+    """Test a write the interval policy did not sync is synced by a timer without a later append."""
+    synced = []
+    monkeypatch.setattr(message_log.os, 'fsync', synced.append)
+    log = SegmentedLog(str(tmp_path), fsync_policy='interval', fsync_interval=0.05)
+    log.append({'id': 1})
+    log.append({'id': 2})
+    # Other tests' logs may sync meanwhile; only this log's descriptor counts
+    fd = log._file.fileno()
+    assert fd not in synced
+    
+    time.sleep(0.15)
+    assert synced.count(fd) == 1
+    log.close()
+
+def test_reopen_appends_after_partial_write(tmp_path):
+    """Test that a torn last line is skipped and later appends still load."""
+    log = SegmentedLog(str(tmp_path), fsync_policy='always')
+    log.append({'id': 1})
+    log.close()
+    
+    segment = os.path.join(str(tmp_path), "segment-00000001.jsonl")
+    with open(segment, 'ab') as f:
+        f.write(b'{"id": 2, "tex')
+    
+    log = SegmentedLog(str(tmp_path), fsync_policy='always')
+    log.append({'id': 3})
+    
+    assert [record['id'] for record in log.iter_records()] == [1, 3]
+
+def test_migrates_legacy_json_file(tmp_path):
+    """Test one-shot migration from the old JSON array file."""
+    legacy_path = tmp_path / "messages.json"
+    legacy = [make_message(i).model_dump(mode='json') for i in range(3)]
+    legacy_path.write_text(json.dumps(legacy, indent=2))
+    
+    store = MessageStore(backend=make_backend('log', tmp_path), legacy_path=str(legacy_path))
+    store.save_message(make_message(3))
+    
+    assert [msg['id'] for msg in store.load_messages()] == ["msg-0", "msg-1", "msg-2", "msg-3"]
+    assert not legacy_path.exists()
+    assert (tmp_path / "messages.json.migrated").exists()
+    
+    # Reopening must not migrate the same records again
+    store = MessageStore(backend=make_backend('log', tmp_path), legacy_path=str(legacy_path))
+    assert len(store.load_messages()) == 4
+
+def test_get_messages_by_sender_with_pagination(store):
+    """Test sender queries are ordered by time and paginated."""
+    for i in range(9):
+        store.save_message(make_message(i))
+    
+    messages = store.get_messages_by_sender("user0", limit=2, offset=1)
+    
+    assert [msg['id'] for msg in messages] == ["msg-3", "msg-6"]
+
+def test_get_messages_in_range(store):
+    """Test time range queries include since and exclude until."""
+    for i in range(6):
+        store.save_message(make_message(i))
+    
+    messages = store.get_messages_in_range(
+        since=datetime(2024, 1, 1, 12, 0, 2),
+        until=datetime(2024, 1, 1, 12, 0, 4)
+    )
+    
+    assert [msg['id'] for msg in messages] == ["msg-2", "msg-3"]
+
+def test_utc_offsets_compare_alike(store):
+    """Test records and filters spelling UTC as 'Z' or '+00:00' compare the same way."""
+    records = []
+    for i in range(4):
+        record = make_message(i).to_record()
+        record['received_at'] += '+00:00'
+        records.append(record)
+    store.backend.append_many(records)
+    
+    expected = ["msg-1", "msg-2"]
+    assert [msg['id'] for msg in store.backend.query(
+        since='2024-01-01T12:00:01Z', until='2024-01-01T12:00:03Z')] == expected
+    assert [msg['id'] for msg in store.get_messages_in_range(
+        since=datetime(2024, 1, 1, 12, 0, 1, tzinfo=timezone.utc),
+        until=datetime(2024, 1, 1, 12, 0, 3, tzinfo=timezone.utc))] == expected
+    parsed = Message.from_record(dict(records[0], received_at='2024-01-01T12:00:00Z'))
+    assert parsed.received_at == datetime(2024, 1, 1, 12, 0, tzinfo=timezone.utc)
+
+def test_get_latest_per_conversation(store):
+    """Test the newest N messages are returned for every conversation."""
+    for i in range(9):
+        store.save_message(make_message(i))
+    
+    messages = store.get_latest_per_conversation(2)
+    
+    assert [msg['id'] for msg in messages] == ["msg-6", "msg-3", "msg-7", "msg-4", "msg-8", "msg-5"]
+
+def test_find_messages_by_metadata(store):
+    """Test metadata stays queryable."""
+    for i in range(4):
+        store.save_message(make_message(i))
+    
+    messages = store.find_messages_by_metadata('index', 2)
+    
+    assert [msg['id'] for msg in messages] == ["msg-2"]
+    assert messages[0]['metadata'] == {'index': 2}
+
+@pytest.mark.parametrize('received_at', [
+    datetime(2024, 1, 1, 12, 0, 0, 4500),
+    datetime(2024, 1, 1, tzinfo=timezone.utc),
+    datetime(2024, 1, 1, tzinfo=timezone(timedelta(hours=2)))
+])
+def test_trusted_message_and_record_round_trip(received_at):
+    """Test the fast paths agree with validation and model_dump, and round-trip exactly."""
+    fields = dict(id="msg-1", channel="telegram", sender_id="42", sender_name="Zoë",
+                  text="héllo", received_at=received_at, metadata={'chat_id': 42, 'sid': None})
+    validated = Message(**fields)
+    trusted = Message.trusted(**fields)
+    
+    assert trusted == validated
+    assert trusted.to_record() == validated.model_dump(mode='json')
+    assert Message.from_record(json.loads(json.dumps(trusted.to_record()))) == validated
+    
+    trusted.text = "changed"
+    assert trusted.model_dump()['text'] == "changed"
+
+def test_records_are_written_as_compact_json(store):
+    """Test stored records skip padding and keep non-ASCII text readable."""
+    message = Message.trusted("msg-1", "telegram", "42", "Zoë", "héllo", datetime(2024, 1, 1))
+    store.save_message(message)
+    
+    assert Message.from_record(store.load_messages()[0]) == message
+    if isinstance(store.backend, SegmentedLog):
+        with open(store.backend._segment_path(store.backend.segment_numbers()[0]), 'rb') as f:
+            line = f.read().decode('utf-8')
+        assert '"text":"héllo"' in line and ': ' not in line
\ No newline at end of file
@@ -0,0 +1,74 @@
+"""Tests for the GCRA rate limiter."""
+import pytest
+from ..utils import rate_limiter as rate_limiter_module
+from ..utils.rate_limiter import RateLimiter
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+    
+    def __call__(self):
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Replace the limiter's monotonic clock with a controllable one."""
+    fake = FakeClock()
+    monkeypatch.setattr(rate_limiter_module.time, 'monotonic', fake)
+    return fake
+
+def test_allows_burst_then_refills(clock):
+    """Test a burst of max_requests is allowed and one more every interval after."""
+    limiter = RateLimiter(max_requests=3, window_seconds=60)
+    
+    assert [limiter.is_allowed("user") for _ in range(4)] == [True, True, True, False]
+    assert limiter.get_remaining_requests("user") == 0
+    
+    clock.now += 20
+    assert limiter.get_remaining_requests("user") == 1
+    assert limiter.is_allowed("user")
+    assert not limiter.is_allowed("user")
+    
+    clock.now += 60
+    assert limiter.get_remaining_requests("user") == 3
+
+def test_remaining_does_not_create_entries(clock):
+    """Test looking up an unknown sender stores no state."""
+    limiter = RateLimiter(max_requests=5)
+    
+    assert limiter.get_remaining_requests("stranger") == 5
+    assert len(limiter.tats) == 0
+
+def test_reset_user(clock):
+    """Test resetting a user restores the full allowance."""
+    limiter = RateLimiter(max_requests=1)
+    limiter.is_allowed("user")
+    
+    limiter.reset_user("user")
+    limiter.reset_user("unknown")
+    
+    assert limiter.is_allowed("user")
+
+def test_idle_keys_are_evicted(clock):
+    """Test keys whose allowance has fully refilled are dropped."""
+    limiter = RateLimiter(max_requests=2, window_seconds=10)
+    for i in range(100):
+        limiter.is_allowed(f"user{i}")
+    
+    clock.now += 10
+    limiter.is_allowed("new")
+    
+    assert list(limiter.tats) == ["new"]
+    assert limiter.evicted == 0
+
+def test_max_keys_evicts_least_recently_used(clock):
+    """Test the key count is bounded and the oldest key goes first."""
+    limiter = RateLimiter(max_requests=1, max_keys=2)
+    for user in ("a", "b"):
+        limiter.is_allowed(user)
+    assert not limiter.is_allowed("a")
+    
+    limiter.is_allowed("c")
+    
+    assert list(limiter.tats) == ["a", "c"]
+    assert limiter.get_stats() == {'keys': 2, 'max_keys': 2, 'evicted': 1}
\ No newline at end of file
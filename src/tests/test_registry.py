@@ -0,0 +1,55 @@
+"""Tests for the lazy connector registry."""
+import os
+import subprocess
+import sys
+import pytest
+from ..config import config
+from ..connectors.registry import connector_registry
+
+CLIENT_LIBRARIES = ('telegram', 'twilio', 'imapclient', 'requests')
+
+class PluginConnector:
+    """A connector provided outside the connectors package."""
+    
+    def __init__(self, router=None):
+        self.router = router
+
+@pytest.fixture
+def unconfigured(monkeypatch):
+    """Clear every channel's credentials and the connector selection."""
+    for key in ('telegram_bot_token', 'email_user', 'email_password', 'twilio_account_sid', 'twilio_auth_token',
+                'linkedin_access_token', 'instagram_access_token', 'connectors'):
+        monkeypatch.setattr(config, key, '')
+    monkeypatch.setattr(config, 'connector_plugins', {})
+
+def test_starting_imports_no_client_library():
+    """Test importing the entry point loads no connector module or client library."""
+    code = ("import sys, src.__main__; "
+            f"print(','.join(m for m in {CLIENT_LIBRARIES!r} + ('src.connectors.email_connector',) if m in sys.modules))")
+    root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    output = subprocess.run([sys.executable, '-c', code], cwd=root, capture_output=True, text=True, check=True)
+    
+    assert output.stdout.strip() == ''
+
+def test_only_configured_channels_are_selected(unconfigured, monkeypatch):
+    """Test channels run by default only when their credentials are set, stubs included."""
+    assert connector_registry.selected() == []
+    
+    monkeypatch.setattr(config, 'telegram_bot_token', 'token')
+    monkeypatch.setattr(config, 'linkedin_access_token', 'token')
+    assert connector_registry.selected() == ['telegram', 'linkedin']
+    
+    monkeypatch.setattr(config, 'connectors', 'whatsapp, email')
+    assert connector_registry.selected() == ['whatsapp', 'email']
+
+def test_plugins_are_loaded_by_name(unconfigured, monkeypatch):
+    """Test a plugin connector is selected, imported and created from its module path."""
+    monkeypatch.setattr(config, 'connector_plugins', {'sms': f'{__name__}:PluginConnector'})
+    router = object()
+    
+    assert connector_registry.selected() == ['sms']
+    connector = connector_registry.create('sms', router)
+    assert isinstance(connector, PluginConnector) and connector.router is router
+    
+    with pytest.raises(ValueError):
+        connector_registry.load('carrier-pigeon')
\ No newline at end of file
@@ -0,0 +1,68 @@
+"""Tests for retry scheduling and circuit breakers."""
+import asyncio
+import time
+import pytest
+from ..utils.retry import CircuitBreaker, RetryBudget, RetryPolicy, RetryScheduler
+
+def test_backoff_grows_with_jitter_and_cap():
+    """Test each delay lies in [0, base * 2**(n-1)] and never exceeds the cap."""
+    policy = RetryPolicy(base_delay=0.5, max_delay=3.0)
+    for attempt, ceiling in [(1, 0.5), (2, 1.0), (3, 2.0), (6, 3.0)]:
+        delays = [policy.delay(attempt) for _ in range(200)]
+        assert all(0 <= delay <= ceiling for delay in delays)
+        assert max(delays) > ceiling / 2
+
+def test_budget_limits_retries_until_successes_refill_it():
+    """Test a burst of failures gets a handful of retries and successes earn more."""
+    budget = RetryBudget(ratio=0.5, max_tokens=4)
+    assert [budget.try_spend() for _ in range(4)] == [True, True, False, False]
+    for _ in range(2):
+        budget.record_success()
+    assert budget.try_spend()
+
+def test_breaker_opens_probes_and_closes(monkeypatch):
+    """Test the closed -> open -> half-open -> closed cycle, with one probe at a time."""
+    now = [100.0]
+    monkeypatch.setattr(time, 'monotonic', lambda: now[0])
+    breaker = CircuitBreaker('test', failure_threshold=2, reset_timeout=10)
+    
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+    assert breaker.retry_in() == 10
+    
+    now[0] += 10
+    assert breaker.allow()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert not breaker.allow()
+    
+    # A failed probe reopens at once
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    now[0] += 10
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.opens.value >= 2
+
+@pytest.mark.asyncio
+async def test_scheduler_runs_retries_on_timers():
+    """Test schedule returns at once, fires later, and gives up past the attempt limit."""
+    scheduler = RetryScheduler(RetryPolicy(max_attempts=2, base_delay=0.02))
+    fired = []
+    
+    started = time.monotonic()
+    assert scheduler.schedule(1, fired.append, 'a')
+    assert time.monotonic() - started < 0.01
+    assert fired == []
+    await asyncio.sleep(0.05)
+    assert fired == ['a']
+    
+    assert not scheduler.schedule(3, fired.append, 'b')
+    assert scheduler.schedule(2, fired.append, 'c')
+    assert scheduler.cancel_all() == 1
+    await asyncio.sleep(0.05)
+    assert fired == ['a']
+    assert scheduler.get_stats()['exhausted'] == 1
\ No newline at end of file
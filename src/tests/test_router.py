@@ -5,6 +5,7 @@ from datetime import datetime
 from unittest.mock import Mock, AsyncMock
 from ..core.router import MessageRouter
 from ..core.persistence import Message
+from ..core.sharding import WorkerLostError
 
 @pytest.fixture
 def sample_message():
@@ -66,4 +67,94 @@ async def test_route_message_error_handling(router, sample_message):
     router.register_connector("test", mock_connector)
     
     # This should not raise an exception (error should be caught)
-    await router.route_message(sample_message)
\ No newline at end of file
+    await router.route_message(sample_message)
+
+@pytest.mark.asyncio
+async def test_enqueue_is_processed_by_workers(router, sample_message):
+    """Test that enqueued messages are routed by the worker pool."""
+    mock_connector = Mock(spec=['send_message'])
+    mock_connector.send_message = AsyncMock()
+    router.register_connector("test", mock_connector)
+    router.worker_count = 2
+    
+    start_task = asyncio.create_task(router.start())
+    accepted = await router.enqueue(sample_message)
+    for _ in range(100):
+        if mock_connector.send_message.called:
+            break
+        await asyncio.sleep(0.01)
+    router.stop()
+    await start_task
+    await asyncio.sleep(0)
+    
+    assert accepted
+    mock_connector.send_message.assert_called_once()
+    stats = router.get_stats()
+    assert stats['ingress']['enqueued'] == {'test': 1}
+    assert stats['ingress']['depth'] == 0
+
+@pytest.mark.asyncio
+async def test_one_senders_messages_are_handled_in_order(router, sample_message):
+    """Test a sender's second message waits for a slow first one, while other workers stay free."""
+    async def process_message(message):
+        if message.text == "first":
+            await asyncio.sleep(0.05)
+        return message.text
+    
+    sent = []
+    mock_connector = Mock(spec=['send_message'])
+    mock_connector.send_message = AsyncMock(side_effect=lambda recipient, text: sent.append(text))
+    router.register_connector("test", mock_connector)
+    router.handler.process_message = process_message
+    router.worker_count = 4
+    
+    start_task = asyncio.create_task(router.start())
+    await router.enqueue(sample_message.model_copy(update={'id': "test-1", 'text': "first"}))
+    await router.enqueue(sample_message.model_copy(update={'id': "test-2", 'text': "second"}))
+    assert await router.drain(1.0)
+    router.stop()
+    await start_task
+    
+    assert sent == ["first", "second"]
+    assert router.conversations == {}
+
+@pytest.mark.asyncio
+async def test_message_lost_with_its_worker_is_not_a_duplicate(router, sample_message):
+    """Test a message whose worker process died is processed again when the provider redelivers it."""
+    calls = []
+    async def process_message(message):
+        calls.append(message.id)
+        if len(calls) == 1:
+            raise WorkerLostError("Worker shard-0 exited with code -9")
+        return None
+    
+    router.handler.process_message = process_message
+    message = sample_message.model_copy(update={'metadata': {'provider_id': 42}})
+    start_task = asyncio.create_task(router.start())
+    await router.enqueue(message)
+    assert await router.drain(1.0)
+    await router.enqueue(message)
+    assert await router.drain(1.0)
+    await router.enqueue(message)
+    assert await router.drain(1.0)
+    router.stop()
+    await start_task
+    
+    assert calls == ["test-123", "test-123"]
+
+@pytest.mark.asyncio
+async def test_graceful_stop_writes_queued_messages(router, sample_message):
+    """Test stopping the handler after a drain waits for the write-behind queue."""
+    router.handler.writer.flush_interval = 60
+    start_task = asyncio.create_task(router.start())
+    await router.enqueue(sample_message)
+    assert await router.drain(1.0)
+    assert router.handler.writer.messages_written == 0
+    
+    await router.stop_handler()
+    writer_task = router.handler.writer._task
+    router.stop()
+    await start_task
+    
+    assert writer_task.done()
+    assert [record['id'] for record in router.handler.message_store.load_messages()] == ["test-123"]
\ No newline at end of file
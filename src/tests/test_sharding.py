@@ -0,0 +1,83 @@
+"""Tests for multi-process sharded message handling."""
+import asyncio
+import pytest
+from collections import Counter
+from datetime import datetime
+from ..config import config
+from ..core.message_log import SegmentedLog
+from ..core.persistence import Message
+from ..core.sharding import ShardPool, WorkerLostError, shard_index
+from ..utils.metrics import metrics
+
+def make_message(sender: int, index: int) -> Message:
+    return Message(
+        id=f"msg-{sender}-{index}",
+        channel="telegram",
+        sender_id=f"user{sender}",
+        sender_name=f"User {sender}",
+        text=f"Hello number {index}",
+        received_at=datetime.now()
+    )
+
+@pytest.fixture
+def store_dir(tmp_path, monkeypatch):
+    """Point the shards' stores at a temporary directory."""
+    monkeypatch.setattr(config, 'message_store_backend', 'log')
+    monkeypatch.setattr(config, 'message_store_dir', str(tmp_path / "messages"))
+    return tmp_path / "messages"
+
+def test_shard_index_is_stable_and_spread():
+    """Test a conversation always maps to the same shard and senders are spread out."""
+    assert shard_index('telegram', 'user1', 4) == shard_index('telegram', 'user1', 4)
+    counts = Counter(shard_index('telegram', f"user{i}", 4) for i in range(1000))
+    assert set(counts) == {0, 1, 2, 3}
+    assert min(counts.values()) > 200
+
+@pytest.mark.asyncio
+async def test_messages_keep_sender_order_within_a_shard(store_dir):
+    """Test each sender's messages are handled in order and stored in its shard, and their timings reach this process."""
+    handled = metrics.histogram('agent_stage_seconds', 'Time spent in each pipeline stage', stage='handler')
+    before = handled.count
+    pool = ShardPool(2, heartbeat_interval=0.1)
+    await pool.start()
+    try:
+        stream = [make_message(sender, index) for index in range(5) for sender in range(6)]
+        responses = await asyncio.gather(*(pool.process_message(message) for message in stream))
+    finally:
+        await pool.stop()
+    
+    assert all(responses)
+    assert sum(stats['processed'] for stats in pool.get_stats().values()) == 30
+    assert handled.count == before + 30
+    for index in range(2):
+        records = list(SegmentedLog(str(store_dir / f"shard-{index}")).iter_records())
+        for sender in {record['sender_id'] for record in records}:
+            assert shard_index('telegram', sender, 2) == index
+            ids = [record['id'] for record in records if record['sender_id'] == sender]
+            assert ids == [f"msg-{sender[4:]}-{i}" for i in range(5)]
+
+@pytest.mark.asyncio
+async def test_dead_worker_is_restarted(store_dir):
+    """Test the supervisor replaces a worker process that died."""
+    pool = ShardPool(1, heartbeat_interval=0.05)
+    await pool.start()
+    try:
+        assert await pool.process_message(make_message(1, 0))
+        pool.shards[0].process.kill()
+        for _ in range(100):
+            await asyncio.sleep(0.05)
+            if pool.shards[0].restarts:
+                break
+        
+        assert pool.shards[0].restarts == 1
+        assert await pool.process_message(make_message(1, 1))
+        
+        # A message held by a worker that dies fails instead of looking handled
+        pool.shards[0].process.kill()
+        pool.shards[0].process.join()
+        with pytest.raises(WorkerLostError):
+            await asyncio.wait_for(pool.process_message(make_message(1, 2)), 5.0)
+    finally:
+        await pool.stop()
+    assert pool.get_stats()['shard-0']['processed'] == 2
+    assert pool.get_stats()['shard-0']['lost'] == 1
\ No newline at end of file
@@ -0,0 +1,57 @@
+"""Tests for the SMTP connection pool."""
+import smtplib
+import pytest
+from email.mime.text import MIMEText
+from unittest.mock import MagicMock, patch
+from ..utils.smtp_pool import SMTPConnectionPool
+
+@pytest.fixture
+def mock_smtp():
+    """Patch smtplib.SMTP so every connection is a fresh mock."""
+    with patch('smtplib.SMTP', side_effect=lambda *args, **kwargs: MagicMock()) as mock_smtp:
+        yield mock_smtp
+
+def make_pool(**kwargs) -> SMTPConnectionPool:
+    return SMTPConnectionPool("smtp.example.com", 587, username="user", password="secret", **kwargs)
+
+def test_connection_is_reused(mock_smtp):
+    """Test consecutive sends share one connection."""
+    pool = make_pool()
+    
+    for _ in range(3):
+        pool.send(MIMEText("hello"))
+    
+    assert mock_smtp.call_count == 1
+    assert pool.get_stats()['connections_reused'] == 2
+
+def test_connection_recycled_after_max_messages(mock_smtp):
+    """Test connections are retired once they reach max_messages."""
+    pool = make_pool(max_messages=2)
+    
+    for _ in range(5):
+        pool.send(MIMEText("hello"))
+    
+    assert mock_smtp.call_count == 3
+
+def test_idle_connection_is_health_checked(mock_smtp):
+    """Test a failed NOOP replaces the idle connection."""
+    pool = make_pool(health_check_after=0)
+    pool.send(MIMEText("hello"))
+    stale = pool._idle[0].smtp
+    stale.noop.return_value = (421, b'closing')
+    
+    pool.send(MIMEText("hello again"))
+    
+    stale.noop.assert_called_once()
+    assert mock_smtp.call_count == 2
+
+def test_dropped_connection_is_replaced(mock_smtp):
+    """Test a silently dropped session is reopened and the send retried."""
+    pool = make_pool()
+    pool.send(MIMEText("hello"))
+    pool._idle[0].smtp.send_message.side_effect = smtplib.SMTPServerDisconnected()
+    
+    pool.send(MIMEText("hello again"))
+    
+    assert mock_smtp.call_count == 2
+    assert pool.get_stats()['messages_sent'] == 2
\ No newline at end of file
@@ -0,0 +1,167 @@
+"""Tests for Telegram update ingestion against a stand-in Bot API server."""
+import asyncio
+import json
+import random
+import pytest
+import pytest_asyncio
+from ..config import config
+from types import SimpleNamespace
+from unittest.mock import Mock
+from telegram import Update
+from ..connectors.telegram_connector import ChatOrderedUpdateProcessor, TelegramConnector
+from .telegram_server import StandInBotAPIServer
+
+class RecordingRouter:
+    """Records routed messages; a random delay lets concurrent updates interleave."""
+    
+    def __init__(self):
+        self.messages = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+    
+    async def enqueue(self, message) -> bool:
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(random.uniform(0, 0.01))
+        self.messages.append(message)
+        self.in_flight -= 1
+        return True
+
+@pytest_asyncio.fixture
+async def bot_api(monkeypatch):
+    """Run a stand-in Bot API server and point the connector at it."""
+    server = StandInBotAPIServer()
+    await server.start()
+    monkeypatch.setattr(config, 'telegram_bot_token', server.token)
+    monkeypatch.setattr(config, 'telegram_api_url', server.api_url)
+    monkeypatch.setattr(config, 'telegram_webhook_url', '')
+    monkeypatch.setattr(config, 'telegram_max_concurrent_updates', 8)
+    monkeypatch.setattr(config, 'rate_limit_per_minute', 1000)
+    yield server
+    server.close()
+    await asyncio.sleep(0.01)
+
+async def run_connector(connector):
+    task = asyncio.create_task(connector.start())
+    for _ in range(200):
+        if connector.app is not None and connector.app.running:
+            return task
+        await asyncio.sleep(0.01)
+    raise AssertionError("Telegram connector did not start")
+
+async def close_connector(connector, task):
+    connector.stop()
+    await asyncio.sleep(0.05)
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+
+async def wait_for(predicate, timeout=5.0):
+    for _ in range(int(timeout / 0.01)):
+        if predicate():
+            return
+        await asyncio.sleep(0.01)
+    raise AssertionError("Timed out waiting for condition")
+
+async def post(port, body: bytes, secret: str) -> int:
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    writer.write(
+        f"POST /telegram/webhook HTTP/1.1\r\nHost: 127.0.0.1\r\nContent-Type: application/json\r\n"
+        f"X-Telegram-Bot-Api-Secret-Token: {secret}\r\nContent-Length: {len(body)}\r\n"
+        f"Connection: close\r\n\r\n".encode() + body
+    )
+    head = await reader.readuntil(b'\r\n\r\n')
+    writer.close()
+    return int(head.split(b' ', 2)[1])
+
+def texts_by_chat(messages):
+    chats = {}
+    for message in messages:
+        chats.setdefault(message.metadata['chat_id'], []).append(message.text)
+    return chats
+
+@pytest.mark.asyncio
+async def test_polling_processes_chats_concurrently_in_order(bot_api):
+    """Test polled updates are handled concurrently while each chat keeps its order."""
+    router = RecordingRouter()
+    connector = TelegramConnector(router=router)
+    task = await run_connector(connector)
+    
+    for i in range(10):
+        for chat_id in (1, 2, 3, 4):
+            bot_api.add_update(chat_id, f"message {i}")
+    await wait_for(lambda: len(router.messages) == 40)
+    
+    assert texts_by_chat(router.messages) == {chat_id: [f"message {i}" for i in range(10)] for chat_id in (1, 2, 3, 4)}
+    assert 1 < router.max_in_flight <= 4
+    assert bot_api.calls['deleteWebhook'] == 1
+    assert connector.get_stats()['mode'] == 'polling'
+    
+    await close_connector(connector, task)
+    assert not connector.app.running
+
+@pytest.mark.asyncio
+async def test_busy_chat_holds_one_slot():
+    """Test a chat's queued updates free their slots, so other chats are not blocked behind it."""
+    processor = ChatOrderedUpdateProcessor(2)
+    handled = []
+    release = asyncio.Event()
+    
+    def update(chat_id):
+        return Mock(spec=Update, effective_chat=SimpleNamespace(id=chat_id))
+    
+    async def handle(chat_id, index):
+        if chat_id == 1:
+            await release.wait()
+        handled.append((chat_id, index))
+    
+    tasks = [asyncio.create_task(processor.process_update(update(1), handle(1, i))) for i in range(5)]
+    tasks.append(asyncio.create_task(processor.process_update(update(2), handle(2, 0))))
+    await wait_for(lambda: handled == [(2, 0)])
+    assert processor.get_stats()['queued_updates'] == 4
+    
+    release.set()
+    await asyncio.gather(*tasks)
+    assert handled[1:] == [(1, i) for i in range(5)]
+    assert processor.get_stats()['active_chats'] == 0
+
+@pytest.mark.asyncio
+async def test_webhook_mode_registers_and_checks_secret(bot_api, monkeypatch):
+    """Test webhook mode registers with the API and only accepts calls carrying the secret."""
+    monkeypatch.setattr(config, 'telegram_webhook_url', 'https://agent.example.com/telegram/webhook')
+    monkeypatch.setattr(config, 'telegram_webhook_host', '127.0.0.1')
+    monkeypatch.setattr(config, 'telegram_webhook_port', 0)
+    monkeypatch.setattr(config, 'telegram_webhook_secret', 'webhook-secret')
+    router = RecordingRouter()
+    connector = TelegramConnector(router=router)
+    task = await run_connector(connector)
+    
+    assert bot_api.webhook['url'] == 'https://agent.example.com/telegram/webhook'
+    assert bot_api.webhook['secret_token'] == 'webhook-secret'
+    
+    port = connector.server.port
+    assert await post(port, json.dumps(bot_api.make_update(7, "hello")).encode(), 'wrong') == 403
+    assert await post(port, b'not json', 'webhook-secret') == 400
+    for i in range(5):
+        assert await post(port, json.dumps(bot_api.make_update(7, f"hook {i}")).encode(), 'webhook-secret') == 200
+    await wait_for(lambda: len(router.messages) == 5)
+    
+    assert texts_by_chat(router.messages) == {7: [f"hook {i}" for i in range(5)]}
+    assert bot_api.calls['getUpdates'] == 0
+    stats = connector.get_stats()
+    assert (stats['accepted'], stats['rejected']) == (5, 2)
+    
+    await close_connector(connector, task)
+
+@pytest.mark.asyncio
+async def test_replies_are_sent_after_stop_until_cancelled(bot_api):
+    """Test the bot still sends replies after ingestion stops, as during a shutdown drain."""
+    connector = TelegramConnector(router=RecordingRouter())
+    task = await run_connector(connector)
+    
+    connector.stop()
+    await wait_for(lambda: not connector.app.running)
+    await connector.send_message('42', 'still here')
+    assert bot_api.sent == [{'chat_id': 42, 'text': 'still here'}]
+    
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
\ No newline at end of file
@@ -0,0 +1,70 @@
+"""Tests for response templates."""
+import json
+import os
+import pytest
+from datetime import datetime
+from ..core.persistence import Message
+from ..core.templates import ResponseTemplates
+
+@pytest.fixture
+def message():
+    """Create a sample message for testing."""
+    return Message(
+        id="test-123",
+        channel="email",
+        sender_id="jane@example.com",
+        sender_name="Jane Doe",
+        text="Hello",
+        received_at=datetime.now()
+    )
+
+@pytest.fixture
+def templates():
+    """Create templates without a template file."""
+    return ResponseTemplates(path="")
+
+def test_channel_wrappers_and_personalization(templates, message):
+    """Test wrappers are applied and placeholders filled from the message."""
+    templates.templates['greeting'] = ["Hello {first_name}!"]
+    templates.compile()
+    
+    assert templates.get_response('greeting', 'email', message) == (
+        "Dear valued customer,\n\nHello Jane!\n\nBest regards,\nAgent Michael"
+    )
+    assert templates.get_response('greeting', 'telegram', message) == "🤖 Hello Jane!"
+    assert templates.get_response('greeting', 'whatsapp') == "Hello there!"
+    assert templates.get_response('no_such_intent', 'whatsapp') in templates.templates['unknown']
+
+def test_literal_braces_and_unknown_placeholders(templates):
+    """Test escaped braces survive and unknown placeholders are rejected at compile time."""
+    templates.templates['thanks'] = ["Use {{curly}} braces"]
+    templates.compile()
+    assert templates.get_response('thanks') == "Use {curly} braces"
+    
+    templates.templates['thanks'] = ["Hi {password}"]
+    with pytest.raises(ValueError):
+        templates.compile()
+
+def test_load_file_and_hot_reload(tmp_path, message):
+    """Test templates load from JSON and reload when the file changes."""
+    path = tmp_path / "templates.json"
+    path.write_text(json.dumps({
+        'intents': {'greeting': ["Hi {sender_name}"]},
+        'channels': {'whatsapp': "{body} [{channel}]"}
+    }))
+    templates = ResponseTemplates(path=str(path), reload_interval=0)
+    
+    assert templates.get_response('greeting', 'whatsapp', message) == "Hi Jane Doe [email]"
+    
+    path.write_text(json.dumps({'intents': {'greeting': ["Welcome back, {first_name}"]}}))
+    stat = os.stat(path)
+    os.utime(path, (stat.st_atime, stat.st_mtime + 10))
+    assert templates.get_response('greeting', None, message) == "Welcome back, Jane"
+    # The whatsapp wrapper was dropped from the file, so the built-in (none) applies again
+    assert templates.get_response('greeting', 'whatsapp', message) == "Welcome back, Jane"
+    assert 'whatsapp' not in templates.channel_wrappers
+    
+    # A broken file keeps the last good templates
+    path.write_text("{not json")
+    os.utime(path, (stat.st_atime, stat.st_mtime + 20))
+    assert templates.get_response('greeting', None, message) == "Welcome back, Jane"
\ No newline at end of file
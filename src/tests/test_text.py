@@ -0,0 +1,55 @@
+"""Tests for inbound text normalization."""
+import base64
+from ..utils.security import SecurityUtils
+from ..utils.text import decode_payload, normalize_text, strip_quoted
+
+QUOTED_PRINTABLE_TEXT = (
+    b'Hi, where is my order? Caf=C3=A9 is waiting =\r\nfor it.\r\n\r\n'
+    b'On Mon, Jan 1, 2024 at 10:00 AM Support <support@example.com>\r\nwrote:\r\n'
+    b'> Your order has shipped.\r\n'
+)
+
+def test_sanitize_removes_the_same_characters_in_one_pass():
+    """Test the translate table covers the characters removed before."""
+    assert SecurityUtils.sanitize_text(' <b>"Tom" & \'Jerry\'</b>\x00 ') == 'bTom  Jerry/b'
+
+def test_quoted_printable_text_part_is_decoded_and_trimmed():
+    """Test a quoted-printable text part is decoded and cut before the quoted reply."""
+    text = decode_payload(QUOTED_PRINTABLE_TEXT, 'quoted-printable', 'utf-8')
+    
+    assert normalize_text(text, 4000, strip_replies=True) == "Hi, where is my order? Café is waiting for it."
+
+def test_html_base64_text_part():
+    """Test HTML bodies lose markup, scripts and quoted blocks but keep entities' text."""
+    html = ('<html><head><style>p {color: red}</style></head><body><p>Need&nbsp;help with '
+            'invoice&nbsp;#42</p><div>Thanks<br>Ann</div><blockquote>old thread</blockquote>'
+            '<script>alert(1)</script></body></html>')
+    text = decode_payload(base64.encodebytes(html.encode()), 'base64', 'utf-8')
+    
+    assert normalize_text(text, 4000, is_html=True, strip_replies=True) == "Need help with invoice #42\n\nThanks\nAnn"
+
+def test_payload_in_a_legacy_charset():
+    """Test the part's declared charset is used, with UTF-8 for unknown ones."""
+    assert decode_payload(b'Gr\xfc\xdfe', None, 'iso-8859-1') == "Grüße"
+    assert decode_payload('Grüße'.encode(), '7bit', 'no-such-charset') == "Grüße"
+
+def test_strip_quoted_handles_common_clients():
+    """Test Outlook headers, separators and signatures end the new text."""
+    outlook = "Sure, Friday works.\n\nFrom: Bob\nSent: Monday\nTo: Ann\nSubject: Meeting"
+    signature = "See you then\n-- \nAnn Smith\nACME Corp"
+    
+    assert strip_quoted(outlook).strip() == "Sure, Friday works."
+    assert strip_quoted(signature).strip() == "See you then"
+
+def test_truncates_at_a_word_boundary():
+    """Test long texts are limited to the configured length."""
+    text = normalize_text("word " * 1000, max_length=23)
+    
+    assert text == "word word word word"
+    assert len(normalize_text("x" * 100000, max_length=50)) == 50
+
+def test_partial_base64_payload_decodes_complete_quanta():
+    """Test a payload cut mid-quantum by a partial fetch still decodes."""
+    payload = base64.encodebytes("Grüße aus Köln".encode())[:-4]
+    
+    assert decode_payload(payload, 'BASE64', 'utf-8').startswith("Grüße aus K")
\ No newline at end of file
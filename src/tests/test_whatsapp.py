@@ -0,0 +1,66 @@
+"""Tests for the WhatsApp webhook endpoint."""
+import asyncio
+from urllib.parse import urlencode
+import pytest
+from unittest.mock import AsyncMock, Mock
+from twilio.request_validator import RequestValidator
+from ..config import config
+from ..connectors.whatsapp_connector import WhatsAppConnector
+from ..utils.http_server import HTTPRequest
+from ..utils.security import SecurityUtils
+
+AUTH_TOKEN = "test-auth-token"
+URL = "https://agent.example.com/whatsapp/webhook"
+PARAMS = {
+    'From': 'whatsapp:+15550001111',
+    'Body': 'Hello there',
+    'ProfileName': 'Jane',
+    'MessageSid': 'SM123',
+    'AccountSid': 'AC123'
+}
+
+@pytest.fixture
+def connector(monkeypatch):
+    """Create a WhatsApp connector with a known auth token and public URL."""
+    monkeypatch.setattr(config, 'twilio_auth_token', AUTH_TOKEN)
+    monkeypatch.setattr(config, 'whatsapp_webhook_url', URL)
+    monkeypatch.setattr(config, 'whatsapp_validate_signature', True)
+    router = Mock()
+    router.enqueue = AsyncMock(return_value=True)
+    return WhatsAppConnector(router=router)
+
+def make_request(params, signature):
+    body = urlencode(params).encode()
+    headers = {'x-twilio-signature': signature, 'content-length': str(len(body))}
+    return HTTPRequest('POST', '/whatsapp/webhook', 'HTTP/1.1', headers, body)
+
+def test_signature_matches_twilio_validator():
+    """Test our signature check agrees with Twilio's own validator."""
+    signature = RequestValidator(AUTH_TOKEN).compute_signature(URL, PARAMS)
+    
+    assert SecurityUtils.verify_twilio_signature(URL, PARAMS, signature, AUTH_TOKEN)
+    assert not SecurityUtils.verify_twilio_signature(URL + "x", PARAMS, signature, AUTH_TOKEN)
+
+@pytest.mark.asyncio
+async def test_valid_webhook_is_acked_then_routed(connector):
+    """Test a signed webhook gets a 200 and is handed to the router in the background."""
+    signature = RequestValidator(AUTH_TOKEN).compute_signature(URL, PARAMS)
+    
+    response = await connector.handle_http_request(make_request(PARAMS, signature))
+    assert response.status == 200
+    connector.router.enqueue.assert_not_called()
+    
+    await asyncio.gather(*connector.pending)
+    
+    message = connector.router.enqueue.call_args[0][0]
+    assert (message.channel, message.sender_id, message.text) == ('whatsapp', 'whatsapp:+15550001111', 'Hello there')
+    assert connector.get_stats()['accepted'] == 1
+
+@pytest.mark.asyncio
+async def test_invalid_signature_is_rejected(connector):
+    """Test a webhook with a bad signature is refused and not routed."""
+    response = await connector.handle_http_request(make_request(PARAMS, "bogus"))
+    
+    assert response.status == 403
+    assert not connector.pending
+    assert connector.get_stats()['rejected'] == 1
\ No newline at end of file
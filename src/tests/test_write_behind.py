@@ -0,0 +1,75 @@
+"""Tests for write-behind persistence."""
+import asyncio
+import pytest
+from datetime import datetime
+from ..core.persistence import Message, MessageStore
+from ..core.message_log import SegmentedLog
+from ..core.write_behind import WriteBehindQueue
+
+def make_message(index: int) -> Message:
+    return Message(
+        id=f"msg-{index}",
+        channel="test",
+        sender_id="user123",
+        sender_name="Test User",
+        text=f"Message number {index}",
+        received_at=datetime.now()
+    )
+
+@pytest.fixture
+def store(tmp_path):
+    """Create a message store in a temporary directory."""
+    return MessageStore(
+        backend=SegmentedLog(str(tmp_path / "messages")),
+        legacy_path=str(tmp_path / "messages.json")
+    )
+
+@pytest.mark.asyncio
+async def test_burst_is_written_in_batches(store):
+    """Test that a burst of messages turns into a few batched writes."""
+    writer = WriteBehindQueue(store, max_batch_size=50, flush_interval=0.05)
+    await writer.start()
+    
+    for i in range(200):
+        await writer.submit(make_message(i))
+    await writer.stop()
+    
+    assert [msg['id'] for msg in store.load_messages()] == [f"msg-{i}" for i in range(200)]
+    assert writer.messages_written == 200
+    assert writer.batches_written <= 10
+
+@pytest.mark.asyncio
+async def test_submit_waits_when_queue_is_full(store):
+    """Test backpressure when the queue is at capacity."""
+    writer = WriteBehindQueue(store, max_queue_size=2)
+    await writer.start()
+    writer._task.cancel()
+    
+    await writer.submit(make_message(1))
+    await writer.submit(make_message(2))
+    with pytest.raises(asyncio.TimeoutError):
+        await asyncio.wait_for(writer.submit(make_message(3)), 0.05)
+    
+    writer.stop_nowait()
+    assert len(store.load_messages()) == 2
+
+@pytest.mark.asyncio
+async def test_stop_nowait_flushes_queue(store):
+    """Test that the synchronous shutdown path writes queued messages."""
+    writer = WriteBehindQueue(store, flush_interval=10)
+    await writer.start()
+    
+    for i in range(5):
+        await writer.submit(make_message(i))
+    writer.stop_nowait()
+    
+    assert len(store.load_messages()) == 5
+
+@pytest.mark.asyncio
+async def test_submit_without_start_saves_directly(store):
+    """Test that messages are saved inline when the writer is not running."""
+    writer = WriteBehindQueue(store)
+    
+    await writer.submit(make_message(1))
+    
+    assert len(store.load_messages()) == 1
\ No newline at end of file
@@ -0,0 +1,198 @@
+"""Bounded thread pools for blocking I/O and an event-loop lag monitor."""
+import asyncio
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+from ..config import config
+
+logger = logging.getLogger(__name__)
+
+class BlockingPool:
+    """A bounded thread pool for one channel's blocking calls, with metrics.
+    
+    Calls wait in the pool's queue until one of ``max_workers`` threads is
+    free. A call that times out or whose caller is cancelled is removed from
+    the queue if it has not started yet; a call already running in a thread
+    cannot be interrupted and is left to finish.
+    """
+    
+    def __init__(self, name: str, max_workers: int = 4, timeout: Optional[float] = 30.0):
+        self.name = name
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=f"{name}-io")
+        self._lock = threading.Lock()
+        self.active = 0
+        self.queued = 0
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.timed_out = 0
+        self.cancelled = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.busy_total = 0.0
+    
+    def _call(self, submitted_at: float, func: Callable, args: tuple, kwargs: dict) -> Any:
+        started = time.monotonic()
+        wait = started - submitted_at
+        with self._lock:
+            self.queued -= 1
+            self.active += 1
+            self.wait_total += wait
+            self.wait_max = max(self.wait_max, wait)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            with self._lock:
+                self.active -= 1
+                self.busy_total += time.monotonic() - started
+    
+    async def run(self, func: Callable, *args, timeout: Optional[float] = None, **kwargs) -> Any:
+        """Run ``func`` in the pool and await its result.
+        
+        ``timeout`` overrides the pool default. Use ``run_unbounded`` for calls
+        that legitimately block for a long time, such as IMAP IDLE.
+        """
+        return await self._run(func, args, kwargs, self.timeout if timeout is None else timeout)
+    
+    async def run_unbounded(self, func: Callable, *args, **kwargs) -> Any:
+        """Run ``func`` in the pool without a timeout."""
+        return await self._run(func, args, kwargs, None)
+    
+    async def _run(self, func: Callable, args: tuple, kwargs: dict, timeout: Optional[float]) -> Any:
+        with self._lock:
+            self.submitted += 1
+            self.queued += 1
+        future = self._executor.submit(self._call, time.monotonic(), func, args, kwargs)
+        try:
+            result = await asyncio.wait_for(asyncio.wrap_future(future), timeout)
+        except asyncio.TimeoutError:
+            self._discard(future)
+            self.timed_out += 1
+            logger.warning(f"Blocking call {getattr(func, '__name__', func)} in {self.name} pool timed out after {timeout}s")
+            raise
+        except asyncio.CancelledError:
+            self._discard(future)
+            self.cancelled += 1
+            raise
+        except Exception:
+            self.failed += 1
+            raise
+        self.completed += 1
+        return result
+    
+    def _discard(self, future):
+        # A call that never started still counts as queued; take it back out
+        if future.cancel():
+            with self._lock:
+                self.queued -= 1
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Return utilization, queue and latency counters for the pool."""
+        started = self.submitted - self.queued
+        return {
+            'max_workers': self.max_workers,
+            'active': self.active,
+            'queued': self.queued,
+            'utilization': self.active / self.max_workers,
+            'submitted': self.submitted,
+            'completed': self.completed,
+            'failed': self.failed,
+            'timed_out': self.timed_out,
+            'cancelled': self.cancelled,
+            'wait_avg': self.wait_total / started if started else 0.0,
+            'wait_max': self.wait_max,
+            'busy_seconds': self.busy_total
+        }
+    
+    def shutdown(self, wait: bool = False) -> None:
+        """Stop accepting work and drop calls that have not started."""
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+
+class ExecutorRegistry:
+    """Per-channel ``BlockingPool`` instances, created on first use."""
+    
+    def __init__(self, default_workers: int = 4, pool_sizes: Optional[Dict[str, int]] = None,
+                 timeout: Optional[float] = 30.0):
+        self.default_workers = default_workers
+        self.pool_sizes = pool_sizes or {}
+        self.timeout = timeout
+        self.pools: Dict[str, BlockingPool] = {}
+        self._lock = threading.Lock()
+    
+    def get(self, name: str) -> BlockingPool:
+        """Return the pool for a channel, creating it if needed."""
+        pool = self.pools.get(name)
+        if pool is None:
+            with self._lock:
+                pool = self.pools.get(name)
+                if pool is None:
+                    size = self.pool_sizes.get(name, self.default_workers)
+                    pool = self.pools[name] = BlockingPool(name, size, self.timeout)
+        return pool
+    
+    async def run(self, name: str, func: Callable, *args, timeout: Optional[float] = None, **kwargs) -> Any:
+        """Run a blocking call in the named pool."""
+        return await self.get(name).run(func, *args, timeout=timeout, **kwargs)
+    
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Return stats for every pool."""
+        return {name: pool.get_stats() for name, pool in self.pools.items()}
+    
+    def shutdown(self, wait: bool = False) -> None:
+        """Shut down every pool."""
+        with self._lock:
+            pools, self.pools = list(self.pools.values()), {}
+        for pool in pools:
+            pool.shutdown(wait=wait)
+
+class LoopLagMonitor:
+    """Measures how late the event loop wakes up a sleeping task.
+    
+    Any lag above ``threshold`` seconds means something blocked the loop and
+    is logged as a warning.
+    """
+    
+    def __init__(self, interval: float = 0.1, threshold: float = 0.1):
+        self.interval = interval
+        self.threshold = threshold
+        self.max_lag = 0.0
+        self.last_lag = 0.0
+        self.stalls = 0
+        self._task: Optional[asyncio.Task] = None
+    
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(self.interval)
+            lag = loop.time() - started - self.interval
+            self.last_lag = lag
+            self.max_lag = max(self.max_lag, lag)
+            if lag > self.threshold:
+                self.stalls += 1
+                logger.warning(f"Event loop blocked for {lag * 1000:.0f}ms")
+    
+    def start(self):
+        """Start monitoring on the running loop."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+    
+    def stop(self):
+        """Stop monitoring."""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+    
+    def get_stats(self) -> Dict[str, float]:
+        """Return lag measurements in seconds."""
+        return {'last_lag': self.last_lag, 'max_lag': self.max_lag, 'stalls': self.stalls}
+
+executors = ExecutorRegistry(
+    default_workers=config.executor_default_workers,
+    pool_sizes={name: int(size) for name, size in config.executor_pool_sizes.items()},
+    timeout=config.executor_timeout
+)
\ No newline at end of file
@@ -0,0 +1,223 @@
+"""Minimal asyncio HTTP/1.1 server for receiving webhooks."""
+import asyncio
+import logging
+import time
+from collections import defaultdict
+from typing import Awaitable, Callable, Dict, Optional, Set, Tuple
+from urllib.parse import parse_qsl, urlsplit
+
+logger = logging.getLogger(__name__)
+
+REASONS = {
+    200: 'OK', 204: 'No Content', 400: 'Bad Request', 403: 'Forbidden', 404: 'Not Found',
+    405: 'Method Not Allowed', 408: 'Request Timeout', 411: 'Length Required',
+    413: 'Payload Too Large', 431: 'Request Header Fields Too Large', 500: 'Internal Server Error',
+    501: 'Not Implemented'
+}
+
+class HTTPRequest:
+    """A parsed request; header names are lower-cased."""
+    
+    def __init__(self, method: str, target: str, version: str, headers: Dict[str, str], body: bytes):
+        self.method = method
+        self.target = target
+        self.version = version
+        self.headers = headers
+        self.body = body
+        parts = urlsplit(target)
+        self.path = parts.path
+        self.query = parts.query
+    
+    def form(self) -> Dict[str, str]:
+        """Decode an ``application/x-www-form-urlencoded`` body."""
+        return dict(parse_qsl(self.body.decode('utf-8', errors='replace'), keep_blank_values=True))
+
+class HTTPResponse:
+    """Status, body and headers to send back."""
+    
+    def __init__(self, status: int = 200, body: bytes = b'', content_type: str = 'text/plain',
+                 headers: Optional[Dict[str, str]] = None):
+        self.status = status
+        self.body = body
+        self.content_type = content_type
+        self.headers = headers or {}
+
+Handler = Callable[[HTTPRequest], Awaitable[HTTPResponse]]
+
+class HTTPError(Exception):
+    """Malformed request; the connection is answered with ``status`` and closed."""
+    
+    def __init__(self, status: int):
+        super().__init__(REASONS.get(status, ''))
+        self.status = status
+
+class HTTPServer:
+    """HTTP/1.1 server with keep-alive, dispatching by method and exact path.
+    
+    Only ``Content-Length`` bodies are accepted, and a body that does not
+    arrive within ``body_timeout`` seconds is answered with 408. Handlers
+    should answer quickly and move slow work to a task; requests on one
+    connection are answered in order.
+    """
+    
+    def __init__(self, host: str = '0.0.0.0', port: int = 8080, max_body_size: int = 1024 * 1024,
+                 keepalive_timeout: float = 15.0, max_header_size: int = 16 * 1024, body_timeout: float = 10.0):
+        self.host = host
+        self.port = port
+        self.max_body_size = max_body_size
+        self.keepalive_timeout = keepalive_timeout
+        self.max_header_size = max_header_size
+        self.body_timeout = body_timeout
+        self.routes: Dict[Tuple[str, str], Handler] = {}
+        self.server: Optional[asyncio.AbstractServer] = None
+        self.connections: Set[asyncio.StreamWriter] = set()
+        
+        # Metrics
+        self.started_at = time.monotonic()
+        self.requests = 0
+        self.responses: Dict[int, int] = defaultdict(int)
+        self.total_connections = 0
+        self.latency_total = 0.0
+        self.latency_max = 0.0
+    
+    def route(self, method: str, path: str, handler: Handler) -> None:
+        """Register ``handler`` for ``method`` requests to ``path``."""
+        self.routes[(method.upper(), path)] = handler
+    
+    async def start(self) -> None:
+        """Start listening; ``port`` is updated when 0 was requested."""
+        self.server = await asyncio.start_server(self._serve_connection, self.host, self.port,
+                                                 limit=self.max_header_size)
+        self.port = self.server.sockets[0].getsockname()[1]
+        self.started_at = time.monotonic()
+        logger.info(f"HTTP server listening on {self.host}:{self.port}")
+    
+    async def serve_forever(self) -> None:
+        """Start if needed and serve until closed."""
+        if self.server is None:
+            await self.start()
+        try:
+            await self.server.serve_forever()
+        except asyncio.CancelledError:
+            pass
+    
+    def close(self) -> None:
+        """Stop accepting connections and close the open ones."""
+        if self.server is not None:
+            self.server.close()
+            self.server = None
+        for writer in list(self.connections):
+            writer.close()
+    
+    async def _read_request(self, reader: asyncio.StreamReader) -> Optional[HTTPRequest]:
+        try:
+            head = await asyncio.wait_for(reader.readuntil(b'\r\n\r\n'), self.keepalive_timeout)
+        except asyncio.IncompleteReadError as e:
+            if e.partial.strip():
+                raise HTTPError(400)
+            return None
+        except asyncio.LimitOverrunError:
+            raise HTTPError(431)
+        
+        lines = head.decode('latin-1').split('\r\n')
+        try:
+            method, target, version = lines[0].split(' ')
+        except ValueError:
+            raise HTTPError(400)
+        if not version.startswith('HTTP/1.'):
+            raise HTTPError(400)
+        
+        headers = {}
+        for line in lines[1:]:
+            if line:
+                name, sep, value = line.partition(':')
+                if not sep:
+                    raise HTTPError(400)
+                headers[name.strip().lower()] = value.strip()
+        
+        if 'transfer-encoding' in headers:
+            raise HTTPError(501)
+        try:
+            length = int(headers.get('content-length', '0'))
+        except ValueError:
+            raise HTTPError(400)
+        if length < 0:
+            raise HTTPError(400)
+        if length > self.max_body_size:
+            raise HTTPError(413)
+        try:
+            body = await asyncio.wait_for(reader.readexactly(length), self.body_timeout) if length else b''
+        except asyncio.TimeoutError:
+            raise HTTPError(408)
+        return HTTPRequest(method.upper(), target, version, headers, body)
+    
+    async def _dispatch(self, request: HTTPRequest) -> HTTPResponse:
+        handler = self.routes.get((request.method, request.path))
+        if handler is None:
+            allowed = any(path == request.path for _, path in self.routes)
+            return HTTPResponse(405 if allowed else 404)
+        try:
+            return await handler(request)
+        except Exception as e:
+            logger.error(f"Error handling {request.method} {request.path}: {e}")
+            return HTTPResponse(500)
+    
+    def _encode(self, response: HTTPResponse, keep_alive: bool) -> bytes:
+        lines = [
+            f"HTTP/1.1 {response.status} {REASONS.get(response.status, '')}",
+            f"Content-Type: {response.content_type}",
+            f"Content-Length: {len(response.body)}",
+            f"Connection: {'keep-alive' if keep_alive else 'close'}"
+        ]
+        lines.extend(f"{name}: {value}" for name, value in response.headers.items())
+        return ('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1') + response.body
+    
+    async def _serve_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.connections.add(writer)
+        self.total_connections += 1
+        try:
+            while True:
+                try:
+                    request = await self._read_request(reader)
+                except asyncio.TimeoutError:
+                    return
+                except HTTPError as e:
+                    self.responses[e.status] += 1
+                    writer.write(self._encode(HTTPResponse(e.status), keep_alive=False))
+                    await writer.drain()
+                    return
+                if request is None:
+                    return
+                
+                started = time.monotonic()
+                response = await self._dispatch(request)
+                connection = request.headers.get('connection', '').lower()
+                keep_alive = connection != 'close' and (request.version == 'HTTP/1.1' or connection == 'keep-alive')
+                writer.write(self._encode(response, keep_alive))
+                await writer.drain()
+                
+                latency = time.monotonic() - started
+                self.requests += 1
+                self.responses[response.status] += 1
+                self.latency_total += latency
+                self.latency_max = max(self.latency_max, latency)
+                if not keep_alive:
+                    return
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self.connections.discard(writer)
+            writer.close()
+    
+    def get_stats(self) -> Dict[str, object]:
+        """Return request rate, status counts and handling latency in seconds."""
+        uptime = time.monotonic() - self.started_at
+        return {
+            'requests': self.requests,
+            'requests_per_second': self.requests / uptime if uptime > 0 else 0.0,
+            'responses': dict(self.responses),
+            'open_connections': len(self.connections),
+            'total_connections': self.total_connections,
+            'latency_avg': self.latency_total / self.requests if self.requests else 0.0,
+            'latency_max': self.latency_max
+        }
\ No newline at end of file
@@ -0,0 +1,197 @@
+"""Low-overhead counters and latency histograms with Prometheus text export."""
+import bisect
+import json
+import logging
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from .http_server import HTTPRequest, HTTPResponse, HTTPServer
+
+logger = logging.getLogger(__name__)
+
+# Seconds, 50us to 10s; covers in-process stages and provider round trips
+DEFAULT_BUCKETS = (
+    0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+    0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _format_labels(labels: Labels, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(labels) + ([extra] if extra else [])
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{key}="{_escape(value)}"' for key, value in pairs) + '}'
+
+class Counter:
+    """Monotonic counter."""
+    
+    __slots__ = ('labels', 'value')
+    
+    def __init__(self, labels: Labels = ()):
+        self.labels = labels
+        self.value = 0
+    
+    def inc(self, amount: float = 1) -> None:
+        """Add ``amount`` to the counter."""
+        self.value += amount
+
+class Histogram:
+    """Fixed-bucket histogram; ``observe`` is a bisect and two additions."""
+    
+    __slots__ = ('labels', 'bounds', 'counts', 'sum', 'count')
+    
+    def __init__(self, labels: Labels = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.labels = labels
+        self.bounds = tuple(buckets)
+        # One slot per bound plus the overflow bucket
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+    
+    def observe(self, value: float) -> None:
+        """Record one measurement."""
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+    
+    def quantile(self, q: float) -> float:
+        """Estimate a quantile as the upper bound of the bucket that holds it."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= rank:
+                return self.bounds[index] if index < len(self.bounds) else float('inf')
+        return float('inf')
+
+class MetricsRegistry:
+    """Named metric families with labelled children.
+    
+    Look children up once (at construction time of the instrumented object)
+    and keep the reference; the hot path then only calls ``inc``/``observe``.
+    """
+    
+    def __init__(self):
+        self.families: Dict[str, Dict[str, Any]] = {}
+    
+    def _child(self, kind: str, name: str, help_text: str, labels: Dict[str, str], factory):
+        family = self.families.get(name)
+        if family is None:
+            family = self.families[name] = {'type': kind, 'help': help_text, 'children': {}}
+        elif family['type'] != kind:
+            raise ValueError(f"Metric {name} is already registered as a {family['type']}")
+        key = tuple(sorted((label, str(value)) for label, value in labels.items()))
+        child = family['children'].get(key)
+        if child is None:
+            child = family['children'][key] = factory(key)
+        return child
+    
+    def counter(self, name: str, help_text: str = '', **labels: str) -> Counter:
+        """Get or create a counter child."""
+        return self._child('counter', name, help_text, labels, Counter)
+    
+    def histogram(self, name: str, help_text: str = '', buckets: Sequence[float] = DEFAULT_BUCKETS,
+                  **labels: str) -> Histogram:
+        """Get or create a histogram child."""
+        return self._child('histogram', name, help_text, labels, lambda key: Histogram(key, buckets))
+    
+    def export(self) -> List[Tuple[str, str, str, Labels, Any]]:
+        """Every child's current state as picklable tuples, for ``merge`` in another process."""
+        exported = []
+        for name, family in self.families.items():
+            for labels, child in family['children'].items():
+                if family['type'] == 'counter':
+                    state = child.value
+                else:
+                    state = (child.bounds, list(child.counts), child.sum, child.count)
+                exported.append((family['type'], name, family['help'], labels, state))
+        return exported
+    
+    def merge(self, exported: List[Tuple[str, str, str, Labels, Any]],
+              previous: Optional[Dict[Tuple[str, Labels], Any]] = None) -> Dict[Tuple[str, Labels], Any]:
+        """Add what changed between two ``export`` results of another registry to this one.
+        
+        ``previous`` is the return value of the last merge from the same
+        source (None for a new source); pass the result to the next merge.
+        """
+        previous = previous or {}
+        states = {}
+        for kind, name, help_text, labels, state in exported:
+            states[(name, labels)] = state
+            before = previous.get((name, labels))
+            if kind == 'counter':
+                self.counter(name, help_text, **dict(labels)).inc(state - (before or 0))
+                continue
+            bounds, counts, total, count = state
+            child = self.histogram(name, help_text, bounds, **dict(labels))
+            if child.bounds != tuple(bounds):
+                logger.warning(f"Not merging {name}: bucket bounds differ")
+                continue
+            if before is not None:
+                counts = [now - then for now, then in zip(counts, before[1])]
+                total -= before[2]
+                count -= before[3]
+            for index, bucket_count in enumerate(counts):
+                child.counts[index] += bucket_count
+            child.sum += total
+            child.count += count
+        return states
+    
+    def snapshot(self) -> Dict[str, List[Dict[str, Any]]]:
+        """Return every metric as plain data, with p50/p95/p99 estimates for histograms."""
+        result = {}
+        for name, family in self.families.items():
+            children = []
+            for labels, child in family['children'].items():
+                entry: Dict[str, Any] = {'labels': dict(labels)}
+                if family['type'] == 'counter':
+                    entry['value'] = child.value
+                else:
+                    entry.update({
+                        'count': child.count,
+                        'sum': child.sum,
+                        'p50': child.quantile(0.5),
+                        'p95': child.quantile(0.95),
+                        'p99': child.quantile(0.99)
+                    })
+                children.append(entry)
+            result[name] = children
+        return result
+    
+    def render_prometheus(self) -> str:
+        """Render all metrics in the Prometheus text exposition format."""
+        lines = []
+        for name, family in self.families.items():
+            lines.append(f"# HELP {name} {family['help']}")
+            lines.append(f"# TYPE {name} {family['type']}")
+            for labels, child in family['children'].items():
+                if family['type'] == 'counter':
+                    lines.append(f"{name}{_format_labels(labels)} {child.value}")
+                    continue
+                cumulative = 0
+                for bound, bucket_count in zip(child.bounds, child.counts):
+                    cumulative += bucket_count
+                    lines.append(f"{name}_bucket{_format_labels(labels, ('le', repr(bound)))} {cumulative}")
+                lines.append(f"{name}_bucket{_format_labels(labels, ('le', '+Inf'))} {child.count}")
+                lines.append(f"{name}_sum{_format_labels(labels)} {child.sum}")
+                lines.append(f"{name}_count{_format_labels(labels)} {child.count}")
+        return '\n'.join(lines) + '\n'
+
+def create_metrics_server(registry: 'MetricsRegistry', host: str = '127.0.0.1', port: int = 0) -> HTTPServer:
+    """Build an HTTP server exposing ``/metrics`` (Prometheus) and ``/metrics.json``."""
+    async def prometheus(request: HTTPRequest) -> HTTPResponse:
+        return HTTPResponse(200, registry.render_prometheus().encode(), 'text/plain; version=0.0.4')
+    
+    async def snapshot(request: HTTPRequest) -> HTTPResponse:
+        return HTTPResponse(200, json.dumps(registry.snapshot()).encode(), 'application/json')
+    
+    server = HTTPServer(host, port)
+    server.route('GET', '/metrics', prometheus)
+    server.route('GET', '/metrics.json', snapshot)
+    return server
+
+metrics = MetricsRegistry()
\ No newline at end of file
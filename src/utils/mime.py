@@ -0,0 +1,90 @@
+"""Helpers for IMAP BODYSTRUCTURE responses."""
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+def _text(value: Any) -> str:
+    if isinstance(value, bytes):
+        return value.decode('utf-8', errors='replace')
+    return value or ''
+
+def _params(values: Optional[Sequence]) -> Dict[str, str]:
+    """Turn a flat ``(name, value, name, value, ...)`` list into a dict."""
+    if not values or not isinstance(values, (tuple, list)):
+        return {}
+    return {_text(values[i]).lower(): _text(values[i + 1]) for i in range(0, len(values) - 1, 2)}
+
+class BodyPart:
+    """One leaf of a message's MIME tree, addressed by its IMAP section number."""
+    
+    __slots__ = ('section', 'content_type', 'params', 'encoding', 'size', 'disposition', 'filename')
+    
+    def __init__(self, section: str, content_type: str, params: Dict[str, str], encoding: str,
+                 size: int, disposition: Optional[str], filename: Optional[str]):
+        self.section = section
+        self.content_type = content_type
+        self.params = params
+        self.encoding = encoding
+        self.size = size
+        self.disposition = disposition
+        self.filename = filename
+    
+    @classmethod
+    def from_structure(cls, section: str, structure: Sequence) -> 'BodyPart':
+        content_type = f"{_text(structure[0])}/{_text(structure[1])}".lower()
+        params = _params(structure[2])
+        # Extension data follows the type-specific fields: line count for text,
+        # envelope, body and line count for message/rfc822
+        if content_type.startswith('text/'):
+            extension = 9
+        elif content_type == 'message/rfc822':
+            extension = 11
+        else:
+            extension = 8
+        disposition = structure[extension] if len(structure) > extension else None
+        disposition_type, disposition_params = None, {}
+        if isinstance(disposition, (tuple, list)) and disposition:
+            disposition_type = _text(disposition[0]).lower()
+            disposition_params = _params(disposition[1] if len(disposition) > 1 else None)
+        return cls(
+            section=section,
+            content_type=content_type,
+            params=params,
+            encoding=_text(structure[5]).lower(),
+            size=structure[6] if isinstance(structure[6], int) else 0,
+            disposition=disposition_type,
+            filename=disposition_params.get('filename') or params.get('name')
+        )
+    
+    @property
+    def charset(self) -> Optional[str]:
+        return self.params.get('charset')
+    
+    @property
+    def is_attachment(self) -> bool:
+        """Anything a reader would open separately rather than read inline."""
+        return (self.disposition == 'attachment' or self.filename is not None
+                or not self.content_type.startswith('text/'))
+
+def walk_bodystructure(structure: Sequence, prefix: str = '') -> Iterator[BodyPart]:
+    """Yield the leaf parts of a BODYSTRUCTURE in section order.
+    
+    Multipart nodes are the ``BodyData`` shape from imapclient, whose first
+    element is the list of child parts. Attached messages are not descended.
+    """
+    if isinstance(structure[0], list):
+        for index, child in enumerate(structure[0], start=1):
+            yield from walk_bodystructure(child, f"{prefix}{index}.")
+        return
+    # A single-part message still has part number 1
+    yield BodyPart.from_structure(prefix[:-1] or '1', structure)
+
+def select_text_part(parts: List[BodyPart]) -> Optional[BodyPart]:
+    """Pick the inline text/plain part, or text/html when there is none."""
+    html = None
+    for part in parts:
+        if part.is_attachment:
+            continue
+        if part.content_type == 'text/plain':
+            return part
+        if part.content_type == 'text/html' and html is None:
+            html = part
+    return html
\ No newline at end of file
@@ -1,44 +1,70 @@
 """Rate limiting utilities."""
 import time
-from collections import defaultdict, deque
-from typing import Dict
+from collections import OrderedDict
+from typing import Any, Dict
+
+# Slack for float error when comparing accumulated arrival times
+_EPSILON = 1e-9
 
 class RateLimiter:
-    """Simple rate limiter to prevent spam."""
+    """Spam limiter using the generic cell rate algorithm (GCRA).
+    
+    Allows a burst of ``max_requests`` and then one request every
+    ``window_seconds / max_requests``. Each identifier costs a single float,
+    its theoretical arrival time (TAT). A key whose TAT has passed is in the
+    same state as an unseen key, so such keys are evicted without changing any
+    decision; beyond ``max_keys`` the least recently used key is dropped.
+    """
     
-    def __init__(self, max_requests: int = 10, window_seconds: int = 60):
+    def __init__(self, max_requests: int = 10, window_seconds: int = 60, max_keys: int = 100000):
         self.max_requests = max_requests
         self.window_seconds = window_seconds
-        self.requests: Dict[str, deque] = defaultdict(deque)
+        self.max_keys = max_keys
+        self.emission_interval = window_seconds / max_requests
+        self.tolerance = window_seconds - self.emission_interval
+        self.tats: 'OrderedDict[str, float]' = OrderedDict()
+        self.evicted = 0
+    
+    def _evict(self, now: float) -> None:
+        tats = self.tats
+        while tats:
+            identifier = next(iter(tats))
+            if tats[identifier] > now and len(tats) <= self.max_keys:
+                break
+            if tats[identifier] > now:
+                self.evicted += 1
+            del tats[identifier]
     
     def is_allowed(self, identifier: str) -> bool:
         """Check if request is allowed for the given identifier."""
-        now = time.time()
-        user_requests = self.requests[identifier]
-        
-        # Remove old requests outside the window
-        while user_requests and user_requests[0] <= now - self.window_seconds:
-            user_requests.popleft()
+        now = time.monotonic()
+        tats = self.tats
+        tat = tats.get(identifier)
+        if tat is None or tat < now:
+            tat = now
+        elif tat - now > self.tolerance + _EPSILON:
+            tats.move_to_end(identifier)
+            return False
         
-        # Check if under limit
-        if len(user_requests) < self.max_requests:
-            user_requests.append(now)
-            return True
-        
-        return False
+        tats[identifier] = tat + self.emission_interval
+        tats.move_to_end(identifier)
+        self._evict(now)
+        return True
     
     def get_remaining_requests(self, identifier: str) -> int:
         """Get remaining requests for identifier."""
-        now = time.time()
-        user_requests = self.requests[identifier]
-        
-        # Remove old requests
-        while user_requests and user_requests[0] <= now - self.window_seconds:
-            user_requests.popleft()
+        tat = self.tats.get(identifier)
+        if tat is None:
+            return self.max_requests
         
-        return max(0, self.max_requests - len(user_requests))
+        backlog = max(0.0, tat - time.monotonic())
+        remaining = int((self.window_seconds - backlog) / self.emission_interval + _EPSILON)
+        return max(0, min(self.max_requests, remaining))
     
     def reset_user(self, identifier: str) -> None:
         """Reset rate limit for a specific user."""
-        if identifier in self.requests:
-            del self.requests[identifier]
\ No newline at end of file
+        self.tats.pop(identifier, None)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Return the number of tracked keys and LRU evictions."""
+        return {'keys': len(self.tats), 'max_keys': self.max_keys, 'evicted': self.evicted}
\ No newline at end of file
@@ -1,13 +1,26 @@
 """Retry utilities for handling transient failures."""
 import asyncio
 import logging
-from typing import Callable, Any, Optional
+import random
+import time
+from typing import Callable, Any, Dict, Optional, Set
 from functools import wraps
+from .metrics import metrics
 
 logger = logging.getLogger(__name__)
 
+class RetryAfterError(Exception):
+    """Raised when a provider asks us to wait before sending again."""
+    
+    def __init__(self, retry_after: float, message: str = ""):
+        super().__init__(message or f"Retry after {retry_after}s")
+        self.retry_after = retry_after
+
 def retry_async(max_attempts: int = 3, delay: float = 1.0, backoff: float = 2.0):
-    """Decorator for retrying async functions with exponential backoff."""
+    """Decorator for retrying async functions with exponential backoff.
+    
+    The caller waits out every retry; for sends use ``RetryScheduler`` instead.
+    """
     def decorator(func: Callable) -> Callable:
         @wraps(func)
         async def wrapper(*args, **kwargs) -> Any:
@@ -17,14 +30,18 @@ def retry_async(max_attempts: int = 3, delay: float = 1.0, backoff: float = 2.0)
             for attempt in range(max_attempts):
                 try:
                     return await func(*args, **kwargs)
+                except RetryAfterError:
+                    # The caller paces the retry using the provider's hint
+                    raise
                 except Exception as e:
                     last_exception = e
                     if attempt == max_attempts - 1:
                         logger.error(f"Function {func.__name__} failed after {max_attempts} attempts: {e}")
                         raise
                     
-                    logger.warning(f"Attempt {attempt + 1} failed for {func.__name__}: {e}. Retrying in {current_delay}s...")
-                    await asyncio.sleep(current_delay)
+                    pause = random.uniform(current_delay / 2, current_delay)
+                    logger.warning(f"Attempt {attempt + 1} failed for {func.__name__}: {e}. Retrying in {pause:.2f}s...")
+                    await asyncio.sleep(pause)
                     current_delay *= backoff
             
             raise last_exception
@@ -32,7 +49,10 @@ def retry_async(max_attempts: int = 3, delay: float = 1.0, backoff: float = 2.0)
     return decorator
 
 def retry_sync(max_attempts: int = 3, delay: float = 1.0, backoff: float = 2.0):
-    """Decorator for retrying sync functions with exponential backoff."""
+    """Decorator for retrying sync functions with exponential backoff.
+    
+    Blocks the calling thread between attempts; only use it off the event loop.
+    """
     def decorator(func: Callable) -> Callable:
         @wraps(func)
         def wrapper(*args, **kwargs) -> Any:
@@ -48,11 +68,176 @@ def retry_sync(max_attempts: int = 3, delay: float = 1.0, backoff: float = 2.0):
                         logger.error(f"Function {func.__name__} failed after {max_attempts} attempts: {e}")
                         raise
                     
-                    logger.warning(f"Attempt {attempt + 1} failed for {func.__name__}: {e}. Retrying in {current_delay}s...")
-                    import time
-                    time.sleep(current_delay)
+                    pause = random.uniform(current_delay / 2, current_delay)
+                    logger.warning(f"Attempt {attempt + 1} failed for {func.__name__}: {e}. Retrying in {pause:.2f}s...")
+                    time.sleep(pause)
                     current_delay *= backoff
             
             raise last_exception
         return wrapper
-    return decorator
\ No newline at end of file
+    return decorator
+
+class RetryPolicy:
+    """Exponential backoff with full jitter: attempt n waits up to ``base_delay * 2**n``."""
+    
+    def __init__(self, max_attempts: int = 5, base_delay: float = 1.0, max_delay: float = 60.0):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+    
+    def delay(self, attempt: int) -> float:
+        """Seconds to wait before retry number ``attempt`` (starting at 1)."""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+class RetryBudget:
+    """Caps retries at a fraction of successful calls.
+    
+    Each retry spends a token and each success earns ``ratio`` tokens, up to
+    ``max_tokens``. Retries are allowed while more than half the tokens are
+    left, so a provider that fails everything gets a few retries, not a storm.
+    """
+    
+    def __init__(self, ratio: float = 0.1, max_tokens: float = 10.0):
+        self.ratio = ratio
+        self.max_tokens = max_tokens
+        self.tokens = max_tokens
+    
+    def record_success(self) -> None:
+        self.tokens = min(self.max_tokens, self.tokens + self.ratio)
+    
+    def try_spend(self) -> bool:
+        """Take a token for one retry; False when the budget is exhausted."""
+        if self.tokens <= self.max_tokens / 2:
+            return False
+        self.tokens -= 1
+        return True
+
+class CircuitBreaker:
+    """Fails fast while a dependency is down.
+    
+    After ``failure_threshold`` consecutive failures the breaker opens and
+    ``allow`` refuses calls. Once ``reset_timeout`` seconds have passed one
+    probe call is let through (half-open); its success closes the breaker and
+    its failure opens it again.
+    """
+    
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+    
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probing = False
+        self.opens = metrics.counter('agent_circuit_opens_total', 'Times a circuit breaker opened', circuit=name)
+        self.probes = metrics.counter('agent_circuit_probes_total', 'Half-open probe calls', circuit=name)
+    
+    def allow(self) -> bool:
+        """True if a call may go ahead now."""
+        if self.state == self.CLOSED:
+            return True
+        if self.state == self.OPEN:
+            if time.monotonic() - self.opened_at < self.reset_timeout:
+                return False
+            self.state = self.HALF_OPEN
+            logger.info(f"Circuit {self.name} half-open; sending a probe")
+        if self.probing:
+            return False
+        self.probing = True
+        self.probes.inc()
+        return True
+    
+    def retry_in(self) -> float:
+        """Seconds until an open breaker lets a probe through."""
+        if self.state != self.OPEN:
+            return 0.0
+        return max(0.0, self.opened_at + self.reset_timeout - time.monotonic())
+    
+    def record_success(self) -> None:
+        if self.state != self.CLOSED:
+            logger.info(f"Circuit {self.name} closed")
+        self.state = self.CLOSED
+        self.failures = 0
+        self.probing = False
+    
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                logger.warning(f"Circuit {self.name} opened after {self.failures} failures")
+                self.opens.inc()
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+            self.probing = False
+
+class RetryScheduler:
+    """Runs retries on event-loop timers, so a failed call never sleeps in its caller.
+    
+    ``schedule`` checks the attempt against the policy, then arranges for
+    ``callback`` to run after a jittered backoff; it returns False only when
+    the policy's attempts are used up. Over the budget the retry is not
+    dropped but deferred to the longest backoff, so an outage sheds load
+    without giving up on work.
+    """
+    
+    def __init__(self, policy: Optional[RetryPolicy] = None, budget: Optional[RetryBudget] = None,
+                 name: str = 'default'):
+        self.policy = policy or RetryPolicy()
+        self.budget = budget or RetryBudget()
+        self._timers: Set[asyncio.TimerHandle] = set()
+        self.scheduled = 0
+        self.exhausted = 0
+        self.over_budget = 0
+        self.retries = metrics.counter('agent_retries_total', 'Retries scheduled after a failure', operation=name)
+        self.gave_up = metrics.counter('agent_retries_exhausted_total', 'Operations given up after failures',
+                                       operation=name)
+        self.deferred = metrics.counter('agent_retries_deferred_total', 'Retries pushed back because the budget ran out',
+                                        operation=name)
+    
+    def schedule(self, attempt: int, callback: Callable, *args) -> bool:
+        """Run ``callback(*args)`` after the backoff for retry ``attempt``; False to give up."""
+        if attempt > self.policy.max_attempts:
+            self.exhausted += 1
+            self.gave_up.inc()
+            return False
+        if self.budget.try_spend():
+            delay = self.policy.delay(attempt)
+            self.scheduled += 1
+            self.retries.inc()
+        else:
+            delay = random.uniform(self.policy.max_delay / 2, self.policy.max_delay)
+            self.over_budget += 1
+            self.deferred.inc()
+        
+        def fire():
+            self._timers.discard(handle)
+            callback(*args)
+        
+        handle = asyncio.get_running_loop().call_later(delay, fire)
+        self._timers.add(handle)
+        return True
+    
+    def record_success(self) -> None:
+        self.budget.record_success()
+    
+    def cancel_all(self) -> int:
+        """Drop every pending retry; returns how many were dropped."""
+        dropped = len(self._timers)
+        for handle in self._timers:
+            handle.cancel()
+        self._timers.clear()
+        return dropped
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Return pending, scheduled, deferred and given-up retry counts."""
+        return {
+            'pending': len(self._timers),
+            'scheduled': self.scheduled,
+            'exhausted': self.exhausted,
+            'over_budget': self.over_budget,
+            'budget_tokens': self.budget.tokens
+        }
\ No newline at end of file
@@ -1,8 +1,10 @@
 """Security utilities for agent_micheal."""
+import base64
 import hashlib
 import hmac
 import secrets
-from typing import Optional
+from typing import Dict, Optional
+from .text import sanitize
 
 class SecurityUtils:
     """Security utilities for message validation and encryption."""
@@ -28,15 +30,25 @@ class SecurityUtils:
         ).hexdigest()
         return hmac.compare_digest(signature, expected_signature)
     
+    @staticmethod
+    def compute_twilio_signature(url: str, params: Dict[str, str], auth_token: str) -> str:
+        """Compute the X-Twilio-Signature value for a form-encoded webhook."""
+        # Twilio signs the full URL followed by each POST parameter name and value, sorted by name
+        payload = url + ''.join(f"{key}{params[key]}" for key in sorted(params))
+        return base64.b64encode(
+            hmac.new(auth_token.encode(), payload.encode(), hashlib.sha1).digest()
+        ).decode()
+    
+    @staticmethod
+    def verify_twilio_signature(url: str, params: Dict[str, str], signature: str, auth_token: str) -> bool:
+        """Verify the X-Twilio-Signature header of a form-encoded webhook."""
+        expected_signature = SecurityUtils.compute_twilio_signature(url, params, auth_token)
+        return hmac.compare_digest(signature.encode(), expected_signature.encode())
+    
     @staticmethod
     def sanitize_text(text: str) -> str:
         """Sanitize text input to prevent injection attacks."""
-        # Remove potentially dangerous characters
-        dangerous_chars = ['<', '>', '"', "'", '&', '\x00']
-        sanitized = text
-        for char in dangerous_chars:
-            sanitized = sanitized.replace(char, '')
-        return sanitized.strip()
+        return sanitize(text)
     
     @staticmethod
     def validate_email(email: str) -> bool:
@@ -0,0 +1,151 @@
+"""Pool of authenticated, reusable SMTP connections."""
+import logging
+import smtplib
+import threading
+import time
+from collections import deque
+from email.message import Message as EmailMessage
+from typing import Any, Deque, Dict
+
+logger = logging.getLogger(__name__)
+
+class PooledConnection:
+    """An SMTP session plus the bookkeeping needed to decide when to recycle it."""
+    
+    def __init__(self, smtp: smtplib.SMTP):
+        self.smtp = smtp
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+        self.messages_sent = 0
+    
+    def close(self):
+        try:
+            self.smtp.quit()
+        except Exception:
+            try:
+                self.smtp.close()
+            except Exception:
+                pass
+
+class SMTPConnectionPool:
+    """Thread-safe pool of warm SMTP sessions.
+    
+    Connections are reused across sends until they have been idle longer than
+    ``max_idle_age`` or have sent ``max_messages`` messages. A connection idle
+    for more than ``health_check_after`` seconds is probed with NOOP before
+    reuse. At most ``max_size`` connections exist at once; extra senders wait.
+    """
+    
+    def __init__(self, host: str, port: int, username: str = "", password: str = "",
+                 starttls: bool = True, max_size: int = 4, max_idle_age: float = 60.0,
+                 max_messages: int = 100, health_check_after: float = 5.0,
+                 timeout: float = 30.0):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.starttls = starttls
+        self.max_size = max_size
+        self.max_idle_age = max_idle_age
+        self.max_messages = max_messages
+        self.health_check_after = health_check_after
+        self.timeout = timeout
+        self._idle: Deque[PooledConnection] = deque()
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_size)
+        self.connections_opened = 0
+        self.connections_reused = 0
+        self.messages_sent = 0
+    
+    def _connect(self) -> PooledConnection:
+        smtp = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        try:
+            if self.starttls:
+                smtp.starttls()
+            if self.username:
+                smtp.login(self.username, self.password)
+        except Exception:
+            smtp.close()
+            raise
+        self.connections_opened += 1
+        return PooledConnection(smtp)
+    
+    def _is_usable(self, conn: PooledConnection) -> bool:
+        idle_for = time.monotonic() - conn.last_used
+        if idle_for > self.max_idle_age:
+            return False
+        if idle_for > self.health_check_after:
+            try:
+                return conn.smtp.noop()[0] == 250
+            except Exception:
+                return False
+        return True
+    
+    def acquire(self) -> PooledConnection:
+        """Take a healthy connection from the pool, opening one if needed."""
+        self._slots.acquire()
+        try:
+            while True:
+                with self._lock:
+                    conn = self._idle.pop() if self._idle else None
+                if conn is None:
+                    return self._connect()
+                if self._is_usable(conn):
+                    self.connections_reused += 1
+                    return conn
+                conn.close()
+        except Exception:
+            self._slots.release()
+            raise
+    
+    def release(self, conn: PooledConnection, reusable: bool = True) -> None:
+        """Return a connection to the pool, or close it if it should be retired."""
+        try:
+            if reusable and conn.messages_sent < self.max_messages:
+                conn.last_used = time.monotonic()
+                with self._lock:
+                    self._idle.append(conn)
+            else:
+                conn.close()
+        finally:
+            self._slots.release()
+    
+    def send(self, msg: EmailMessage) -> None:
+        """Send a message over a pooled connection (blocking).
+        
+        A connection the server has silently dropped is replaced once before
+        the error is raised to the caller.
+        """
+        for attempt in range(2):
+            conn = self.acquire()
+            try:
+                conn.smtp.send_message(msg)
+            except smtplib.SMTPServerDisconnected:
+                self.release(conn, reusable=False)
+                if attempt:
+                    raise
+                continue
+            except Exception:
+                self.release(conn, reusable=False)
+                raise
+            conn.messages_sent += 1
+            self.messages_sent += 1
+            self.release(conn)
+            return
+    
+    def close(self) -> None:
+        """Close all idle connections."""
+        with self._lock:
+            idle, self._idle = list(self._idle), deque()
+        for conn in idle:
+            conn.close()
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Return pool usage counters."""
+        return {
+            'idle': len(self._idle),
+            'max_size': self.max_size,
+            'connections_opened': self.connections_opened,
+            'connections_reused': self.connections_reused,
+            'messages_sent': self.messages_sent
+        }
\ No newline at end of file
@@ -0,0 +1,94 @@
+"""Normalization of inbound message text, shared by all connectors."""
+import binascii
+import html
+import logging
+import re
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+# Characters that were never allowed through, plus C0 controls other than tab/newline/CR
+_REMOVED_CHARS = '<>"\'&\x00' + ''.join(chr(c) for c in range(1, 32) if chr(c) not in '\t\n\r') + '\x7f'
+_SANITIZE_TABLE = str.maketrans('', '', _REMOVED_CHARS)
+
+_HTML_DROP = re.compile(r'<(script|style|head)\b.*?</\1\s*>|<!--.*?-->', re.IGNORECASE | re.DOTALL)
+_HTML_BREAK = re.compile(r'<(?:br|/p|/div|/li|/tr|/h[1-6]|p|div|li|tr|h[1-6])\b[^>]*>', re.IGNORECASE)
+_HTML_QUOTE = re.compile(r'<blockquote\b.*?</blockquote\s*>', re.IGNORECASE | re.DOTALL)
+_HTML_TAG = re.compile(r'<[^>]*>')
+_SPACES = re.compile(r'[ \t\r\f\v\xa0]+')
+_BLANK_LINES = re.compile(r'\n\s*\n\s*(?:\n\s*)+')
+
+# First line of the quoted history appended by common mail clients
+_REPLY_HEADER = re.compile(
+    r'^(?:On\b[^\n]{0,200}(?:\n[^\n]{0,200})?\bwrote:|-{2,}\s*Original Message\s*-{2,}|_{20,}|'
+    r'-{2,}\s*Forwarded message\s*-{2,}|Le\b.{0,200}\ba écrit\s?:|Am\b.{0,200}\bschrieb\b.{0,100}:)\s*$',
+    re.IGNORECASE | re.MULTILINE
+)
+_OUTLOOK_HEADER = re.compile(r'^From:.*\n(?:Sent|Date):', re.MULTILINE)
+_SIGNATURE = re.compile(r'^-- ?$', re.MULTILINE)
+
+def sanitize(text: str) -> str:
+    """Remove markup-sensitive and control characters in a single pass."""
+    return text.translate(_SANITIZE_TABLE).strip()
+
+def strip_html(text: str, drop_quotes: bool = False) -> str:
+    """Reduce an HTML body to its visible text, one line per block element."""
+    text = _HTML_DROP.sub('', text)
+    if drop_quotes:
+        text = _HTML_QUOTE.sub('\n', text)
+    text = _HTML_BREAK.sub('\n', text)
+    text = _HTML_TAG.sub('', text)
+    return html.unescape(text)
+
+def strip_quoted(text: str) -> str:
+    """Drop quoted reply history, forwarded headers and the signature."""
+    cut = len(text)
+    for pattern in (_REPLY_HEADER, _OUTLOOK_HEADER, _SIGNATURE):
+        match = pattern.search(text, 0, cut)
+        if match:
+            cut = match.start()
+    return '\n'.join(line for line in text[:cut].split('\n') if not line.lstrip().startswith('>'))
+
+def collapse_whitespace(text: str) -> str:
+    """Collapse runs of spaces and of blank lines."""
+    text = _SPACES.sub(' ', text.replace('\r\n', '\n'))
+    return _BLANK_LINES.sub('\n\n', text)
+
+def truncate(text: str, max_length: Optional[int]) -> str:
+    """Cut text to ``max_length`` characters, preferring a word boundary."""
+    if not max_length or len(text) <= max_length:
+        return text
+    cut = text.rfind(' ', max_length // 2, max_length + 1)
+    return text[:cut if cut > 0 else max_length].rstrip()
+
+def normalize_text(text: str, max_length: Optional[int] = None, is_html: bool = False,
+                   strip_replies: bool = False) -> str:
+    """Run the inbound pipeline: HTML, quoted history, whitespace, characters, length.
+    
+    The length limit is applied to the raw text first as well, so a huge body
+    never goes through the regular expressions in full.
+    """
+    if max_length and len(text) > max_length * 8:
+        text = text[:max_length * 8]
+    if is_html:
+        text = strip_html(text, drop_quotes=strip_replies)
+    if strip_replies:
+        text = strip_quoted(text)
+    return truncate(sanitize(collapse_whitespace(text)), max_length)
+
+def decode_payload(payload: bytes, transfer_encoding: Optional[str], charset: Optional[str]) -> str:
+    """Undo a Content-Transfer-Encoding and decode the result to text."""
+    encoding = (transfer_encoding or '').strip().lower()
+    try:
+        if encoding == 'quoted-printable':
+            payload = binascii.a2b_qp(payload)
+        elif encoding == 'base64':
+            # A partial fetch can end mid-quantum; drop the incomplete tail
+            payload = b''.join(payload.split())
+            payload = binascii.a2b_base64(payload[:len(payload) - len(payload) % 4])
+    except (binascii.Error, ValueError) as e:
+        logger.debug(f"Could not undo {encoding} encoding: {e}")
+    try:
+        return payload.decode(charset or 'utf-8', errors='replace')
+    except LookupError:
+        return payload.decode('utf-8', errors='replace')
\ No newline at end of file